@@ -0,0 +1,57 @@
+"""
+Micro-benchmark: per-node activation calls (one function call and host sync per node, as in
+DefaultNode.forward) against one fused call over all the nodes.
+
+    python benchmark/activation_benchmark.py --nodes 64 --batch 1024 --device cuda
+"""
+import argparse
+import time
+
+import torch
+
+from torchneat.common import ACT, apply_activation, FusedActivation
+
+
+def per_node(ids, z, act_funcs):
+    return torch.stack([apply_activation(ids[i], z[:, i], act_funcs) for i in range(z.shape[1])], dim=1)
+
+
+def timeit(func, repeat, device):
+    func()  # warm up
+    if device.type == "cuda":
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    if device.type == "cuda":
+        torch.cuda.synchronize()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=64)
+    parser.add_argument("--batch", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--compile", action="store_true")
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    act_funcs = ACT.get_all_funcs()
+    ids = torch.randint(-1, len(act_funcs), (args.nodes,), device=device)
+    z = torch.randn(args.batch, args.nodes, device=device)
+    fused = FusedActivation(act_funcs, compile=args.compile)
+
+    expected = per_node(ids, z, act_funcs)
+    assert torch.allclose(fused(ids, z), expected, equal_nan=True)
+
+    t_loop = timeit(lambda: per_node(ids, z, act_funcs), args.repeat, device)
+    t_fused = timeit(lambda: fused(ids, z), args.repeat, device)
+    print(f"nodes={args.nodes} batch={args.batch} device={device} funcs={len(act_funcs)}")
+    print(f"per-node calls: {t_loop * 1e3:.3f} ms")
+    print(f"fused:          {t_fused * 1e3:.3f} ms ({t_loop / t_fused:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
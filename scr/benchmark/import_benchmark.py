@@ -0,0 +1,57 @@
+"""
+Import-time benchmark: wall time of a fresh interpreter importing torchneat modules,
+and which optional heavy dependencies each import pulls in.
+
+    python benchmark/import_benchmark.py --repeat 5
+    python -X importtime -c "import torchneat.genome" 2> importtime.log  # per-module breakdown
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+MODULES = [
+    "torch",
+    "torchneat.common",
+    "torchneat.genome",
+    "torchneat.algorithm.island",
+    "torchneat.algorithm.neat.speciation",
+]
+HEAVY = ["sympy", "matplotlib", "onnx", "torch.distributed"]
+
+# the directory holding the torchneat package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHECK = "import sys, {module}; print(','.join(m for m in {heavy!r} if m in sys.modules))"
+
+
+def run(module):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.environ.get("PYTHONPATH", "")]))
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", CHECK.format(module=module, heavy=HEAVY)],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    return time.perf_counter() - start, out.stdout.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    run(args.modules[0])  # warm the file system cache
+    for module in args.modules:
+        times, loaded = [], ""
+        for _ in range(args.repeat):
+            t, loaded = run(module)
+            times.append(t)
+        print(f"{module:<40} best {min(times) * 1e3:8.1f} ms  mean {sum(times) / len(times) * 1e3:8.1f} ms  loads: {loaded or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import pytest
+import torch
+
+from torchneat.genome import DefaultGenome
+from torchneat.genome.capacity import AdaptiveCapacity, bucket_population, evaluate_in_buckets, resize
+from torchneat.genome.utils import add_conn, add_node
+
+nan = float("nan")
+INPUTS = torch.randn(8, 2, generator=torch.Generator().manual_seed(0))
+
+
+def make_population():
+    # inputs 0, 1; hidden 2, 3; output 4: all 5 nodes and 6 conns are used
+    genome = DefaultGenome(num_inputs=2, num_outputs=1, max_nodes=5, max_conns=6, init_hidden_layers=(2,))
+    pop_nodes, pop_conns = genome.initialize_population(None, 0, 3)
+    return genome, pop_nodes, pop_conns
+
+
+def outputs(genome, pop_nodes, pop_conns):
+    return torch.stack([
+        genome.forward(None, genome.transform(None, n, c), INPUTS) for n, c in zip(pop_nodes, pop_conns)
+    ])
+
+
+def fixed_keys(pop_nodes):
+    return pop_nodes[:, [0, 1, 4], 0]
+
+
+def test_reserve_and_shrink_preserve_outputs():
+    genome, pop_nodes, pop_conns = make_population()
+    expected = outputs(genome, pop_nodes, pop_conns)
+    capacity = AdaptiveCapacity(genome, node_step=8, conn_step=16)
+
+    grown_nodes, grown_conns = capacity.reserve(pop_nodes, pop_conns)
+    assert grown_nodes.shape[1] == 8 and grown_conns.shape[1] == 16
+    assert (genome.max_nodes, genome.max_conns) == (8, 16)
+    assert torch.equal(fixed_keys(grown_nodes), torch.tensor([[0.0, 1.0, 4.0]] * 3))
+    assert torch.allclose(outputs(genome, grown_nodes, grown_conns), expected)
+
+    # holes in the middle and a much larger capacity: shrink compacts and trims
+    big_nodes, big_conns = resize(grown_nodes, 40), resize(grown_conns, 64)
+    big_nodes[:, 10] = big_nodes[:, 2]
+    big_nodes[:, 2] = nan
+    big_conns[:, 30] = big_conns[:, 0]
+    big_conns[:, 0] = nan
+    expected = outputs(genome, big_nodes, big_conns)
+
+    small_nodes, small_conns = capacity.shrink(big_nodes, big_conns)
+    assert small_nodes.shape[1] == 8 and small_conns.shape[1] == 16
+    assert torch.equal(fixed_keys(small_nodes), torch.tensor([[0.0, 1.0, 4.0]] * 3))
+    assert torch.allclose(outputs(genome, small_nodes, small_conns), expected)
+
+
+def test_buckets_match_unbucketed_evaluation():
+    genome, pop_nodes, pop_conns = make_population()
+    pop_nodes, pop_conns = resize(pop_nodes, 16), resize(pop_conns, 32)
+    # genome 1 gets two more hidden nodes between input 0 and the output, far from the front
+    pop_nodes[1, 12] = torch.tensor([5.0, 0.1, 1.0, 0.0, 0.0])
+    pop_nodes[1, 14] = torch.tensor([6.0, -0.2, 1.0, 0.0, 0.0])
+    pop_conns[1, 20] = torch.tensor([0.0, 5.0, 0.5])
+    pop_conns[1, 25] = torch.tensor([5.0, 6.0, -0.7])
+    pop_conns[1, 31] = torch.tensor([6.0, 4.0, 0.9])
+
+    def eval_func(nodes, conns):
+        return outputs(genome, nodes, conns).sum(dim=(1, 2))
+
+    buckets = bucket_population(pop_nodes, pop_conns, node_step=1, conn_step=1, fixed_rows=5)
+    assert sorted(len(indices) for indices, _, _ in buckets) == [1, 2]
+    for indices, bucket_nodes, bucket_conns in buckets:
+        if len(indices) == 1:
+            assert bucket_nodes.shape[1:2] == (7,) and bucket_conns.shape[1:2] == (9,)
+
+    expected = eval_func(pop_nodes, pop_conns)
+    fitness = evaluate_in_buckets(eval_func, pop_nodes, pop_conns, node_step=1, conn_step=1, fixed_rows=5)
+    assert torch.allclose(fitness, expected)
+
+
+def test_add_to_full_genome_raises():
+    _, pop_nodes, pop_conns = make_population()
+    nodes, conns = pop_nodes[0].clone(), pop_conns[0].clone()
+    with pytest.raises(ValueError):
+        add_node(nodes, torch.tensor([5.0]), torch.tensor([0.0, 1.0, 0.0, 0.0]))
+    with pytest.raises(ValueError):
+        add_conn(conns, torch.tensor([0.0, 4.0]), torch.tensor([1.0]))
+
+
+if __name__ == "__main__":
+    test_reserve_and_shrink_preserve_outputs()
+    test_buckets_match_unbucketed_evaluation()
+    test_add_to_full_genome_raises()
+    print("Capacity: OK")
@@ -0,0 +1,64 @@
+import torch
+
+from torchneat.common import batch_hash_array, hash_array, set_deterministic
+from torchneat.common.functions.agg_torch import mean_, product_, sum_
+from torchneat.genome import DefaultGenome
+
+
+def test_aggregations_ignore_nan():
+    z = torch.tensor([[1.0, 2.0], [float("nan"), 4.0], [3.0, float("nan")]])
+    assert torch.equal(mean_(z), torch.tensor([2.0, 3.0]))
+    assert torch.equal(sum_(z), torch.tensor([4.0, 6.0]))
+    assert torch.equal(product_(z), torch.tensor([3.0, 8.0]))
+    # a node without any valid input aggregates to 0, not NaN
+    empty = torch.full((3, 2), float("nan"))
+    assert torch.equal(mean_(empty), torch.zeros(2))
+    assert torch.equal(mean_(torch.empty(0, 2)), torch.zeros(2))
+
+
+def test_ordered_reductions():
+    z = torch.randn(64, 3, generator=torch.Generator().manual_seed(0))
+    set_deterministic(True)
+    try:
+        ordered = sum_(z)
+        assert torch.allclose(ordered, z.sum(dim=0), atol=1e-5)
+        # the same values in the same order give the same bits, whatever the batch around them
+        assert torch.equal(sum_(z[:, :1])[0], ordered[0])
+        assert torch.allclose(mean_(z), z.mean(dim=0), atol=1e-6)
+    finally:
+        set_deterministic(False)
+
+
+def test_batch_hash():
+    genome = DefaultGenome(num_inputs=2, num_outputs=1, max_nodes=5, max_conns=4)
+    pop_nodes, pop_conns = genome.initialize_population(None, 0, 6)
+    hashs = genome.batch_hash(pop_nodes, pop_conns)
+    for p in range(6):
+        assert hashs[p] == genome.hash(pop_nodes[p], pop_conns[p])
+    assert len(set(hashs.tolist())) == 6
+    assert genome.population_hash(pop_nodes, pop_conns) == hash_array(hashs)
+    # the population hash depends on the order of the genomes
+    assert genome.population_hash(pop_nodes.flip(0), pop_conns.flip(0)) != genome.population_hash(pop_nodes, pop_conns)
+
+
+def test_hash_array_long_rows():
+    # a length that is not a power of two, so the last doubling of the powers is cut
+    rows = torch.randn(3, 1000, generator=torch.Generator().manual_seed(0))
+    rows[1, 7] = float("nan")
+    hashs = batch_hash_array(rows)
+    assert hashs.tolist() == [hash_array(row) for row in rows]
+    assert hashs.min() >= 0 and hashs.max() < 2**32
+
+    swapped = rows[0].clone()
+    swapped[[10, 900]] = swapped[[900, 10]]
+    assert hash_array(swapped) != hashs[0]
+    # a trailing zero is not lost
+    assert hash_array(torch.cat([rows[0], torch.zeros(1)])) != hashs[0]
+
+
+if __name__ == "__main__":
+    test_aggregations_ignore_nan()
+    test_ordered_reductions()
+    test_batch_hash()
+    test_hash_array_long_rows()
+    print("Deterministic: OK")
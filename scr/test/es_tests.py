@@ -0,0 +1,108 @@
+import torch
+
+from torchneat.common.functions import act_torch
+from torchneat.genome import DefaultGenome
+from torchneat.genome.es import AntitheticES
+from torchneat.genome.gene import DefaultConn, DefaultNode
+
+TARGET = torch.tensor([1.5, -1.0, 0.5])
+INPUTS = torch.randn(64, 3, generator=torch.Generator().manual_seed(0))
+
+
+def make_genome(lower=-5.0, upper=5.0):
+    # a linear network: output = sum(w_i * x_i), the output node has no bias and is not activated
+    return DefaultGenome(
+        num_inputs=3,
+        num_outputs=1,
+        max_nodes=4,
+        max_conns=4,
+        node_gene=DefaultNode(bias_init_std=0.0, activation_options=act_torch.identity_),
+        conn_gene=DefaultConn(weight_lower_bound=lower, weight_upper_bound=upper),
+    )
+
+
+def quadratic_fitness(outputs):
+    # outputs (M, B, 1); the optimum is weights == TARGET
+    return -torch.mean((outputs[..., 0] - INPUTS @ TARGET) ** 2, dim=1)
+
+
+def weights(pop_conns):
+    return pop_conns[:, :3, 2]
+
+
+def test_antithetic_noise():
+    es = AntitheticES(make_genome(), num_pairs=5)
+    noise = es.sample(3, 4)
+    assert noise.shape == (3, 10, 4)
+    assert torch.equal(noise[:, :5], -noise[:, 5:])
+
+
+def test_evaluate_matches_forward():
+    genome = make_genome()
+    nodes, conns = genome.initialize(None, 0)
+    es = AntitheticES(genome, num_pairs=2)
+    noise = es.sample(1, conns.shape[0])
+    fitness = es.evaluate(nodes[None], conns[None], noise, quadratic_fitness, INPUTS)
+
+    for m in range(es.num_samples):
+        perturbed = conns.clone()
+        perturbed[:, 2] += es.sigma * noise[0, m]
+        outputs = genome.forward(None, genome.transform(None, nodes, perturbed), INPUTS)
+        assert torch.allclose(fitness[0, m], quadratic_fitness(outputs[None])[0], atol=1e-5)
+
+
+def test_step_moves_toward_optimum():
+    genome = make_genome()
+    pop_nodes, pop_conns = genome.initialize_population(None, 0, 3)
+    es = AntitheticES(genome, num_pairs=8, sigma=0.05, lr=0.05)
+    start = torch.linalg.norm(weights(pop_conns) - TARGET, dim=1)
+
+    current = pop_conns
+    for _ in range(40):
+        pop_nodes, current, fitness = es.step(pop_nodes, current, [0, 2], quadratic_fitness, INPUTS)
+        assert fitness.shape == (2, es.num_samples)
+
+    end = torch.linalg.norm(weights(current) - TARGET, dim=1)
+    assert torch.all(end[[0, 2]] < 0.5 * start[[0, 2]])
+    # genomes that are not stepped are untouched
+    torch.testing.assert_close(current[1], pop_conns[1], equal_nan=True, rtol=0, atol=0)
+
+
+def test_step_keeps_empty_rows_and_bounds():
+    genome = make_genome(lower=-1.0, upper=1.0)
+    pop_nodes, pop_conns = genome.initialize_population(None, 0, 2)
+    # one slot is empty in every genome
+    assert torch.isnan(pop_conns[:, 3]).all()
+    es = AntitheticES(genome, num_pairs=8, sigma=0.05, lr=0.2)
+
+    for _ in range(20):
+        pop_nodes, pop_conns, _ = es.step(pop_nodes, pop_conns, [0, 1], quadratic_fitness, INPUTS)
+        assert torch.isnan(pop_conns[:, 3]).all()
+        assert not torch.isnan(pop_conns[:, :3]).any()
+        assert torch.all((weights(pop_conns) >= -1.0) & (weights(pop_conns) <= 1.0))
+    # the target is outside the bounds: the first weight ends at (or next to) the upper bound
+    assert torch.all(pop_conns[:, 0, 2] > 0.8)
+
+
+def test_forward_in_place_matches_autograd_path():
+    genome = DefaultGenome(num_inputs=2, num_outputs=2, max_nodes=8, max_conns=12, init_hidden_layers=(3,))
+    nodes, conns = genome.initialize(None, 0)
+    transformed = genome.transform(None, nodes, conns)
+    inputs = torch.randn(16, 2, generator=torch.Generator().manual_seed(1))
+
+    with torch.no_grad():
+        expected = genome.forward(None, transformed, inputs)
+    x = inputs.clone().requires_grad_(True)
+    outputs = genome.forward(None, transformed, x)
+    outputs.sum().backward()
+    assert torch.allclose(outputs.detach(), expected)
+    assert torch.isfinite(x.grad).all()
+
+
+if __name__ == "__main__":
+    test_antithetic_noise()
+    test_evaluate_matches_forward()
+    test_step_moves_toward_optimum()
+    test_step_keeps_empty_rows_and_bounds()
+    test_forward_in_place_matches_autograd_path()
+    print("ES: OK")
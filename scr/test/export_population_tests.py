@@ -0,0 +1,71 @@
+import torch
+
+from torchneat.genome import DefaultGenome
+from torchneat.genome.utils import batch_re_cound_idx, re_cound_idx
+
+nan = float("nan")
+
+
+def make_population():
+    # inputs 0, 1; output 2; hidden keys are not continuous and empty slots are interleaved
+    pop_nodes = torch.tensor([
+        [[0.0], [1.0], [2.0], [9.0], [nan], [5.0]],
+        [[0.0], [1.0], [2.0], [nan], [nan], [7.0]],
+    ])
+    pop_conns = torch.tensor([
+        [[0, 9, 0.1], [9, 2, 0.2], [1, 5, 0.3], [5, 9, 0.4], [nan, nan, nan]],
+        [[7, 2, 0.5], [nan, nan, nan], [0, 7, 0.6], [1, 2, 0.7], [nan, nan, nan]],
+    ])
+    return pop_nodes, pop_conns
+
+
+def test_batch_re_cound_idx():
+    pop_nodes, pop_conns = make_population()
+    new_nodes, new_conns = batch_re_cound_idx(pop_nodes, pop_conns, [0, 1], [2])
+
+    # hidden nodes are renumbered from 3 in slot order, endpoints follow, attrs are untouched
+    assert torch.equal(torch.nan_to_num(new_nodes[0, :, 0], nan=-1), torch.tensor([0, 1, 2, 3, -1, 4.0]))
+    assert torch.equal(torch.nan_to_num(new_nodes[1, :, 0], nan=-1), torch.tensor([0, 1, 2, -1, -1, 3.0]))
+    assert new_conns[0, :4, :2].tolist() == [[0, 3], [3, 2], [1, 4], [4, 3]]
+    assert new_conns[1, [0, 2, 3], :2].tolist() == [[3, 2], [0, 3], [1, 2]]
+    assert torch.equal(torch.isnan(new_conns), torch.isnan(pop_conns))
+    assert torch.equal(torch.nan_to_num(new_conns[..., 2]), torch.nan_to_num(pop_conns[..., 2]))
+
+    # every genome is handled on its own, whatever else is in the batch
+    for p in range(2):
+        nodes, conns = re_cound_idx(pop_nodes[p], pop_conns[p], [0, 1], [2])
+        assert torch.equal(torch.nan_to_num(nodes), torch.nan_to_num(new_nodes[p]))
+        assert torch.equal(torch.nan_to_num(conns), torch.nan_to_num(new_conns[p]))
+
+
+def test_export_population_matches_network_dict():
+    genome = DefaultGenome(num_inputs=2, num_outputs=1, max_nodes=7, max_conns=8, init_hidden_layers=(2,))
+    pop_nodes, pop_conns = genome.initialize_population(None, 0, 4)
+    # drop a connection and a node in one genome, so the genomes differ in size
+    pop_conns[2, 0] = nan
+    pop_nodes[3, 2] = nan
+
+    indices = [3, 0, 2]
+    exported = genome.export_population(None, pop_nodes, pop_conns, indices=indices)
+    nodes, conns = exported["nodes"], exported["conns"]
+    for i in indices:
+        expected = genome.network_dict(None, pop_nodes[i], pop_conns[i])
+
+        rows = torch.nonzero(nodes["genome"] == i, as_tuple=True)[0]
+        assert sorted(nodes["index"][rows].long().tolist()) == sorted(expected["nodes"])
+        for r in rows.tolist():
+            node = expected["nodes"][int(nodes["index"][r])]
+            assert abs(float(nodes["bias"][r]) - node["bias"]) < 1e-6
+            assert abs(float(nodes["response"][r]) - node["res"]) < 1e-6
+
+        rows = torch.nonzero(conns["genome"] == i, as_tuple=True)[0]
+        keys = list(zip(conns["input_index"][rows].long().tolist(), conns["output_index"][rows].long().tolist()))
+        assert sorted(keys) == sorted(expected["conns"])
+        for key, r in zip(keys, rows.tolist()):
+            assert abs(float(conns["weight"][r]) - expected["conns"][key]["weight"]) < 1e-6
+
+
+if __name__ == "__main__":
+    test_batch_re_cound_idx()
+    test_export_population_matches_network_dict()
+    print("Export population: OK")
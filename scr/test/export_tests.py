@@ -0,0 +1,65 @@
+import os
+import tempfile
+
+import pytest
+import torch
+
+from torchneat.common.functions import act_torch, agg_torch
+from torchneat.genome import DefaultGenome
+from torchneat.genome.gene import DefaultNode
+from torchneat.genome.export import export_module, to_onnx, to_torchscript, verify_export
+
+
+def make_genome():
+    node_gene = DefaultNode(
+        activation_options=[act_torch.sigmoid_, act_torch.tanh_, act_torch.relu_],
+        aggregation_options=[agg_torch.sum_, agg_torch.max_],
+    )
+    genome = DefaultGenome(
+        num_inputs=3, num_outputs=2, max_nodes=12, max_conns=24, node_gene=node_gene, init_hidden_layers=(4, 2)
+    )
+    nodes, conns = genome.initialize(None, 0)
+    inputs = torch.randn(16, 3, generator=torch.Generator().manual_seed(0))
+    return genome, nodes, conns, inputs
+
+
+def test_export_eager_and_torchscript():
+    genome, nodes, conns, inputs = make_genome()
+    module = export_module(genome, None, nodes, conns)
+    # every non-input level is one or more blocks
+    assert len(module.blocks) >= 3
+
+    assert verify_export(genome, None, nodes, conns, module, inputs) < 1e-5
+    scripted = to_torchscript(module, genome.num_inputs)
+    assert verify_export(genome, None, nodes, conns, scripted, inputs) < 1e-5
+
+
+def test_export_rejects_wrong_outputs():
+    genome, nodes, conns, inputs = make_genome()
+    module = export_module(genome, None, nodes, conns)
+    with pytest.raises(ValueError):
+        verify_export(genome, None, nodes, conns, lambda x: module(x) + 1.0, inputs)
+
+
+def test_export_onnx():
+    pytest.importorskip("onnx")
+    ort = pytest.importorskip("onnxruntime")
+    genome, nodes, conns, inputs = make_genome()
+    module = export_module(genome, None, nodes, conns)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "genome.onnx")
+        to_onnx(module, genome.num_inputs, path)
+        session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+
+        def run(x):
+            return session.run(None, {"inputs": x.numpy()})[0]
+
+        assert verify_export(genome, None, nodes, conns, run, inputs) < 1e-5
+
+
+if __name__ == "__main__":
+    test_export_eager_and_torchscript()
+    test_export_rejects_wrong_outputs()
+    test_export_onnx()
+    print("Export: OK")
@@ -0,0 +1,31 @@
+import torch
+
+from torchneat.genome import DefaultGenome
+from torchneat.genome.finetune import finetune_weights
+
+
+def test_finetune_fits_linear_target():
+    # the output node is not activated: y = bias + response * weight * x
+    genome = DefaultGenome(num_inputs=1, num_outputs=1, max_nodes=3, max_conns=3)
+    init = [genome.initialize(None, seed) for seed in range(3)]
+    pop_nodes = torch.stack([n for n, _ in init])
+    pop_conns = torch.stack([c for _, c in init])
+
+    inputs = torch.linspace(-1, 1, 16)[:, None]
+    targets = 2 * inputs + 1
+
+    def loss_func(outputs):
+        return torch.mean((outputs - targets) ** 2)
+
+    new_nodes, new_conns, losses = finetune_weights(
+        genome, None, pop_nodes, pop_conns, [0, 2], loss_func, inputs, steps=300, lr=0.05
+    )
+    assert (losses < 1e-3).all()
+    # genome 1 was not selected, keys and NaN padding are unchanged
+    assert torch.equal(torch.nan_to_num(new_nodes[1]), torch.nan_to_num(pop_nodes[1]))
+    assert torch.equal(torch.isnan(new_conns), torch.isnan(pop_conns))
+
+
+if __name__ == "__main__":
+    test_finetune_fits_linear_target()
+    print("Finetune: OK")
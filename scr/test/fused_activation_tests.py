@@ -0,0 +1,60 @@
+import torch
+
+from torchneat.common import FusedActivation, apply_activation, fused_activation
+from torchneat.common.functions import act_torch
+
+ACT_FUNCS = [
+    act_torch.identity_,
+    act_torch.exp_,
+    act_torch.sigmoid_,
+    act_torch.tanh_,
+    act_torch.relu_,
+    act_torch.inv_,
+    act_torch.log_,
+    act_torch.abs_,
+]
+
+
+def per_id(ids, z):
+    """the reference: every element through apply_activation with its own scalar id"""
+    return torch.stack([apply_activation(int(i), v, ACT_FUNCS) for i, v in zip(ids, z)])
+
+
+def test_fused_matches_apply_activation():
+    generator = torch.Generator().manual_seed(0)
+    ids = torch.randint(-1, len(ACT_FUNCS), (256,), generator=generator)
+    values = 3 * torch.randn(256, generator=generator)
+
+    z = values.clone().requires_grad_(True)
+    out = fused_activation(ids, z, ACT_FUNCS)
+    out.sum().backward()
+
+    z_ref = values.clone().requires_grad_(True)
+    expected = per_id(ids, z_ref)
+    expected.sum().backward()
+
+    assert torch.allclose(out, expected)
+    assert torch.allclose(z.grad, z_ref.grad)
+    assert torch.allclose(FusedActivation(ACT_FUNCS)(ids, values), expected.detach())
+
+
+def test_unselected_overflow_does_not_leak():
+    # exp(100) overflows in float32, but no element selects it
+    ids = torch.tensor([0, -1, 4])
+    z = torch.tensor([100.0, 100.0, 100.0], requires_grad=True)
+    out = fused_activation(ids, z, ACT_FUNCS)
+    out.sum().backward()
+    assert torch.equal(out.detach(), torch.tensor([100.0, 100.0, 100.0]))
+    assert torch.equal(z.grad, torch.tensor([1.0, 1.0, 1.0]))
+
+    # ids broadcast with the node values: (N,) ids for (B, N) values
+    z = torch.full((4, 3), -100.0, requires_grad=True)
+    out = fused_activation(torch.tensor([3, 5, 6]), z, ACT_FUNCS)
+    out.sum().backward()
+    assert torch.isfinite(out).all() and torch.isfinite(z.grad).all()
+
+
+if __name__ == "__main__":
+    test_fused_matches_apply_activation()
+    test_unselected_overflow_does_not_leak()
+    print("Fused activation: OK")
@@ -0,0 +1,25 @@
+import os
+import subprocess
+import sys
+
+CHECK = """
+import sys
+import torchneat.common, torchneat.genome
+from torchneat.genome import DefaultGenome
+DefaultGenome(num_inputs=2, num_outputs=1)
+print("sympy" in sys.modules)
+"""
+
+# the directory holding the torchneat package, whatever directory the tests are run from
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_no_sympy_on_import():
+    out = subprocess.run([sys.executable, "-c", CHECK], cwd=ROOT, capture_output=True, text=True)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip() == "False", out.stderr
+
+
+if __name__ == "__main__":
+    test_no_sympy_on_import()
+    print("Import: OK")
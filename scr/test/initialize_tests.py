@@ -0,0 +1,38 @@
+import torch
+
+from torchneat.genome import DefaultGenome
+
+
+def test_initialize_population():
+    genome = DefaultGenome(num_inputs=3, num_outputs=2, max_nodes=10, max_conns=12, init_hidden_layers=(2,))
+    global_state = torch.get_rng_state()
+    pop_nodes, pop_conns = genome.initialize_population(None, 0, 64)
+    assert torch.equal(torch.get_rng_state(), global_state)
+
+    assert pop_nodes.shape == (64, 10, genome.node_gene.length)
+    assert pop_conns.shape == (64, 12, genome.conn_gene.length)
+    # 7 nodes and 3 * 2 + 2 * 2 conns in every genome, the rest is padding
+    assert (~torch.isnan(pop_nodes[..., 0])).sum(dim=1).eq(7).all()
+    assert (~torch.isnan(pop_conns[..., 0])).sum(dim=1).eq(10).all()
+    # attrs differ between genomes and stay within the gene bounds
+    weights = pop_conns[:, :10, -1]
+    assert not torch.equal(weights[0], weights[1])
+    assert weights.abs().max() <= genome.conn_gene.weight_upper_bound
+
+    same_nodes, same_conns = genome.initialize_population(None, torch.Generator().manual_seed(0), 64)
+    assert torch.equal(torch.nan_to_num(same_nodes), torch.nan_to_num(pop_nodes))
+    assert torch.equal(torch.nan_to_num(same_conns), torch.nan_to_num(pop_conns))
+
+
+def test_initialize_single_genome():
+    genome = DefaultGenome(num_inputs=2, num_outputs=1, max_nodes=5, max_conns=4)
+    nodes, conns = genome.initialize(None, 7)
+    pop_nodes, pop_conns = genome.initialize_population(None, 7, 1)
+    assert torch.equal(torch.nan_to_num(nodes), torch.nan_to_num(pop_nodes[0]))
+    assert torch.equal(torch.nan_to_num(conns), torch.nan_to_num(pop_conns[0]))
+
+
+if __name__ == "__main__":
+    test_initialize_population()
+    test_initialize_single_genome()
+    print("Initialize: OK")
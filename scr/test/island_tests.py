@@ -0,0 +1,119 @@
+import pytest
+import torch
+
+from torchneat.algorithm.island import IslandAlgorithm, migration_sources
+from torchneat.common import truncation_selection
+from torchneat.genome import DefaultGenome
+
+nan = float("nan")
+
+
+def make_algorithm(**kwargs):
+    genome = DefaultGenome(num_inputs=2, num_outputs=1, max_nodes=6, max_conns=8)
+    return IslandAlgorithm(genome, num_islands=3, island_size=5, **kwargs)
+
+
+def test_migration_sources():
+    assert migration_sources("ring", 4).tolist() == [[3], [0], [1], [2]]
+    assert migration_sources("full", 3).tolist() == [[2, 1], [0, 2], [1, 0]]
+
+    # adjacency[j, k]: j sends to k
+    adjacency = torch.tensor([
+        [False, True, True],
+        [True, False, False],
+        [False, False, False],
+    ])
+    assert migration_sources(adjacency, 3).tolist() == [[1], [0], [0]]
+    adjacency = ~torch.eye(3, dtype=torch.bool)
+    assert migration_sources(adjacency, 3).sort(dim=1).values.tolist() == [[1, 2], [0, 2], [0, 1]]
+
+    with pytest.raises(ValueError):
+        migration_sources("star", 3)
+    with pytest.raises(ValueError):
+        migration_sources(torch.tensor([[False, True], [False, False]]), 2)
+
+
+def test_migrate():
+    algorithm = make_algorithm(elitism=1, migration_size=1, topology="ring")
+    K, P = 3, 5
+    # tag every individual by its (island, position) in the bias of input node 0
+    tags = torch.arange(K * P, dtype=torch.float32).view(K, P)
+    algorithm.pop_nodes[:, :, 0, 1] = tags
+    fitness = torch.tensor([
+        [0.0, 4.0, 2.0, 1.0, 3.0],
+        [5.0, nan, 7.0, 6.0, 8.0],
+        [9.0, 1.0, 0.5, 2.0, 3.0],
+    ])
+
+    new_fitness = algorithm.migrate(fitness)
+    # ring: island k receives the best of island k - 1 over its worst (NaN counts as the worst)
+    worst = [0, 1, 2]
+    best = [1, 4, 0]
+    for k in range(K):
+        s = (k - 1) % K
+        assert algorithm.pop_nodes[k, worst[k], 0, 1] == tags[s, best[s]]
+        assert new_fitness[k, worst[k]] == fitness[s, best[s]]
+
+    # the elites (the best of every receiver) and everyone else are untouched
+    untouched = torch.ones(K, P, dtype=torch.bool)
+    untouched[torch.arange(K), torch.tensor(worst)] = False
+    assert torch.equal(algorithm.pop_nodes[..., 0, 1][untouched], tags[untouched])
+    assert torch.equal(new_fitness[untouched], fitness[untouched])
+    assert torch.all(untouched[torch.arange(K), torch.tensor(best)])
+
+
+def test_migrate_without_sources():
+    # one island on "full" has no source island, and a zero migration size sends nobody
+    genome = DefaultGenome(num_inputs=2, num_outputs=1, max_nodes=6, max_conns=8)
+    for kwargs in [dict(num_islands=1, topology="full"), dict(num_islands=3, migration_size=0)]:
+        algorithm = IslandAlgorithm(genome, island_size=5, **kwargs)
+        pop_nodes = algorithm.pop_nodes.clone()
+        fitness = torch.arange(algorithm.num_islands * 5, dtype=torch.float32).view(-1, 5)
+        assert torch.equal(algorithm.migrate(fitness), fitness)
+        assert torch.equal(torch.nan_to_num(algorithm.pop_nodes), torch.nan_to_num(pop_nodes))
+
+
+def test_truncation_selection():
+    randkey = torch.Generator().manual_seed(0)
+    fitness = torch.tensor([
+        [0.1, 0.9, nan, 0.5, 0.7, 0.3],
+        [3.0, 2.0, 1.0, 0.0, -1.0, -2.0],
+    ])
+    survivors, pairs = truncation_selection(randkey, fitness, 20, survival_threshold=0.5, elitism=2)
+
+    assert survivors.tolist() == [[1, 4, 3], [0, 1, 2]]
+    assert pairs.shape == (2, 20, 2)
+    for k in range(2):
+        assert torch.isin(pairs[k], survivors[k]).all()
+        # the fitter parent comes first
+        assert torch.all(fitness[k, pairs[k, :, 0]] >= fitness[k, pairs[k, :, 1]])
+
+    # elitism keeps at least that many survivors
+    survivors, _ = truncation_selection(randkey, fitness, 4, survival_threshold=0.0, elitism=3)
+    assert survivors.shape == (2, 3)
+
+
+def test_tell_keeps_elites():
+    algorithm = make_algorithm(elitism=2, migration_interval=0)
+    K, P = 3, 5
+    for _ in range(3):
+        pop_nodes, pop_conns = algorithm.ask()
+        fitness = -torch.nansum(torch.abs(pop_conns[..., 2] - 0.5), dim=1)
+        order = torch.argsort(fitness.view(K, P), dim=1, descending=True, stable=True)
+        elites = pop_nodes.view(K, P, *pop_nodes.shape[1:])[torch.arange(K)[:, None], order[:, :2]].clone()
+        algorithm.tell(fitness)
+
+        new_nodes, new_conns = algorithm.ask()
+        assert new_nodes.shape == pop_nodes.shape and new_conns.shape == pop_conns.shape
+        assert torch.equal(torch.nan_to_num(algorithm.pop_nodes[:, :2]), torch.nan_to_num(elites))
+        # input and output rows are kept by crossover and mutation
+        assert not torch.isnan(new_nodes[:, :3, 0]).any()
+
+
+if __name__ == "__main__":
+    test_migration_sources()
+    test_migrate()
+    test_migrate_without_sources()
+    test_truncation_selection()
+    test_tell_keeps_elites()
+    print("Island: OK")
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import threading
+
+import numpy as np
+import torch
+
+from torchneat.common.logger import GenerationLogWriter, GenerationLogReader, first_divergence
+from torchneat.genome import DefaultGenome
+
+
+def test_log_roundtrip():
+    nan = float("nan")
+    pop_nodes = torch.tensor([
+        [[0, 0.1], [1, 0.2], [nan, nan]],
+        [[0, 0.3], [nan, nan], [2, 0.4]],
+    ])
+    pop_conns = torch.tensor([
+        [[0, 1, 0.5], [nan, nan, nan]],
+        [[0, 2, 0.6], [2, 0, 0.7]],
+    ])
+    fitness = torch.tensor([1.0, 2.0])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "run.log")
+        with GenerationLogWriter(path, save_genomes=True, buffer_size=2) as writer:
+            for generation in range(3):
+                writer.write(generation, fitness + generation, pop_nodes, pop_conns, species=torch.tensor([0, 1]))
+                # in-place updates after `write` must not reach the log
+                pop_nodes[0, 0, 1] = 9.0
+
+        records = list(GenerationLogReader(path))
+        assert [int(r["generation"]) for r in records] == [0, 1, 2]
+        assert np.allclose(records[2]["fitness"], [3.0, 4.0])
+        assert records[0]["node_cnt"].tolist() == [2, 2]
+        assert records[0]["conn_cnt"].tolist() == [1, 2]
+
+        genomes = GenerationLogReader.split_genomes(records[0])
+        assert genomes[0][0].shape == (2, 2) and genomes[1][1].shape == (2, 3)
+        assert np.isclose(genomes[0][0][0, 1], 0.1)
+
+
+class _FailingFile:
+    def write(self, data):
+        raise OSError("disk full")
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_close_after_failed_write():
+    pop_nodes = torch.tensor([[[0, 0.1]]])
+    pop_conns = torch.tensor([[[0, 0, 0.5]]])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = GenerationLogWriter(os.path.join(tmp, "run.log"), buffer_size=8)
+        real_file, writer._file = writer._file, _FailingFile()
+        # buffered, so the failing write only happens when close() drains the queue
+        writer.write(0, torch.tensor([1.0]), pop_nodes, pop_conns)
+
+        raised = []
+
+        def close():
+            try:
+                writer.close()
+            except RuntimeError as e:
+                raised.append(e)
+
+        thread = threading.Thread(target=close, daemon=True)
+        thread.start()
+        thread.join(timeout=10)
+        real_file.close()
+        assert not thread.is_alive(), "close() hangs after a failed write"
+        assert len(raised) == 1 and isinstance(raised[0].__cause__, OSError)
+
+
+def test_first_divergence():
+    genome = DefaultGenome(num_inputs=2, num_outputs=1, max_nodes=4, max_conns=4)
+    pop_nodes, pop_conns = genome.initialize_population(None, 0, 5)
+    fitness = torch.arange(5, dtype=torch.float32)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, f"run{i}.log") for i in range(3)]
+        for i, path in enumerate(paths):
+            with GenerationLogWriter(path, genome=genome) as writer:
+                for generation in range(4):
+                    nodes = pop_nodes.clone()
+                    if i == 2 and generation >= 2:
+                        # one bias differs, the fitness does not
+                        nodes[3, 2, 1] += 1e-6
+                    writer.write(generation, fitness + generation, nodes, pop_conns)
+
+        record = next(iter(GenerationLogReader(paths[0])))
+        assert int(record["population_hash"]) == genome.population_hash(pop_nodes, pop_conns)
+        assert record["genome_hash"][1] == genome.hash(pop_nodes[1], pop_conns[1])
+
+        assert first_divergence(paths[0], paths[1]) is None
+        divergence = first_divergence(paths[0], paths[2])
+        assert divergence["generation"] == 2
+        assert divergence["fields"] == ["population_hash", "genome_hash"]
+
+
+if __name__ == "__main__":
+    test_log_roundtrip()
+    test_close_after_failed_write()
+    test_first_divergence()
+    print("Generation log roundtrip: OK")
@@ -0,0 +1,92 @@
+import pytest
+import torch
+
+from torchneat.algorithm.map_elites import MAPElites
+from torchneat.genome import DefaultGenome
+
+nan = float("nan")
+inf = float("inf")
+
+
+def make_algorithm(grid_shape=(4,), low=(0.0,), high=(1.0,), batch_size=6):
+    genome = DefaultGenome(num_inputs=2, num_outputs=1, max_nodes=6, max_conns=8)
+    algorithm = MAPElites(genome, grid_shape, low, high, batch_size=batch_size)
+    # tag every offspring by its batch position in the bias of input node 0
+    algorithm.pop_nodes[:, 0, 1] = torch.arange(batch_size, dtype=torch.float32)
+    return algorithm
+
+
+def test_cell_index():
+    algorithm = make_algorithm(grid_shape=(4, 2), low=(0.0, -1.0), high=(1.0, 1.0))
+    behaviors = torch.tensor([
+        [0.0, -1.0],  # first cell
+        [0.99, 0.99],  # last cell
+        [0.3, 0.5],  # bins (1, 1)
+        [-5.0, 5.0],  # outside: clamped to bins (0, 1)
+        [1.0, -1.0],  # the upper bound belongs to the last bin
+    ])
+    assert algorithm.cell_index(behaviors).tolist() == [0, 7, 3, 1, 6]
+
+
+def test_invalid_bounds():
+    with pytest.raises(ValueError):
+        make_algorithm(low=(1.0,), high=(1.0,))
+    with pytest.raises(ValueError):
+        make_algorithm(grid_shape=(2, 2), low=(0.0, 1.0), high=(1.0, 0.0))
+    with pytest.raises(ValueError):
+        make_algorithm(low=(0.0, 0.0), high=(1.0, 1.0))
+
+
+def test_insert_keeps_best_per_cell():
+    algorithm = make_algorithm()
+    # cells 0, 0, 0, 1, 2, 1
+    behaviors = torch.tensor([[0.1], [0.2], [0.05], [0.3], [0.6], [0.4]])
+    fitness = torch.tensor([1.0, 3.0, 3.0, 2.0, nan, 5.0])
+
+    inserted = algorithm.insert(fitness, behaviors)
+    # cell 0: the first of the two best offspring; cell 1: the best one; cell 2: NaN is never inserted
+    assert inserted.tolist() == [False, True, False, False, False, True]
+    assert algorithm.archive_fitness.tolist() == [3.0, 5.0, -inf, -inf]
+    assert algorithm.archive_nodes[:2, 0, 1].tolist() == [1.0, 5.0]
+    assert algorithm.filled.tolist() == [True, True, False, False]
+
+    # equal fitness does not replace an elite, better fitness does, worse does not
+    algorithm.pop_nodes[:, 0, 1] = torch.arange(10, 16, dtype=torch.float32)
+    fitness = torch.tensor([3.0, 4.0, 0.0, 0.0, 0.0, 0.0])
+    behaviors = torch.tensor([[0.1], [0.4], [0.9], [0.1], [0.1], [0.9]])
+    inserted = algorithm.insert(fitness, behaviors)
+    assert inserted.tolist() == [False, False, True, False, False, False]
+    assert algorithm.archive_fitness.tolist() == [3.0, 5.0, -inf, 0.0]
+    assert algorithm.archive_nodes[[0, 1, 3], 0, 1].tolist() == [1.0, 5.0, 12.0]
+
+
+def test_sample_parents():
+    algorithm = make_algorithm(grid_shape=(8,))
+    algorithm.archive_fitness[torch.tensor([1, 4, 6])] = torch.tensor([0.0, 1.0, 2.0])
+    parents = algorithm.sample_parents(torch.Generator().manual_seed(0), 300)
+    assert parents.shape == (300,)
+    assert set(parents.tolist()) == {1, 4, 6}
+
+
+def test_tell():
+    algorithm = make_algorithm()
+    pop_nodes, pop_conns = algorithm.ask()
+    behaviors = torch.linspace(0, 1, 6)[:, None]
+    with pytest.raises(TypeError):
+        algorithm.tell(torch.arange(6, dtype=torch.float32), behaviors)
+    algorithm.tell(torch.arange(6, dtype=torch.float32), behaviors=behaviors)
+
+    new_nodes, new_conns = algorithm.ask()
+    assert new_nodes.shape == pop_nodes.shape and new_conns.shape == pop_conns.shape
+    assert algorithm.generation == 1
+    assert algorithm.filled.all()
+    assert algorithm.archive_fitness.tolist() == [1.0, 2.0, 3.0, 5.0]
+
+
+if __name__ == "__main__":
+    test_cell_index()
+    test_invalid_bounds()
+    test_insert_keeps_best_per_cell()
+    test_sample_parents()
+    test_tell()
+    print("MAP-Elites: OK")
@@ -0,0 +1,94 @@
+import torch
+
+from torchneat.common import I_INF, topological_sort
+from torchneat.genome import DefaultGenome, batch_valid_cnt, unflatten_conns
+from torchneat.genome.gene import OriginalConn
+from torchneat.genome.operations.innovation import InnovationRegistry
+from torchneat.genome.operations.mutation import DefaultMutation
+
+POP_SIZE = 8
+
+
+def make_population(genome):
+    init = [genome.initialize(None, seed) for seed in range(POP_SIZE)]
+    return torch.stack([n for n, _ in init]), torch.stack([c for _, c in init])
+
+
+def new_keys(generation):
+    node_keys = 100 * (generation + 1) + torch.arange(POP_SIZE)
+    conn_keys = 1000 * (generation + 1) + 3 * torch.arange(POP_SIZE)[:, None] + torch.arange(3)
+    return node_keys, conn_keys
+
+
+def test_add_node_everywhere():
+    genome = DefaultGenome(num_inputs=2, num_outputs=1, max_nodes=6, max_conns=6)
+    mutation = DefaultMutation(conn_add=0, conn_delete=0, node_add=1, node_delete=0)
+    pop_nodes, pop_conns = make_population(genome)
+    node_keys, conn_keys = new_keys(0)
+
+    new_nodes, new_conns = mutation.mutate_structure(
+        None, genome, torch.Generator().manual_seed(0), pop_nodes, pop_conns, node_keys, conn_keys
+    )
+    assert (batch_valid_cnt(new_nodes) == batch_valid_cnt(pop_nodes) + 1).all()
+    assert (batch_valid_cnt(new_conns) == batch_valid_cnt(pop_conns) + 1).all()
+    for p in range(POP_SIZE):
+        key = float(node_keys[p])
+        assert (new_nodes[p, :, 0] == key).sum() == 1
+        assert (new_conns[p, :, 0] == key).sum() == 1
+        assert (new_conns[p, :, 1] == key).sum() == 1
+
+
+def test_feedforward_stays_acyclic():
+    genome = DefaultGenome(num_inputs=2, num_outputs=1, max_nodes=10, max_conns=30)
+    mutation = DefaultMutation(conn_add=1, conn_delete=0.1, node_add=0.5, node_delete=0.1)
+    pop_nodes, pop_conns = make_population(genome)
+    randkey = torch.Generator().manual_seed(1)
+
+    for generation in range(10):
+        node_keys, conn_keys = new_keys(generation)
+        pop_nodes, pop_conns = mutation.batch(None, genome, randkey, pop_nodes, pop_conns, node_keys, conn_keys)
+
+    for nodes, conns in zip(pop_nodes, pop_conns):
+        conn_exist = unflatten_conns(nodes, conns) != I_INF
+        seqs = topological_sort(nodes, conn_exist)
+        assert int(torch.isfinite(seqs).sum()) == int((~torch.isnan(nodes[:, 0])).sum())
+
+
+def test_innovation_registry():
+    genome = DefaultGenome(num_inputs=2, num_outputs=1, max_nodes=6, max_conns=6, conn_gene=OriginalConn())
+    registry = InnovationRegistry(genome)
+    mask = torch.tensor([True, True, False, True])
+
+    # the initial connections 0 -> 2 and 1 -> 2 keep their markers
+    markers = registry.conn_markers(torch.tensor([0.0, 5.0, 7.0, 5.0]), torch.tensor([2.0, 2.0, 2.0, 2.0]), mask)
+    assert markers.tolist() == [0, 2, -1, 2]
+
+    node_keys = registry.split_node_keys(torch.tensor([0.0, 1.0, 0.0, 0.0]), torch.tensor([2.0, 2.0, 2.0, 2.0]), mask)
+    assert node_keys.tolist() == [3, 4, -1, 3]
+
+    # matches only last one generation
+    registry.new_generation()
+    assert registry.conn_markers(torch.tensor([5.0]), torch.tensor([2.0]), torch.tensor([True])).tolist() == [3]
+
+
+def test_same_split_same_keys():
+    genome = DefaultGenome(num_inputs=1, num_outputs=1, max_nodes=4, max_conns=4, conn_gene=OriginalConn())
+    mutation = DefaultMutation(conn_add=0, conn_delete=0, node_add=1, node_delete=0, innovation=InnovationRegistry(genome))
+    pop_nodes, pop_conns = make_population(genome)
+    node_keys, conn_keys = new_keys(0)
+
+    new_nodes, new_conns = mutation.mutate_structure(
+        None, genome, torch.Generator().manual_seed(0), pop_nodes, pop_conns, node_keys, conn_keys
+    )
+    # a single connection 0 -> 1 to split, every genome gets the same node 2 and markers 1, 2
+    assert (new_nodes[:, 2, 0] == 2).all()
+    assert (new_conns[:, 0, :3] == torch.tensor([0.0, 2.0, 1.0])).all()
+    assert (new_conns[:, 1, :3] == torch.tensor([2.0, 1.0, 2.0])).all()
+
+
+if __name__ == "__main__":
+    test_add_node_everywhere()
+    test_feedforward_stays_acyclic()
+    test_innovation_registry()
+    test_same_split_same_keys()
+    print("Mutation: OK")
@@ -0,0 +1,52 @@
+import pytest
+import torch
+
+from torchneat.algorithm.island import IslandAlgorithm
+from torchneat.algorithm.novelty import knn_novelty, NoveltyArchive, NoveltySearch
+from torchneat.genome import DefaultGenome
+
+
+def test_chunked_knn_matches_full():
+    gen = torch.Generator().manual_seed(0)
+    pop = torch.randn(20, 3, generator=gen)
+    archive = torch.randn(50, 3, generator=gen)
+    refs = torch.cat([pop, archive])
+
+    d = torch.cdist(pop, refs)
+    d[torch.arange(20), torch.arange(20)] = float("inf")
+    expected = torch.topk(d, 5, dim=1, largest=False).values.mean(dim=1)
+
+    for chunk_size in [3, 16, 1000]:
+        novelty = knn_novelty(pop, refs, k=5, chunk_size=chunk_size, exclude_self=True)
+        assert torch.allclose(novelty, expected)
+
+
+def test_archive_eviction():
+    archive = NoveltyArchive(dim=1, capacity=4, insertion="top", target_added=3, eviction="least_novel")
+    archive.add(torch.tensor([[0.0], [1.0], [2.0]]), torch.tensor([0.1, 0.5, 0.3]))
+    archive.add(torch.tensor([[3.0], [4.0], [5.0]]), torch.tensor([0.9, 0.8, 0.7]))
+
+    assert archive.size == 4
+    # the slot left goes to the most novel newcomer, then the two least novel entries are replaced
+    assert sorted(archive.data[:, 0].tolist()) == [1.0, 3.0, 4.0, 5.0]
+
+
+def test_tell_behaviors_keyword_only():
+    genome = DefaultGenome(num_inputs=2, num_outputs=1, max_nodes=5, max_conns=4)
+    inner = IslandAlgorithm(genome, num_islands=1, island_size=6, topology="full")
+    search = NoveltySearch(inner, NoveltyArchive(dim=2, insertion="top", target_added=2), k=3)
+    behaviors = torch.randn(6, 2, generator=torch.Generator().manual_seed(0))
+
+    # same order as MAPElites.tell(fitness, *, behaviors): a positional tensor is the fitness
+    with pytest.raises(TypeError):
+        search.tell(behaviors)
+    search.tell(torch.zeros(6), behaviors=behaviors)
+    search.tell(behaviors=behaviors)
+    assert search.archive.size == 4 and search.novelty.shape == (6,)
+
+
+if __name__ == "__main__":
+    test_chunked_knn_matches_full()
+    test_archive_eviction()
+    test_tell_behaviors_keyword_only()
+    print("Novelty: OK")
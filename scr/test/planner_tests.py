@@ -0,0 +1,85 @@
+import pytest
+import torch
+
+from torchneat.genome import DefaultGenome
+from torchneat.genome.capacity import resize
+from torchneat.genome.planner import ForwardPlanner
+
+P, B = 6, 20
+
+
+def make_population():
+    genome = DefaultGenome(num_inputs=2, num_outputs=2, max_nodes=8, max_conns=12, init_hidden_layers=(3,))
+    pop_nodes, pop_conns = genome.initialize_population(None, 0, P)
+    inputs = torch.randn(B, 2, generator=torch.Generator().manual_seed(0))
+    return genome, pop_nodes, pop_conns, inputs
+
+
+def unchunked(genome, pop_nodes, pop_conns, inputs):
+    return torch.stack([
+        genome.forward(None, genome.transform(None, n, c), inputs) for n, c in zip(pop_nodes, pop_conns)
+    ])
+
+
+@pytest.mark.parametrize("genomes_per_chunk, inputs_per_chunk", [(1, 3), (1, 11), (4, B)])
+def test_chunked_matches_unchunked(genomes_per_chunk, inputs_per_chunk):
+    genome, pop_nodes, pop_conns, inputs = make_population()
+    planner = ForwardPlanner(genome, budget_bytes=1)
+    fixed, per_input = planner.fixed_bytes(), planner.per_input_bytes()
+    planner.budget_bytes = genomes_per_chunk * (fixed + inputs_per_chunk * per_input)
+
+    assert planner.chunk_sizes(P, B) == (genomes_per_chunk, inputs_per_chunk)
+    plan = planner.plan(P, B)
+    assert len(plan) == -(-P // genomes_per_chunk) * -(-B // inputs_per_chunk)
+
+    expected = unchunked(genome, pop_nodes, pop_conns, inputs)
+    assert torch.allclose(planner.evaluate(pop_nodes, pop_conns, inputs), expected, atol=1e-6)
+
+    # a given result tensor is filled and returned
+    out = torch.full_like(expected, float("nan"))
+    assert planner.evaluate(pop_nodes, pop_conns, inputs, out=out) is out
+    assert torch.allclose(out, expected, atol=1e-6)
+
+
+def test_transform_once_per_genome():
+    genome, pop_nodes, pop_conns, inputs = make_population()
+    planner = ForwardPlanner(genome, budget_bytes=1)
+    planner.budget_bytes = planner.fixed_bytes() + 3 * planner.per_input_bytes()
+    assert planner.chunk_sizes(P, B) == (1, 3)
+
+    calls = []
+    transform = genome.transform
+    genome.transform = lambda state, nodes, conns: calls.append(1) or transform(state, nodes, conns)
+    outputs = planner.evaluate(pop_nodes, pop_conns, inputs)
+    del genome.transform
+    # 7 input chunks per genome, but every genome is transformed only once
+    assert len(calls) == P
+    assert torch.allclose(outputs, unchunked(genome, pop_nodes, pop_conns, inputs), atol=1e-6)
+
+
+def test_plan_from_tensor_shapes():
+    genome, pop_nodes, pop_conns, inputs = make_population()
+    planner = ForwardPlanner(genome, budget_bytes=1)
+    # enough for one genome of the genome's own size with all inputs
+    planner.budget_bytes = planner.fixed_bytes() + B * planner.per_input_bytes()
+    assert planner.chunk_sizes(P, B) == (1, B)
+
+    # larger padded tensors (e.g. after AdaptiveCapacity.reserve) need smaller chunks
+    big_nodes, big_conns = resize(pop_nodes, 12), resize(pop_conns, 16)
+    g, b = planner.chunk_sizes(P, B, 12, 16)
+    assert g == 1 and b < B
+    expected = unchunked(genome, pop_nodes, pop_conns, inputs)
+    assert torch.allclose(planner.evaluate(big_nodes, big_conns, inputs), expected, atol=1e-6)
+
+    # and too large tensors are refused instead of planned with the genome's max sizes
+    huge_nodes, huge_conns = resize(pop_nodes, 512), resize(pop_conns, 1024)
+    with pytest.raises(ValueError):
+        planner.evaluate(huge_nodes, huge_conns, inputs)
+
+
+if __name__ == "__main__":
+    for g, b in [(1, 3), (1, 11), (4, B)]:
+        test_chunked_matches_unchunked(g, b)
+    test_transform_once_per_genome()
+    test_plan_from_tensor_shapes()
+    print("Planner: OK")
@@ -0,0 +1,66 @@
+import pytest
+import torch
+
+from torchneat.genome import DefaultGenome, PrecisionPolicy
+
+nan = float("nan")
+
+
+def make_population():
+    genome = DefaultGenome(num_inputs=3, num_outputs=2, max_nodes=10, max_conns=20, init_hidden_layers=(4,))
+    pop_nodes, pop_conns = genome.initialize_population(None, 0, 8)
+    # empty slots in the middle as well as at the end
+    pop_conns[1, 3] = nan
+    pop_nodes[2, 4] = nan
+    inputs = torch.randn(32, 3, generator=torch.Generator().manual_seed(0))
+    return genome, pop_nodes, pop_conns, inputs
+
+
+@pytest.mark.parametrize("storage_dtype", [torch.bfloat16, torch.float16])
+def test_compress_round_trip(storage_dtype):
+    genome, pop_nodes, pop_conns, _ = make_population()
+    policy = PrecisionPolicy(storage_dtype=storage_dtype)
+    compact_nodes, compact_conns = policy.compress_population(genome, pop_nodes, pop_conns)
+    assert compact_nodes.keys.dtype == torch.int32 and compact_nodes.attrs.dtype == storage_dtype
+    assert compact_conns.attrs.dtype == storage_dtype
+
+    eps, tiny = torch.finfo(storage_dtype).eps, torch.finfo(storage_dtype).tiny
+    for pop_genes, compact in [(pop_nodes, compact_nodes), (pop_conns, compact_conns)]:
+        restored = policy.decompress(compact)
+        assert restored.dtype == torch.float32 and restored.shape == pop_genes.shape
+        # empty rows stay empty and keys are exact
+        assert torch.equal(torch.isnan(restored), torch.isnan(pop_genes))
+        num_fixed = compact.keys.shape[-1]
+        valid = ~torch.isnan(pop_genes[..., 0])
+        assert torch.equal(restored[valid][:, :num_fixed], pop_genes[valid][:, :num_fixed])
+        # attrs are rounded to the nearest storage value
+        original, rounded = pop_genes[valid][:, num_fixed:], restored[valid][:, num_fixed:]
+        assert torch.all(torch.abs(rounded - original) <= eps * torch.abs(original) + tiny)
+
+
+@pytest.mark.parametrize(
+    "dtype, tolerance", [(torch.float32, 1e-6), (torch.float16, 1e-2), (torch.bfloat16, 5e-2)]
+)
+def test_validate_error_bounds(dtype, tolerance):
+    genome, pop_nodes, pop_conns, inputs = make_population()
+    policy = PrecisionPolicy(storage_dtype=dtype, compute_dtype=dtype)
+
+    report = policy.validate(
+        genome, None, pop_nodes, pop_conns, inputs, fitness_func=lambda outputs: outputs.mean(dim=(1, 2))
+    )
+    assert report["max_abs_output_error"] <= tolerance
+    assert report["mean_abs_output_error"] <= report["max_abs_output_error"]
+    assert report["max_abs_fitness_error"] <= tolerance
+    assert 0 <= report["rank_changes"] <= pop_nodes.shape[0]
+    if dtype == torch.float32:
+        assert report["rank_changes"] == 0
+    # the genome's own policy is restored
+    assert genome.precision is None
+
+
+if __name__ == "__main__":
+    for storage_dtype in [torch.bfloat16, torch.float16]:
+        test_compress_round_trip(storage_dtype)
+    for dtype, tolerance in [(torch.float32, 1e-6), (torch.float16, 1e-2), (torch.bfloat16, 5e-2)]:
+        test_validate_error_bounds(dtype, tolerance)
+    print("Precision: OK")
@@ -0,0 +1,43 @@
+import torch
+
+from torchneat.genome.operations.prune import prune
+
+nan = float("nan")
+
+
+def make_genome():
+    # inputs 0, 1; output 2; hidden 3 is alive, 4 can not reach the output, 5 can not be reached
+    nodes = torch.tensor([[0.0], [1.0], [2.0], [3.0], [4.0], [5.0], [nan]])
+    conns = torch.tensor([
+        [0, 3, 0.5],
+        [3, 2, 0.5],
+        [0, 4, 0.5],
+        [5, 2, 0.5],
+        [1, 2, 0.001],
+        [nan, nan, nan],
+    ])
+    return nodes, conns
+
+
+def test_prune_dead_nodes():
+    nodes, conns = make_genome()
+    new_nodes, new_conns = prune(nodes, conns, [0, 1], [2])
+
+    alive_nodes = new_nodes[~torch.isnan(new_nodes[:, 0]), 0].tolist()
+    assert alive_nodes == [0, 1, 2, 3]
+    alive_conns = new_conns[~torch.isnan(new_conns[:, 0]), :2].tolist()
+    assert alive_conns == [[0, 3], [3, 2], [1, 2]]
+
+
+def test_prune_weak_conns():
+    nodes, conns = make_genome()
+    _, new_conns = prune(nodes, conns, [0, 1], [2], weight_col=2, weight_threshold=0.01)
+
+    alive_conns = new_conns[~torch.isnan(new_conns[:, 0]), :2].tolist()
+    assert alive_conns == [[0, 3], [3, 2]]
+
+
+if __name__ == "__main__":
+    test_prune_dead_nodes()
+    test_prune_weak_conns()
+    print("Prune: OK")
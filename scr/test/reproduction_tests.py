@@ -0,0 +1,50 @@
+import torch
+
+from torchneat.algorithm.neat.reproduction import ReproductionScheduler, largest_remainder
+
+
+def test_largest_remainder():
+    shares = largest_remainder(torch.tensor([1.0, 1.0, 1.0]), 10)
+    assert shares.sum() == 10 and shares.max() - shares.min() <= 1
+    assert torch.equal(largest_remainder(torch.tensor([3.0, 1.0]), 8), torch.tensor([6, 2]))
+
+
+def test_schedule():
+    gen = torch.Generator().manual_seed(0)
+    P = 40
+    fitness = torch.rand(P, generator=gen)
+    fitness[:10] += 5  # species 3 is the fittest
+    fitness[-1] = float("nan")
+    species = torch.tensor([3] * 10 + [7] * 20 + [9] * 10)
+
+    for selection in ("tournament", "rank", "uniform"):
+        scheduler = ReproductionScheduler(P, elitism=2, survival_threshold=0.3, min_species_size=2, selection=selection)
+        plan = scheduler.schedule(torch.Generator().manual_seed(1), fitness, species)
+
+        assert plan.parents.shape == (P, 2)
+        assert torch.equal(plan.species_ids, torch.tensor([3, 7, 9]))
+        assert plan.quotas.sum() == P and (plan.quotas >= 2).all()
+        assert plan.quotas[0] == plan.quotas.max()
+
+        # parents come from the offspring's species, among its survivors, fitter first
+        assert torch.equal(species[plan.parents[:, 0]], plan.offspring_species)
+        assert torch.equal(species[plan.parents[:, 1]], plan.offspring_species)
+        f = torch.nan_to_num(fitness, nan=-float("inf"))
+        assert (f[plan.parents[:, 0]] >= f[plan.parents[:, 1]]).all()
+        for s, n in zip(plan.species_ids.tolist(), plan.num_survivors.tolist()):
+            members = f[species == s]
+            assert (f[plan.parents[plan.offspring_species == s]] >= members.sort(descending=True).values[n - 1]).all()
+
+        # the 2 best of every species are copied
+        assert plan.elite.sum() == 6
+        elites = plan.parents[plan.elite]
+        assert torch.equal(elites[:, 0], elites[:, 1])
+        for s in (3, 7, 9):
+            best = torch.nonzero(species == s, as_tuple=True)[0][torch.argsort(f[species == s], descending=True)[:2]]
+            assert set(elites[:, 0].tolist()) >= set(best.tolist())
+
+
+if __name__ == "__main__":
+    test_largest_remainder()
+    test_schedule()
+    print("Reproduction: OK")
@@ -0,0 +1,58 @@
+import os
+import tempfile
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+
+from torchneat.algorithm.sharded import ShardedAlgorithm, shard_bounds
+from torchneat.genome import DefaultGenome
+
+POP_SIZE = 10
+GENERATIONS = 3
+
+
+def toy_fitness(pop_conns):
+    # prefer weights close to 0.5, no network evaluation needed
+    weights = pop_conns[..., 2]
+    return -torch.nansum(torch.abs(weights - 0.5), dim=1)
+
+
+def run_rank(rank, world_size, init_file, out_dir):
+    dist.init_process_group("gloo", init_method=f"file://{init_file}", rank=rank, world_size=world_size)
+    genome = DefaultGenome(num_inputs=2, num_outputs=1, max_nodes=5, max_conns=4)
+    algorithm = ShardedAlgorithm(genome, POP_SIZE, seed=42)
+
+    for _ in range(GENERATIONS):
+        _, pop_conns = algorithm.ask()
+        algorithm.tell(toy_fitness(pop_conns))
+
+    pop_nodes, pop_conns = algorithm.gather_genomes(torch.arange(POP_SIZE))
+    if rank == 0:
+        torch.save((algorithm.global_fitness, pop_nodes, pop_conns), os.path.join(out_dir, f"world{world_size}.pt"))
+    dist.destroy_process_group()
+
+
+def run(world_size, tmp):
+    init_file = os.path.join(tmp, f"init{world_size}")
+    mp.spawn(run_rank, args=(world_size, init_file, tmp), nprocs=world_size, join=True)
+    return torch.load(os.path.join(tmp, f"world{world_size}.pt"))
+
+
+def test_shard_bounds():
+    assert shard_bounds(10, 3) == [0, 4, 7, 10]
+    assert shard_bounds(4, 4) == [0, 1, 2, 3, 4]
+
+
+def test_sharding_invariance():
+    with tempfile.TemporaryDirectory() as tmp:
+        single = run(1, tmp)
+        sharded = run(3, tmp)
+    for a, b in zip(single, sharded):
+        assert torch.equal(torch.nan_to_num(a, nan=-1.0), torch.nan_to_num(b, nan=-1.0))
+
+
+if __name__ == "__main__":
+    test_shard_bounds()
+    test_sharding_invariance()
+    print("Sharded population: OK")
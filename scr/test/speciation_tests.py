@@ -0,0 +1,111 @@
+import torch
+
+from torchneat.algorithm.neat.speciation import IncrementalSpeciation
+from torchneat.genome import DefaultGenome
+from torchneat.genome.utils import batch_valid_cnt
+
+nan = float("nan")
+
+
+def make_genome():
+    # inputs 0, 1; hidden 2, 3; output 4
+    return DefaultGenome(num_inputs=2, num_outputs=1, max_nodes=6, max_conns=8, init_hidden_layers=(2,))
+
+
+def clustered_population(genome, clusters, generator):
+    """copies of one genome whose conn weights sit around 10 * cluster, far apart for a threshold of 1"""
+    nodes, conns = genome.initialize(None, 0)
+    P = len(clusters)
+    pop_nodes, pop_conns = nodes.repeat(P, 1, 1), conns.repeat(P, 1, 1)
+    weights = 10.0 * torch.tensor(clusters, dtype=torch.float32)[:, None] + 0.05 * torch.randn(
+        P, conns.shape[0], generator=generator
+    )
+    pop_conns[..., 2] = torch.where(torch.isnan(pop_conns[..., 2]), nan, weights)
+    return pop_nodes, pop_conns
+
+
+def test_lower_bound_below_distance():
+    generator = torch.Generator().manual_seed(0)
+    genome = DefaultGenome(num_inputs=2, num_outputs=1, max_nodes=8, max_conns=12, init_hidden_layers=(3,))
+    pop_nodes, pop_conns = genome.initialize_population(None, 0, 64)
+    # drop random hidden nodes and connections, so the valid counts differ
+    drop_nodes = torch.rand(64, 8, generator=generator) < 0.3
+    drop_nodes[:, [0, 1, 5]] = False
+    pop_nodes[drop_nodes] = nan
+    pop_conns[torch.rand(64, 12, generator=generator) < 0.3] = nan
+
+    perm = torch.randperm(64, generator=generator)
+    other_nodes, other_conns = pop_nodes[perm], pop_conns[perm]
+    distance = genome.distance.batch(None, genome, pop_nodes, pop_conns, other_nodes, other_conns)
+    lower = genome.distance.lower_bound(
+        batch_valid_cnt(pop_nodes), batch_valid_cnt(pop_conns), batch_valid_cnt(other_nodes), batch_valid_cnt(other_conns)
+    )
+    assert torch.all(lower <= distance + 1e-6)
+    assert torch.any(lower > 0)
+
+
+def test_incremental_matches_from_scratch():
+    generator = torch.Generator().manual_seed(0)
+    genome = make_genome()
+    clusters = [i % 3 for i in range(12)]
+    pop_nodes, pop_conns = clustered_population(genome, clusters, generator)
+
+    incremental = IncrementalSpeciation(genome, compatibility_threshold=1.0)
+    scratch = IncrementalSpeciation(genome, compatibility_threshold=1.0)
+    assert incremental.speciate(pop_nodes, pop_conns).tolist() == clusters
+    assert scratch.speciate(pop_nodes, pop_conns).tolist() == clusters
+
+    # next generation: even genomes are unchanged copies, odd ones are perturbed,
+    # the last two have no parent and belong to a new cluster
+    parents = torch.arange(12)
+    parents[10:] = -1
+    unchanged = (torch.arange(12) % 2 == 0) & (parents >= 0)
+    next_nodes, next_conns = pop_nodes.clone(), pop_conns.clone()
+    next_conns[1::2, :, 2] += 0.05 * torch.randn(6, next_conns.shape[1], generator=generator)
+    new_nodes, new_conns = clustered_population(genome, [5, 5], generator)
+    next_nodes[10:], next_conns[10:] = new_nodes, new_conns
+
+    full_before = scratch.stats["full_distances"]
+    incremental_before = incremental.stats["full_distances"]
+    ids = incremental.speciate(next_nodes, next_conns, parents, unchanged)
+    expected = scratch.speciate(next_nodes, next_conns)
+    assert ids.tolist() == expected.tolist() == clusters[:10] + [3, 3]
+
+    # unchanged copies reuse the distances of their parent
+    assert incremental.stats["cache_hits"] >= int(unchanged.sum())
+    assert (
+        incremental.stats["full_distances"] - incremental_before < scratch.stats["full_distances"] - full_before
+    )
+
+
+def test_threshold_adapts_to_target():
+    generator = torch.Generator().manual_seed(0)
+    genome = make_genome()
+    pop_nodes, pop_conns = clustered_population(genome, [0, 1, 2, 3], generator)
+
+    # too many species: the threshold grows
+    speciation = IncrementalSpeciation(genome, compatibility_threshold=1.0, target_species=2, threshold_step=0.5)
+    speciation.speciate(pop_nodes, pop_conns)
+    assert speciation.num_species == 4
+    assert speciation.compatibility_threshold == 1.5
+
+    # too few species: the threshold shrinks, down to min_threshold
+    speciation = IncrementalSpeciation(
+        genome, compatibility_threshold=1.0, target_species=8, threshold_step=0.5, min_threshold=0.2
+    )
+    speciation.speciate(pop_nodes, pop_conns)
+    assert speciation.compatibility_threshold == 0.5
+    speciation.speciate(pop_nodes, pop_conns)
+    assert speciation.compatibility_threshold == 0.2
+
+    # on target: unchanged
+    speciation = IncrementalSpeciation(genome, compatibility_threshold=1.0, target_species=4, threshold_step=0.5)
+    speciation.speciate(pop_nodes, pop_conns)
+    assert speciation.compatibility_threshold == 1.0
+
+
+if __name__ == "__main__":
+    test_lower_bound_below_distance()
+    test_incremental_matches_from_scratch()
+    test_threshold_adapts_to_target()
+    print("Speciation: OK")
@@ -0,0 +1,54 @@
+import pytest
+import torch
+
+from torchneat.genome import DefaultGenome
+
+sp = pytest.importorskip("sympy")
+
+
+def make_genome():
+    genome = DefaultGenome(num_inputs=2, num_outputs=2, max_nodes=8, max_conns=12, init_hidden_layers=(3,))
+    nodes, conns = genome.initialize(None, 0)
+    inputs = torch.randn(32, 2, generator=torch.Generator().manual_seed(0))
+    return genome, nodes, conns, inputs
+
+
+@pytest.mark.parametrize("simplify", [False, True])
+def test_compile_sympy_matches_forward(simplify):
+    genome, nodes, conns, inputs = make_genome()
+    expected = genome.forward(None, genome.transform(None, nodes, conns), inputs)
+
+    func = genome.compile_sympy(None, nodes, conns, backend="torch", simplify=simplify)
+    outputs = func(inputs)
+    assert outputs.shape == expected.shape
+    assert torch.allclose(outputs, expected, atol=1e-5, rtol=1e-4)
+
+
+def test_compile_sympy_cache():
+    from torchneat.common.sympy_tools import CompiledExprCache
+
+    genome, nodes, conns, inputs = make_genome()
+    cache = CompiledExprCache()
+    func = genome.compile_sympy(None, nodes, conns, simplify=False, cache=cache)
+    assert (cache.hits, cache.misses, len(cache)) == (0, 1, 1)
+
+    # the same genome (a copy with the same hash) is not compiled again
+    again = genome.compile_sympy(None, nodes.clone(), conns.clone(), simplify=False, cache=cache)
+    assert again is func
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # other compile options are another entry
+    genome.compile_sympy(None, nodes, conns, simplify=True, cache=cache)
+    assert (cache.misses, len(cache)) == (2, 2)
+
+    # another genome is another entry
+    other_nodes, other_conns = genome.initialize(None, 1)
+    genome.compile_sympy(None, other_nodes, other_conns, simplify=False, cache=cache)
+    assert (cache.misses, len(cache)) == (3, 3)
+
+
+if __name__ == "__main__":
+    test_compile_sympy_matches_forward(False)
+    test_compile_sympy_matches_forward(True)
+    test_compile_sympy_cache()
+    print("Sympy: OK")
@@ -0,0 +1,59 @@
+import torch
+
+from torchneat.genome import DefaultGenome, TopologyCache
+
+
+def _outputs(genome, nodes, conns, inputs):
+    return genome.forward(None, genome.transform(None, nodes, conns), inputs)
+
+
+def test_cache_reuses_topology():
+    cache = TopologyCache(maxsize=2)
+    genome = DefaultGenome(num_inputs=2, num_outputs=1, max_nodes=6, max_conns=6, init_hidden_layers=(1,))
+    cached_genome = DefaultGenome(
+        num_inputs=2, num_outputs=1, max_nodes=6, max_conns=6, init_hidden_layers=(1,), topology_cache=cache
+    )
+    pop_nodes, pop_conns = genome.initialize_population(None, 0, 3)
+    inputs = torch.randn(4, 2, generator=torch.Generator().manual_seed(0))
+
+    # same topology, different attrs: one miss, then hits
+    for p in range(3):
+        expected = _outputs(genome, pop_nodes[p], pop_conns[p], inputs)
+        assert torch.allclose(_outputs(cached_genome, pop_nodes[p], pop_conns[p], inputs), expected)
+    assert (cache.misses, cache.hits, len(cache)) == (1, 2, 1)
+
+    # a removed connection is another topology
+    conns = pop_conns[0].clone()
+    conns[0] = float("nan")
+    cached_genome.transform(None, pop_nodes[0], conns)
+    assert cache.misses == 2 and len(cache) == 2
+
+    # the least recently used entry is evicted
+    conns[1] = float("nan")
+    cached_genome.transform(None, pop_nodes[0], conns)
+    assert len(cache) == 2
+    cached_genome.transform(None, pop_nodes[1], pop_conns[1])
+    assert cache.misses == 4
+
+
+def test_cache_with_weight_pruning():
+    cache = TopologyCache()
+    kwargs = dict(num_inputs=2, num_outputs=1, max_nodes=4, max_conns=4, prune_dead=True, prune_weight_threshold=0.5)
+    genome = DefaultGenome(**kwargs)
+    cached_genome = DefaultGenome(**kwargs, topology_cache=cache)
+    nodes, conns = genome.initialize(None, 0)
+    inputs = torch.randn(4, 2, generator=torch.Generator().manual_seed(0))
+
+    for weights in ([1.0, 1.0], [0.1, 1.0], [2.0, -3.0]):
+        conns = conns.clone()
+        conns[:2, -1] = torch.tensor(weights)
+        expected = _outputs(genome, nodes, conns, inputs)
+        assert torch.allclose(_outputs(cached_genome, nodes, conns, inputs), expected, equal_nan=True)
+    # the weak connection changes the pruned structure, the last genome reuses the first entry
+    assert (cache.misses, cache.hits) == (2, 1)
+
+
+if __name__ == "__main__":
+    test_cache_reuses_topology()
+    test_cache_with_weight_pruning()
+    print("TopologyCache: OK")
@@ -0,0 +1,55 @@
+import os
+import tempfile
+
+import pytest
+import torch
+
+from torchneat.common.visualize import BackgroundRenderer, _levels, split_export
+from torchneat.genome import DefaultGenome
+
+
+def test_levels():
+    edges = [(0, 3), (1, 3), (3, 4), (0, 2), (4, 2)]
+    level = _levels([0, 1, 2, 3, 4], edges, {0, 1}, {2})
+    assert level == {0: 0, 1: 0, 3: 1, 4: 2, 2: 3}
+
+
+def test_split_export():
+    genome = DefaultGenome(num_inputs=2, num_outputs=1, max_nodes=5, max_conns=4)
+    pop_nodes, pop_conns = genome.initialize_population(None, 0, 4)
+    exported = genome.export_population(None, pop_nodes, pop_conns, indices=[3, 1])
+    networks = split_export(exported, ["sigmoid"])
+
+    assert sorted(networks) == [1, 3]
+    expected = genome.network_dict(None, pop_nodes[3], pop_conns[3])
+    assert sorted(networks[3]["nodes"]) == sorted(expected["nodes"])
+    assert sorted(networks[3]["conns"]) == sorted(expected["conns"])
+    for key, conn in expected["conns"].items():
+        assert abs(networks[3]["conns"][key]["weight"] - conn["weight"]) < 1e-6
+    assert networks[3]["nodes"][2]["act"] == "sigmoid"
+
+
+def test_background_renderer():
+    pytest.importorskip("matplotlib")
+    genome = DefaultGenome(num_inputs=2, num_outputs=1, max_nodes=5, max_conns=4, init_hidden_layers=(1,))
+    pop_nodes, pop_conns = genome.initialize_population(None, 0, 4)
+    fitness = torch.tensor([0.0, 3.0, 1.0, 2.0])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with BackgroundRenderer(tmp, formats=("svg", "png")) as renderer:
+            paths = renderer.render_top(genome, None, pop_nodes, pop_conns, fitness, k=2)
+            # the champion is unchanged, it is not drawn again
+            again = renderer.render_genome(genome, None, pop_nodes[1], pop_conns[1])
+            renderer.plot_summary({"best": [1.0, 2.0, 3.0], "mean": [0.5, 1.0, 1.5]})
+            renderer.wait()
+            assert again == paths[0]
+            assert renderer.stats["rendered"] == 2 and renderer.stats["cache_hits"] == 1
+            for path in paths[0] + paths[1] + [os.path.join(tmp, "summary.svg")]:
+                assert os.path.getsize(path) > 0
+
+
+if __name__ == "__main__":
+    test_levels()
+    test_split_export()
+    test_background_renderer()
+    print("Visualize: OK")
@@ -0,0 +1,75 @@
+import torch
+
+from torchneat.common import I_INF, PingPong, Workspace
+from torchneat.genome import DefaultGenome
+from torchneat.genome.utils import batch_unflatten_conns
+
+
+def test_workspace_reuses_storage():
+    ws = Workspace()
+    a = ws.get("x", (4, 8), torch.int32)
+    b = ws.get("x", (2, 8), torch.int32)
+    assert b.data_ptr() == a.data_ptr()
+    assert ws.allocations == 1
+    ws.get("x", (4, 8), torch.float32)
+    ws.get("x", (8, 8), torch.float32)
+    assert ws.allocations == 3
+
+
+def test_workspace_rand_matches_generator():
+    ws = Workspace()
+    drawn = ws.rand("r", (3, 5), torch.Generator().manual_seed(1))
+    assert torch.equal(drawn, torch.rand((3, 5), generator=torch.Generator().manual_seed(1)))
+
+
+def test_unflatten_conns_out():
+    genome = DefaultGenome(num_inputs=2, num_outputs=1, max_nodes=5, max_conns=6)
+    init = [genome.initialize(None, seed) for seed in range(3)]
+    pop_nodes = torch.stack([n for n, _ in init])
+    pop_conns = torch.stack([c for _, c in init])
+
+    out = torch.zeros((3, 5, 5), dtype=torch.int32)
+    result = batch_unflatten_conns(pop_nodes, pop_conns, out=out)
+    assert result.data_ptr() == out.data_ptr()
+    assert torch.equal(out, batch_unflatten_conns(pop_nodes, pop_conns))
+    assert (out == I_INF).any()
+
+
+def test_forward_values_in_workspace():
+    ws = Workspace()
+    genome = DefaultGenome(num_inputs=2, num_outputs=2, max_nodes=8, max_conns=12, init_hidden_layers=(3,))
+    plain = DefaultGenome(num_inputs=2, num_outputs=2, max_nodes=8, max_conns=12, init_hidden_layers=(3,))
+    genome.workspace = ws
+    inputs = torch.randn(16, 2, generator=torch.Generator().manual_seed(0))
+    transformed = [genome.transform(None, *genome.initialize(None, seed)) for seed in range(2)]
+
+    first = genome.forward(None, transformed[0], inputs)
+    second = genome.forward(None, transformed[1], inputs)
+    assert ws.allocations == 1
+    # earlier outputs are not overwritten by later calls
+    assert torch.equal(first, plain.forward(None, transformed[0], inputs))
+    assert torch.equal(second, plain.forward(None, transformed[1], inputs))
+
+    # forwards that need gradients do not use the shared buffer
+    x = inputs.clone().requires_grad_(True)
+    genome.forward(None, transformed[0], x).sum().backward()
+    assert ws.allocations == 1 and torch.isfinite(x.grad).all()
+
+
+def test_ping_pong_swap():
+    buffers = PingPong(torch.zeros(2, 3), torch.ones(2, 4))
+    parent, child = buffers.nodes, buffers.child[0]
+    buffers.child[0].copy_(parent + 1)
+    buffers.swap()
+    assert buffers.nodes.data_ptr() == child.data_ptr()
+    assert torch.equal(buffers.nodes, torch.ones(2, 3))
+    assert buffers.child[0].data_ptr() == parent.data_ptr()
+
+
+if __name__ == "__main__":
+    test_workspace_reuses_storage()
+    test_workspace_rand_matches_generator()
+    test_unflatten_conns_out()
+    test_forward_values_in_workspace()
+    test_ping_pong_swap()
+    print("Workspace: OK")
@@ -0,0 +1,203 @@
+from typing import Tuple, Union
+import torch
+from torch import Tensor
+
+from torchneat.common import PingPong, split_generator, truncation_selection
+from .base import BaseAlgorithm
+
+
+def migration_sources(topology: Union[str, Tensor], num_islands: int) -> Tensor:
+    """
+    Build the (K, S) tensor of source islands: island k receives migrants from sources[k, :].
+    topology can be "ring" (from the previous island), "full" (from every other island)
+    or a (K, K) bool adjacency matrix where adjacency[j, k] means j sends to k (same in-degree for every island).
+    """
+    islands = torch.arange(num_islands)
+    if isinstance(topology, str):
+        if topology == "ring":
+            return ((islands - 1) % num_islands)[:, None]
+        if topology == "full":
+            offsets = torch.arange(1, num_islands)
+            return (islands[:, None] - offsets[None, :]) % num_islands
+        raise ValueError(f"Unknown topology {topology}, need be 'ring', 'full' or an adjacency matrix.")
+
+    adjacency = torch.as_tensor(topology, dtype=torch.bool)
+    in_degree = adjacency.sum(dim=0)
+    if adjacency.shape != (num_islands, num_islands) or not torch.all(in_degree == in_degree[0]):
+        raise ValueError("The adjacency matrix must be (K, K) with the same in-degree for every island.")
+    # for every column, the row indices of the True entries
+    order = torch.argsort((~adjacency).to(torch.int8).T, dim=1, stable=True)
+    return order[:, : int(in_degree[0])]
+
+
+class IslandAlgorithm(BaseAlgorithm):
+    """
+    K independent sub-populations evolved as one batched program.
+    Genome tensors have a leading island dim: (K, P, N, NL) and (K, P, C, CL).
+    Every `migration_interval` generations, the `migration_size` best individuals of every source island
+    replace the worst individuals of the receiving island, following `topology`.
+    Offspring are written in place into a second population buffer that is swapped with the parents,
+    so the tensors returned by `ask` are reused two generations later.
+    """
+
+    def __init__(
+        self,
+        genome,
+        num_islands: int,
+        island_size: int,
+        elitism: int = 2,
+        survival_threshold: float = 0.2,
+        migration_interval: int = 10,
+        migration_size: int = 2,
+        topology: Union[str, Tensor] = "ring",
+        seed: int = 0,
+        state=None,
+    ):
+        self.genome = genome
+        self.num_islands = num_islands
+        self.island_size = island_size
+        self.elitism = elitism
+        self.survival_threshold = survival_threshold
+        self.migration_interval = migration_interval
+        self.migration_size = migration_size
+        self.sources = migration_sources(topology, num_islands)
+        self.state = state
+
+        if self.sources.shape[1] * migration_size > island_size - elitism:
+            raise ValueError("Too many migrants, they would replace the elites of the receiving island.")
+
+        self.randkey = torch.Generator().manual_seed(seed)
+        self.generation = 0
+        self.next_node_key = max(genome.all_init_nodes) + 1
+        self.next_conn_key = len(genome.all_init_conns)
+
+        pop_nodes, pop_conns = genome.initialize_population(state, self.randkey, num_islands * island_size)
+        self.buffers = PingPong(
+            pop_nodes.view((num_islands, island_size) + pop_nodes.shape[1:]),
+            pop_conns.view((num_islands, island_size) + pop_conns.shape[1:]),
+        )
+
+    @property
+    def pop_nodes(self) -> Tensor:
+        return self.buffers.nodes
+
+    @property
+    def pop_conns(self) -> Tensor:
+        return self.buffers.conns
+
+    def ask(self) -> Tuple[Tensor, Tensor]:
+        """the population with the island dim folded into the batch dim, (K * P, N, NL) and (K * P, C, CL)"""
+        return self.pop_nodes.flatten(0, 1), self.pop_conns.flatten(0, 1)
+
+    def transform(self, individual):
+        nodes, conns = individual
+        return self.genome.transform(self.state, nodes, conns)
+
+    def forward(self, transformed, inputs):
+        return self.genome.forward(self.state, transformed, inputs)
+
+    def migrate(self, fitness: Tensor) -> Tensor:
+        """
+        Copy the best individuals of the source islands over the worst of every island, in place.
+        Returns the fitness updated the same way.
+        """
+        K, m = self.num_islands, self.migration_size
+        incoming = self.sources.shape[1] * m
+        if incoming == 0:
+            # a single island on "full", or no sources: nothing to exchange
+            return fitness
+        P = fitness.shape[1]
+        order = torch.argsort(torch.nan_to_num(fitness, nan=-float("inf")), dim=1, descending=True, stable=True)
+        best, worst = order[:, :m], order[:, P - incoming:]
+        islands = torch.arange(K, device=fitness.device)[:, None]
+        sources = self.sources.to(fitness.device)
+
+        # gather everything before writing, so an island can send and receive in the same step
+        mig_nodes = self.pop_nodes[islands, best][sources].flatten(1, 2)
+        mig_conns = self.pop_conns[islands, best][sources].flatten(1, 2)
+        mig_fitness = fitness[islands, best][sources].flatten(1, 2)
+
+        self.pop_nodes[islands, worst] = mig_nodes
+        self.pop_conns[islands, worst] = mig_conns
+        fitness = fitness.clone()
+        fitness[islands, worst] = mig_fitness
+        return fitness
+
+    def tell(self, fitness: Tensor):
+        """
+        `fitness` has shape (K * P,) in the order of `ask`, or (K, P).
+        """
+        K, P = self.num_islands, self.island_size
+        fitness = fitness.view(K, P)
+        if self.migration_interval > 0 and (self.generation + 1) % self.migration_interval == 0:
+            fitness = self.migrate(fitness)
+
+        # selection for all islands at once
+        E = self.elitism
+        k1, k2, k3 = split_generator(self.randkey, 3)
+        survivors, pairs = truncation_selection(k1, fitness, P, self.survival_threshold, E)
+        islands = torch.arange(K, device=fitness.device)[:, None]
+
+        new_nodes, new_conns = self.buffers.child
+        new_nodes[:, :E] = self.pop_nodes[islands, survivors[:, :E]]
+        new_conns[:, :E] = self.pop_conns[islands, survivors[:, :E]]
+
+        # crossover is a per-genome operation, children are written straight into the child buffer
+        keys = split_generator(k2, K * P)
+        for k in range(K):
+            for i in range(E, P):
+                p1, p2 = pairs[k, i].tolist()
+                nodes, conns = self.genome.execute_crossover(
+                    self.state,
+                    keys[k * P + i],
+                    self.pop_nodes[k, p1],
+                    self.pop_conns[k, p1],
+                    self.pop_nodes[k, p2],
+                    self.pop_conns[k, p2],
+                )
+                new_nodes[k, i].copy_(nodes)
+                new_conns[k, i].copy_(conns)
+
+        if self.genome.mutation is not None and E < P:
+            # one mutation call for the offspring of all islands, keys follow the (K, P) index
+            idx = (torch.arange(K)[:, None] * P + torch.arange(E, P)).flatten()
+            new_node_keys = self.next_node_key + idx
+            new_conn_keys = self.next_conn_key + 3 * idx[:, None] + torch.arange(3)
+            children_nodes = new_nodes[:, E:].flatten(0, 1)
+            children_conns = new_conns[:, E:].flatten(0, 1)
+            if hasattr(self.genome.mutation, "batch"):
+                nodes, conns = self.genome.mutation.batch(
+                    self.state, self.genome, k3, children_nodes, children_conns, new_node_keys, new_conn_keys
+                )
+            else:
+                mutated = [
+                    self.genome.execute_mutation(
+                        self.state, keys[j], children_nodes[n], children_conns[n], new_node_keys[n], new_conn_keys[n]
+                    )
+                    for n, j in enumerate(idx.tolist())
+                ]
+                nodes = torch.stack([n for n, _ in mutated])
+                conns = torch.stack([c for _, c in mutated])
+            new_nodes[:, E:] = nodes.view((K, P - E) + nodes.shape[1:])
+            new_conns[:, E:] = conns.view((K, P - E) + conns.shape[1:])
+
+        self.buffers.swap()
+        self.next_node_key += K * P
+        self.next_conn_key += 3 * K * P
+        self.generation += 1
+
+    def show_details(self, fitness):
+        fitness = torch.nan_to_num(fitness.view(self.num_islands, self.island_size), nan=-float("inf"))
+        best = fitness.max(dim=1).values
+        print(
+            f"Generation: {self.generation}, "
+            f"best fitness per island: {[round(f, 6) for f in best.tolist()]}"
+        )
+
+    @property
+    def num_inputs(self):
+        return self.genome.num_inputs
+
+    @property
+    def num_outputs(self):
+        return self.genome.num_outputs
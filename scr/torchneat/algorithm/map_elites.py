@@ -0,0 +1,184 @@
+from typing import Sequence, Tuple
+import torch
+from torch import Tensor
+
+from torchneat.common import split_generator
+from .base import BaseAlgorithm
+
+
+class MAPElites(BaseAlgorithm):
+    """
+    MAP-Elites with the archive kept as dense tensors: one padded genome per cell of the behavior grid,
+    (cells, N, NL) and (cells, C, CL), with the (cells,) fitness (-inf for empty cells).
+
+    `ask` returns a batch of `batch_size` offspring: random genomes in the first generation, then
+    mutated copies (or, with probability `crossover_rate`, crossovers) of parents drawn uniformly from
+    the filled cells in one draw. `tell(fitness, *, behaviors)` maps the (B, D) behaviors to cells
+    (uniform bins over [low, high] per dim) and inserts the whole batch with one scatter-max per cell.
+    """
+
+    def __init__(
+        self,
+        genome,
+        grid_shape: Sequence[int],
+        low: Sequence[float],
+        high: Sequence[float],
+        batch_size: int = 100,
+        crossover_rate: float = 0.0,
+        seed: int = 0,
+        state=None,
+    ):
+        self.genome = genome
+        self.grid_shape = tuple(grid_shape)
+        self.low = torch.as_tensor(low, dtype=torch.float32)
+        self.high = torch.as_tensor(high, dtype=torch.float32)
+        self.batch_size = batch_size
+        self.crossover_rate = crossover_rate
+        self.state = state
+        if self.low.shape != (len(self.grid_shape),) or self.high.shape != (len(self.grid_shape),):
+            raise ValueError("low and high need one value per grid dim.")
+        if not torch.all(self.high > self.low):
+            raise ValueError("high must be greater than low in every grid dim.")
+
+        self.randkey = torch.Generator().manual_seed(seed)
+        self.generation = 0
+        self.next_node_key = int(max(genome.all_init_nodes)) + 1
+        self.next_conn_key = len(genome.all_init_conns)
+
+        num_cells = 1
+        for size in self.grid_shape:
+            num_cells *= size
+        self.archive_nodes = torch.full((num_cells, genome.max_nodes, genome.node_gene.length), float("nan"))
+        self.archive_conns = torch.full((num_cells, genome.max_conns, genome.conn_gene.length), float("nan"))
+        self.archive_fitness = torch.full((num_cells,), -float("inf"))
+
+        self.pop_nodes, self.pop_conns = genome.initialize_population(state, self.randkey, batch_size)
+
+    @property
+    def filled(self) -> Tensor:
+        return torch.isfinite(self.archive_fitness)
+
+    def ask(self) -> Tuple[Tensor, Tensor]:
+        """the offspring to evaluate, (B, N, NL) and (B, C, CL)"""
+        return self.pop_nodes, self.pop_conns
+
+    def transform(self, individual):
+        nodes, conns = individual
+        return self.genome.transform(self.state, nodes, conns)
+
+    def forward(self, transformed, inputs):
+        return self.genome.forward(self.state, transformed, inputs)
+
+    def cell_index(self, behaviors: Tensor) -> Tensor:
+        """
+        Flat cell index (B,) of every (B, D) behavior; behaviors outside [low, high] go to the border cells.
+        """
+        low, high = self.low.to(behaviors.device), self.high.to(behaviors.device)
+        shape = torch.tensor(self.grid_shape, device=behaviors.device)
+        bins = torch.floor((behaviors - low) / (high - low) * shape).to(torch.long)
+        bins = torch.minimum(torch.clamp(bins, min=0), shape - 1)
+
+        cells = torch.zeros(behaviors.shape[0], dtype=torch.long, device=behaviors.device)
+        for d in range(len(self.grid_shape)):
+            cells = cells * self.grid_shape[d] + bins[:, d]
+        return cells
+
+    def insert(self, fitness: Tensor, behaviors: Tensor) -> Tensor:
+        """
+        Insert the current batch into the archive. For every cell, the best offspring (the first one on ties)
+        replaces the elite if it is strictly better. Returns the (B,) mask of inserted offspring.
+        """
+        device = self.archive_fitness.device
+        fitness = torch.nan_to_num(fitness.to(device=device, dtype=torch.float32), nan=-float("inf"))
+        cells = self.cell_index(behaviors.to(device).flatten(1).to(torch.float32))
+
+        best = self.archive_fitness.scatter_reduce(0, cells, fitness, "amax", include_self=True)
+        # among the offspring reaching the new best of their cell, keep the first one
+        candidate = (fitness == best[cells]) & (fitness > self.archive_fitness[cells])
+        order = torch.arange(len(fitness), device=device)
+        first = torch.full_like(self.archive_fitness, len(fitness), dtype=torch.long)
+        first = first.scatter_reduce(0, cells[candidate], order[candidate], "amin", include_self=True)
+        inserted = candidate & (first[cells] == order)
+
+        winners = cells[inserted]
+        self.archive_nodes[winners] = self.pop_nodes[inserted].to(self.archive_nodes)
+        self.archive_conns[winners] = self.pop_conns[inserted].to(self.archive_conns)
+        self.archive_fitness[winners] = fitness[inserted]
+        return inserted
+
+    def sample_parents(self, randkey, num: int) -> Tensor:
+        """
+        (num,) cell indices drawn uniformly from the filled cells.
+        """
+        filled_cells = torch.nonzero(self.filled, as_tuple=True)[0]
+        draw = torch.randint(0, len(filled_cells), (num,), generator=randkey)
+        return filled_cells[draw.to(filled_cells.device)]
+
+    def tell(self, fitness: Tensor, *, behaviors: Tensor):
+        """
+        `fitness` (B,) and `behaviors` (B, D) of the offspring from `ask`.
+        `behaviors` is keyword-only, as in NoveltySearch.tell, so the two can not be swapped silently.
+        """
+        self.insert(fitness, behaviors)
+        if not self.filled.any():
+            raise ValueError("No offspring could be inserted, all fitness values are NaN or -inf.")
+
+        B = self.batch_size
+        k1, k2, k3, k4 = split_generator(self.randkey, 4)
+        parents = self.sample_parents(k1, B)
+        nodes, conns = self.archive_nodes[parents].clone(), self.archive_conns[parents].clone()
+
+        if self.crossover_rate > 0:
+            mates = self.sample_parents(k2, B)
+            cross = torch.rand(B, generator=k3) < self.crossover_rate
+            keys = split_generator(k3, B)
+            for i in torch.nonzero(cross, as_tuple=True)[0].tolist():
+                p1, p2 = parents[i], mates[i]
+                if self.archive_fitness[p2] > self.archive_fitness[p1]:
+                    p1, p2 = p2, p1
+                nodes[i], conns[i] = self.genome.execute_crossover(
+                    self.state,
+                    keys[i],
+                    self.archive_nodes[p1],
+                    self.archive_conns[p1],
+                    self.archive_nodes[p2],
+                    self.archive_conns[p2],
+                )
+
+        if self.genome.mutation is not None:
+            new_node_keys = self.next_node_key + torch.arange(B)
+            new_conn_keys = self.next_conn_key + 3 * torch.arange(B)[:, None] + torch.arange(3)
+            if hasattr(self.genome.mutation, "batch"):
+                nodes, conns = self.genome.mutation.batch(
+                    self.state, self.genome, k4, nodes, conns, new_node_keys, new_conn_keys
+                )
+            else:
+                keys = split_generator(k4, B)
+                mutated = [
+                    self.genome.execute_mutation(self.state, keys[i], nodes[i], conns[i], new_node_keys[i], new_conn_keys[i])
+                    for i in range(B)
+                ]
+                nodes = torch.stack([n for n, _ in mutated])
+                conns = torch.stack([c for _, c in mutated])
+            self.next_node_key += B
+            self.next_conn_key += 3 * B
+
+        self.pop_nodes, self.pop_conns = nodes, conns
+        self.generation += 1
+
+    def show_details(self, fitness):
+        filled = self.filled
+        print(
+            f"Generation: {self.generation}, "
+            f"coverage: {filled.sum().item()}/{len(filled)}, "
+            f"best fitness: {self.archive_fitness.max().item():.6f}, "
+            f"QD score: {self.archive_fitness[filled].sum().item():.6f}"
+        )
+
+    @property
+    def num_inputs(self):
+        return self.genome.num_inputs
+
+    @property
+    def num_outputs(self):
+        return self.genome.num_outputs
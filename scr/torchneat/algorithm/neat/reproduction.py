@@ -0,0 +1,134 @@
+from typing import NamedTuple
+import torch
+from torch import Tensor
+
+
+class Schedule(NamedTuple):
+    parents: Tensor  # (P, 2) parent indices in the current population, fitter parent first
+    elite: Tensor  # (P,) True where the offspring is an unchanged copy of parents[:, 0]
+    offspring_species: Tensor  # (P,) species id of every offspring
+    species_ids: Tensor  # (S,) the species of the current population
+    quotas: Tensor  # (S,) number of offspring of every species
+    num_survivors: Tensor  # (S,) number of members of every species allowed to reproduce
+
+
+def largest_remainder(weights: Tensor, total) -> Tensor:
+    """
+    Split the int `total` into shares proportional to the non-negative `weights` (S,), summing to `total`:
+    the floors of the exact shares, plus one for the largest fractional parts.
+    """
+    exact = weights / weights.sum() * total
+    shares = torch.floor(exact)
+    leftover = total - shares.sum()
+    order = torch.argsort(exact - shares, descending=True, stable=True)
+    rank = torch.empty_like(order)
+    rank[order] = torch.arange(len(order), device=order.device)
+    return (shares + (rank < leftover)).to(torch.long)
+
+
+class ReproductionScheduler:
+    """
+    Plan the next generation of a speciated population as tensors, with no loop over species or individuals.
+
+    - Every species gets `min_species_size` offspring (if the population is large enough), the rest of the
+      population is shared in proportion to the species' adjusted fitness (mean fitness, min-max normalized).
+    - The `elitism` best members of a species are copied unchanged, within its quota.
+    - Parents are chosen among the `survival_threshold` best members of their species, by "tournament"
+      (the best of `tournament_size` uniform draws), "rank" (linear ranking, the best member is the most
+      likely) or "uniform" selection.
+
+    The only host synchronization is `torch.unique` on the species ids. The (P, 2) parents feed straight
+    into batched crossover and mutation.
+    """
+
+    def __init__(
+        self,
+        pop_size: int,
+        elitism: int = 2,
+        survival_threshold: float = 0.2,
+        min_species_size: int = 1,
+        selection: str = "tournament",
+        tournament_size: int = 3,
+    ):
+        if selection not in ("tournament", "rank", "uniform"):
+            raise ValueError(f"Unknown selection {selection}, need be 'tournament', 'rank' or 'uniform'.")
+        self.pop_size = pop_size
+        self.elitism = elitism
+        self.survival_threshold = survival_threshold
+        self.min_species_size = min_species_size
+        self.selection = selection
+        self.tournament_size = tournament_size
+
+    def quotas(self, mean_fitness: Tensor) -> Tensor:
+        S = mean_fitness.shape[0]
+        base = min(self.min_species_size, self.pop_size // S)
+        low, high = mean_fitness.min(), mean_fitness.max()
+        adjusted = torch.where(
+            high > low, (mean_fitness - low) / (high - low), torch.ones_like(mean_fitness)
+        )
+        # keep the worst species a small share, as NEAT-python does with its min adjusted fitness
+        adjusted = adjusted + 1e-3
+        return base + largest_remainder(adjusted, self.pop_size - base * S)
+
+    def _draw_ranks(self, randkey, num_survivors: Tensor) -> Tensor:
+        """(P, 2) ranks in [0, num_survivors) of the two parents of every offspring, 0 is the best member"""
+        P, device = num_survivors.shape[0], num_survivors.device
+        n = num_survivors.to(torch.float32)[:, None]
+        if self.selection == "tournament":
+            u = torch.rand((P, 2, self.tournament_size), generator=randkey).to(device)
+            ranks = torch.floor(u * n[..., None]).amin(dim=-1)
+        elif self.selection == "rank":
+            # inverse CDF of the density 2 * (1 - x) on [0, 1)
+            u = torch.rand((P, 2), generator=randkey).to(device)
+            ranks = torch.floor((1 - torch.sqrt(1 - u)) * n)
+        else:
+            ranks = torch.floor(torch.rand((P, 2), generator=randkey).to(device) * n)
+        ranks = torch.minimum(ranks, n - 1).to(torch.long)
+        return torch.sort(ranks, dim=1).values
+
+    def schedule(self, randkey: torch.Generator, fitness: Tensor, species: Tensor) -> Schedule:
+        """
+        fitness: (P,) fitness of the current population, NaN counts as the worst.
+        species: (P,) species id of every member.
+        """
+        device = fitness.device
+        P = self.pop_size
+        fitness = torch.nan_to_num(fitness, nan=-float("inf"))
+        species_ids, cols = torch.unique(species.to(device), return_inverse=True)
+        S = species_ids.shape[0]
+
+        # members grouped by species, best first inside a species
+        by_fitness = torch.argsort(fitness, descending=True, stable=True)
+        order = by_fitness[torch.argsort(cols[by_fitness], stable=True)]
+        sizes = torch.bincount(cols, minlength=S)
+        starts = torch.cumsum(sizes, dim=0) - sizes
+
+        # -inf members count as the worst finite fitness in the species means
+        finite = torch.isfinite(fitness)
+        clean = torch.where(finite, fitness, torch.where(finite, fitness, float("inf")).min())
+        mean_fitness = torch.zeros(S, dtype=clean.dtype, device=device).index_add_(0, cols, clean) / sizes
+        quotas = self.quotas(mean_fitness)
+
+        num_survivors = torch.clamp(torch.ceil(self.survival_threshold * sizes).to(torch.long), min=1)
+        num_survivors = torch.maximum(num_survivors, torch.clamp(sizes, max=self.elitism))
+        num_survivors = torch.minimum(num_survivors, sizes)
+        num_elites = torch.minimum(torch.clamp(sizes, max=self.elitism), quotas)
+
+        # offspring slots, species by species
+        slot = torch.arange(P, device=device)
+        slot_col = torch.searchsorted(torch.cumsum(quotas, dim=0), slot, right=True)
+        slot_rank = slot - (torch.cumsum(quotas, dim=0) - quotas)[slot_col]
+        elite = slot_rank < num_elites[slot_col]
+
+        ranks = self._draw_ranks(randkey, num_survivors[slot_col])
+        ranks = torch.where(elite[:, None], slot_rank[:, None], ranks)
+        parents = order[starts[slot_col][:, None] + ranks]
+
+        return Schedule(
+            parents=parents,
+            elite=elite,
+            offspring_species=species_ids[slot_col],
+            species_ids=species_ids,
+            quotas=quotas,
+            num_survivors=num_survivors,
+        )
@@ -0,0 +1,204 @@
+import torch
+from torch import Tensor
+
+from torchneat.genome.utils import batch_valid_cnt
+
+
+class IncrementalSpeciation:
+    """
+    Speciation that avoids most full distance computations.
+
+    Every genome joins the compatible species (distance < compatibility_threshold) of its parent if it can,
+    otherwise the closest compatible species, otherwise it founds a new species. Full distances are only
+    computed when they are needed and can not be avoided:
+    - genomes copied unchanged from the last generation (elites) reuse their cached distances
+      to representatives that did not change,
+    - the lower bound of the distance from the valid node/conn counts (`distance.lower_bound`)
+      rules out species that can not be under the threshold.
+    The threshold adapts by `threshold_step` per generation to approach `target_species`.
+
+    `genome.distance` must provide `batch` and `lower_bound`, like DefaultDistance.
+    """
+
+    def __init__(
+        self,
+        genome,
+        compatibility_threshold: float = 3.0,
+        target_species: int = None,
+        threshold_step: float = 0.1,
+        min_threshold: float = 0.1,
+        chunk_size: int = 4096,
+        state=None,
+    ):
+        self.genome = genome
+        self.distance = genome.distance
+        self.compatibility_threshold = compatibility_threshold
+        self.target_species = target_species
+        self.threshold_step = threshold_step
+        self.min_threshold = min_threshold
+        self.chunk_size = chunk_size
+        self.state = state
+
+        self.species_ids = torch.zeros(0, dtype=torch.long)
+        self.rep_nodes = None
+        self.rep_conns = None
+        self.next_species_id = 0
+        self.stats = {"bound_checks": 0, "full_distances": 0, "cache_hits": 0}
+
+        # distances of the last population to the current representatives (inf = not computed)
+        self._dist = None
+        self._rep_changed = None
+        self._species_col = None
+
+    @property
+    def num_species(self):
+        return len(self.species_ids)
+
+    def _pair_distances(self, pop_nodes, pop_conns, rows, cols, rep_nodes, rep_conns):
+        out = []
+        for s in range(0, len(rows), self.chunk_size):
+            r, c = rows[s: s + self.chunk_size], cols[s: s + self.chunk_size]
+            out.append(
+                self.distance.batch(self.state, self.genome, pop_nodes[r], pop_conns[r], rep_nodes[c], rep_conns[c])
+            )
+        self.stats["full_distances"] += len(rows)
+        if not out:
+            return torch.zeros(0, dtype=pop_nodes.dtype, device=pop_nodes.device)
+        return torch.cat(out)
+
+    def speciate(self, pop_nodes: Tensor, pop_conns: Tensor, parents: Tensor = None, unchanged: Tensor = None) -> Tensor:
+        """
+        Assign species to a population (P, N, NL), (P, C, CL).
+        parents: (P,) index of every genome's (first) parent in the previous population, -1 if unknown.
+        unchanged: (P,) True for genomes that are exact copies of their parent.
+        Returns the (P,) species ids.
+        """
+        device = pop_nodes.device
+        P = pop_nodes.shape[0]
+        thr = self.compatibility_threshold
+        S = self.num_species
+        if S == 0:
+            self.rep_nodes = pop_nodes[:0]
+            self.rep_conns = pop_conns[:0]
+
+        node_cnt, conn_cnt = batch_valid_cnt(pop_nodes), batch_valid_cnt(pop_conns)
+        rep_node_cnt, rep_conn_cnt = batch_valid_cnt(self.rep_nodes), batch_valid_cnt(self.rep_conns)
+        lower = self.distance.lower_bound(
+            node_cnt[:, None], conn_cnt[:, None], rep_node_cnt[None, :], rep_conn_cnt[None, :]
+        )
+        candidate = lower < thr
+        self.stats["bound_checks"] += P * S
+
+        dist = torch.full((P, S), float("inf"), device=device)
+        known = torch.zeros((P, S), dtype=torch.bool, device=device)
+        cols = torch.full((P,), -1, dtype=torch.long, device=device)
+
+        has_history = parents is not None and self._dist is not None
+        if has_history:
+            parents = parents.to(device)
+            has_parent = parents >= 0
+            safe_parents = torch.clamp(parents, min=0)
+
+            # A: unchanged copies keep their distances to unchanged representatives
+            if unchanged is not None:
+                reuse = (unchanged.to(device) & has_parent)[:, None] & ~self._rep_changed[None, :]
+                cached = self._dist[safe_parents]
+                reuse = reuse & torch.isfinite(cached)
+                dist = torch.where(reuse, cached, dist)
+                known |= reuse
+                self.stats["cache_hits"] += int(reuse.sum())
+
+            # B: try the species of the parent first
+            parent_col = torch.where(has_parent, self._species_col[safe_parents], -1)
+            rows = torch.nonzero(parent_col >= 0, as_tuple=True)[0]
+            pc = parent_col[rows]
+            need = candidate[rows, pc] & ~known[rows, pc]
+            r, c = rows[need], pc[need]
+            dist[r, c] = self._pair_distances(pop_nodes, pop_conns, r, c, self.rep_nodes, self.rep_conns)
+            known[r, c] = True
+            ok = dist[rows, pc] < thr
+            cols[rows[ok]] = pc[ok]
+
+        # C: the remaining genomes go to the closest compatible species
+        rest = cols < 0
+        r, c = torch.nonzero(rest[:, None] & candidate & ~known, as_tuple=True)
+        dist[r, c] = self._pair_distances(pop_nodes, pop_conns, r, c, self.rep_nodes, self.rep_conns)
+        known[r, c] = True
+        if S > 0:
+            best_dist, best_col = torch.min(dist, dim=1)
+            assign = rest & (best_dist < thr)
+            cols[assign] = best_col[assign]
+
+        # D: the others found new species, one representative at a time
+        rep_nodes, rep_conns = [self.rep_nodes], [self.rep_conns]
+        new_cols = []
+        while True:
+            rest = torch.nonzero(cols < 0, as_tuple=True)[0]
+            if len(rest) == 0:
+                break
+            founder, others = rest[0], rest[1:]
+            col = S + len(new_cols)
+            new_cols.append(founder)
+            cols[founder] = col
+            dist = torch.cat([dist, torch.full((P, 1), float("inf"), device=device)], dim=1)
+            dist[founder, col] = 0.0
+
+            lower = self.distance.lower_bound(node_cnt[others], conn_cnt[others], node_cnt[founder], conn_cnt[founder])
+            self.stats["bound_checks"] += len(others)
+            others = others[lower < thr]
+            d = self._pair_distances(
+                pop_nodes, pop_conns, others, torch.zeros_like(others), pop_nodes[founder][None], pop_conns[founder][None]
+            )
+            dist[others, col] = d
+            cols[others[d < thr]] = col
+
+        if new_cols:
+            founders = torch.stack(new_cols)
+            rep_nodes.append(pop_nodes[founders])
+            rep_conns.append(pop_conns[founders])
+            new_ids = torch.arange(self.next_species_id, self.next_species_id + len(new_cols), device=device)
+            self.next_species_id += len(new_cols)
+            species_ids = torch.cat([self.species_ids.to(device), new_ids])
+        else:
+            species_ids = self.species_ids.to(device)
+        rep_nodes, rep_conns = torch.cat(rep_nodes), torch.cat(rep_conns)
+        self._update_representatives(pop_nodes, pop_conns, cols, dist, species_ids, rep_nodes, rep_conns)
+        self._adapt_threshold()
+
+        return species_ids[cols]
+
+    def _update_representatives(self, pop_nodes, pop_conns, cols, dist, species_ids, rep_nodes, rep_conns):
+        """
+        The new representative of a species is its member closest to the old representative.
+        Species without members are dropped.
+        """
+        total = len(species_ids)
+        member = cols[:, None] == torch.arange(total, device=cols.device)[None, :]
+        member_dist = torch.where(member, dist, float("inf"))
+        closest = torch.argmin(member_dist, dim=0)
+        alive = member.any(dim=0)
+
+        new_rep_nodes = pop_nodes[closest]
+        new_rep_conns = pop_conns[closest]
+        same = torch.all(
+            torch.nan_to_num(new_rep_nodes, nan=-1.0).flatten(1) == torch.nan_to_num(rep_nodes, nan=-1.0).flatten(1), dim=1
+        ) & torch.all(
+            torch.nan_to_num(new_rep_conns, nan=-1.0).flatten(1) == torch.nan_to_num(rep_conns, nan=-1.0).flatten(1), dim=1
+        )
+
+        # renumber the surviving species columns
+        col_map = torch.cumsum(alive, dim=0) - 1
+        self.species_ids = species_ids[alive]
+        self.rep_nodes = new_rep_nodes[alive]
+        self.rep_conns = new_rep_conns[alive]
+        self._rep_changed = ~same[alive]
+        self._dist = dist[:, alive]
+        self._species_col = col_map[cols]
+
+    def _adapt_threshold(self):
+        if self.target_species is None:
+            return
+        if self.num_species > self.target_species:
+            self.compatibility_threshold += self.threshold_step
+        elif self.num_species < self.target_species:
+            self.compatibility_threshold = max(self.min_threshold, self.compatibility_threshold - self.threshold_step)
@@ -0,0 +1,202 @@
+import torch
+from torch import Tensor
+
+from .base import BaseAlgorithm
+
+
+def knn_novelty(
+    queries: Tensor,
+    refs: Tensor,
+    k: int = 15,
+    chunk_size: int = 8192,
+    exclude_self: bool = False,
+) -> Tensor:
+    """
+    Novelty of every query (Q, D): the mean distance to its k nearest neighbours in refs (R, D).
+    The distance matrix is built `chunk_size` refs at a time, keeping a running top-k,
+    so archives of any size fit in memory.
+    With exclude_self, refs[i] is query i itself (refs start with the queries) and is skipped.
+    Returns a (Q,) tensor.
+    """
+    Q, R = queries.shape[0], refs.shape[0]
+    k = min(k, R - int(exclude_self))
+    if Q == 0 or k <= 0:
+        return torch.zeros(Q, dtype=queries.dtype, device=queries.device)
+
+    rows = torch.arange(Q, device=queries.device)[:, None]
+    best = torch.full((Q, 0), float("inf"), dtype=queries.dtype, device=queries.device)
+    for start in range(0, R, chunk_size):
+        d = torch.cdist(queries, refs[start: start + chunk_size])
+        if exclude_self:
+            cols = torch.arange(start, start + d.shape[1], device=queries.device)[None, :]
+            d = torch.where(rows == cols, float("inf"), d)
+        candidates = torch.cat([best, d], dim=1)
+        best = torch.topk(candidates, min(k, candidates.shape[1]), dim=1, largest=False).values
+    return best.mean(dim=1)
+
+
+class NoveltyArchive:
+    """
+    A bounded archive of behavior descriptors, stored in a preallocated (capacity, D) tensor.
+
+    insertion decides which individuals of a generation enter the archive:
+    - "threshold": novelty above `threshold`; with `target_added`, the threshold adapts by `threshold_step`
+      (relative) to add about that many individuals per generation,
+    - "random": every individual with probability `add_prob`,
+    - "top": the `target_added` most novel individuals.
+    eviction decides which entries are replaced once the archive is full:
+    - "fifo": the oldest, "random": uniformly random, "least_novel": the ones with the lowest novelty at insertion.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        capacity: int = 10000,
+        insertion: str = "threshold",
+        eviction: str = "fifo",
+        threshold: float = 1.0,
+        threshold_step: float = 0.05,
+        target_added: int = None,
+        add_prob: float = 0.01,
+        seed: int = 0,
+        device=None,
+    ):
+        if insertion not in ("threshold", "random", "top"):
+            raise ValueError(f"Unknown insertion {insertion}, need be 'threshold', 'random' or 'top'.")
+        if eviction not in ("fifo", "random", "least_novel"):
+            raise ValueError(f"Unknown eviction {eviction}, need be 'fifo', 'random' or 'least_novel'.")
+        if insertion == "top" and target_added is None:
+            raise ValueError("insertion='top' needs target_added.")
+
+        self.capacity = capacity
+        self.insertion = insertion
+        self.eviction = eviction
+        self.threshold = threshold
+        self.threshold_step = threshold_step
+        self.target_added = target_added
+        self.add_prob = add_prob
+        self.randkey = torch.Generator().manual_seed(seed)
+
+        self.behaviors = torch.zeros((capacity, dim), device=device)
+        self.novelty = torch.zeros(capacity, device=device)
+        self.size = 0
+        self._next = 0  # fifo write position
+
+    @property
+    def data(self) -> Tensor:
+        return self.behaviors[: self.size]
+
+    def select(self, novelty: Tensor) -> Tensor:
+        """
+        Indices of the individuals that enter the archive.
+        """
+        if self.insertion == "threshold":
+            chosen = torch.nonzero(novelty > self.threshold, as_tuple=True)[0]
+            if self.target_added is not None:
+                if len(chosen) > self.target_added:
+                    self.threshold *= 1 + self.threshold_step
+                elif len(chosen) < self.target_added:
+                    self.threshold *= 1 - self.threshold_step
+            return chosen
+        if self.insertion == "random":
+            draw = torch.rand(novelty.shape, generator=self.randkey).to(novelty.device)
+            return torch.nonzero(draw < self.add_prob, as_tuple=True)[0]
+        return torch.topk(novelty, min(self.target_added, len(novelty))).indices
+
+    def _slots(self, n: int, device) -> Tensor:
+        free = self.capacity - self.size
+        slots = torch.arange(self.size, self.size + min(n, free), device=device)
+        n_replace = n - len(slots)
+        if n_replace == 0:
+            return slots
+
+        if self.eviction == "fifo":
+            replace = (self._next + torch.arange(n_replace, device=device)) % self.capacity
+            self._next = (self._next + n_replace) % self.capacity
+        elif self.eviction == "random":
+            # only among the entries filled before this step
+            replace = torch.randperm(self.size, generator=self.randkey)[:n_replace].to(device)
+        else:
+            replace = torch.argsort(self.novelty[: self.size], stable=True)[:n_replace]
+        return torch.cat([slots, replace])
+
+    def add(self, behaviors: Tensor, novelty: Tensor):
+        """
+        Insert the selected individuals of a generation, (P, D) behaviors with their (P,) novelty.
+        """
+        chosen = self.select(novelty)
+        # never write more than the capacity in one step, keep the most novel
+        if len(chosen) > self.capacity:
+            chosen = chosen[torch.topk(novelty[chosen], self.capacity).indices]
+        if len(chosen) == 0:
+            return chosen
+
+        slots = self._slots(len(chosen), self.behaviors.device)
+        self.behaviors[slots] = behaviors[chosen].to(self.behaviors)
+        self.novelty[slots] = novelty[chosen].to(self.novelty)
+        self.size = min(self.capacity, self.size + len(chosen))
+        return chosen
+
+
+class NoveltySearch(BaseAlgorithm):
+    """
+    Novelty-search fitness on top of another algorithm.
+
+    `tell(fitness=None, *, behaviors)` takes the (P, D) behavior descriptors of the population asked by the
+    inner algorithm, computes every individual's novelty against the rest of the population and the
+    archive, updates the archive, and tells the inner algorithm
+    `novelty + fitness_weight * fitness` (pure novelty when fitness_weight is 0 or fitness is None).
+    """
+
+    def __init__(
+        self,
+        algorithm: BaseAlgorithm,
+        archive: NoveltyArchive,
+        k: int = 15,
+        fitness_weight: float = 0.0,
+        chunk_size: int = 8192,
+    ):
+        self.algorithm = algorithm
+        self.archive = archive
+        self.k = k
+        self.fitness_weight = fitness_weight
+        self.chunk_size = chunk_size
+        self.novelty = None
+
+    def ask(self):
+        return self.algorithm.ask()
+
+    def transform(self, individual):
+        return self.algorithm.transform(individual)
+
+    def forward(self, transformed, inputs):
+        return self.algorithm.forward(transformed, inputs)
+
+    def novelty_of(self, behaviors: Tensor) -> Tensor:
+        refs = torch.cat([behaviors, self.archive.data.to(behaviors)], dim=0)
+        return knn_novelty(behaviors, refs, self.k, self.chunk_size, exclude_self=True)
+
+    def tell(self, fitness: Tensor = None, *, behaviors: Tensor):
+        behaviors = behaviors.flatten(1).to(torch.float32)
+        self.novelty = self.novelty_of(behaviors)
+        self.archive.add(behaviors, self.novelty)
+
+        score = self.novelty
+        if fitness is not None and self.fitness_weight != 0:
+            score = score + self.fitness_weight * torch.nan_to_num(fitness.to(score), nan=-float("inf"))
+        self.algorithm.tell(score)
+
+    def show_details(self, fitness):
+        print(
+            f"novelty max: {self.novelty.max().item():.6f}, mean: {self.novelty.mean().item():.6f}, "
+            f"archive size: {self.archive.size}"
+        )
+        self.algorithm.show_details(fitness)
+
+    @property
+    def num_inputs(self):
+        return self.algorithm.num_inputs
+
+    @property
+    def num_outputs(self):
+        return self.algorithm.num_outputs
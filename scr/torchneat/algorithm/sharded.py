@@ -0,0 +1,194 @@
+from itertools import accumulate
+from typing import List, Tuple
+
+import torch
+import torch.distributed as dist
+from torch import Tensor
+
+from torchneat.common import PingPong, truncation_selection
+from .base import BaseAlgorithm
+
+
+def shard_bounds(pop_size: int, world_size: int) -> List[int]:
+    """
+    Split pop_size individuals into world_size contiguous shards.
+    Returns the world_size + 1 offsets, rank r owns [offsets[r], offsets[r + 1]).
+    """
+    base, extra = divmod(pop_size, world_size)
+    sizes = [base + (r < extra) for r in range(world_size)]
+    return [0] + list(accumulate(sizes))
+
+
+class ShardedAlgorithm(BaseAlgorithm):
+    """
+    Population sharded over the ranks of a torch.distributed process group.
+
+    Every rank only holds, transforms, evaluates and reproduces its own slice of the population.
+    Per generation, the collectives only carry the fitness vector and the genomes selected as parents;
+    `gather_genomes` also serves species representatives or any other genomes picked by global index.
+    Selection is computed identically on every rank from the gathered fitness, and all randomness is
+    keyed by (seed, generation, global index), so the result does not depend on the number of ranks.
+
+    Works with any backend the population tensors' device supports, e.g. gloo for CPU, nccl for CUDA.
+    """
+
+    def __init__(
+        self,
+        genome,
+        pop_size: int,
+        elitism: int = 2,
+        survival_threshold: float = 0.2,
+        seed: int = 0,
+        state=None,
+        group=None,
+    ):
+        self.genome = genome
+        self.pop_size = pop_size
+        self.elitism = elitism
+        self.survival_threshold = survival_threshold
+        self.seed = seed
+        self.state = state
+        self.group = group
+
+        self.rank = dist.get_rank(group)
+        self.world_size = dist.get_world_size(group)
+        if pop_size < self.world_size:
+            raise ValueError(f"pop_size={pop_size} must be at least the world size={self.world_size}")
+        self.offsets = shard_bounds(pop_size, self.world_size)
+        self.start, self.end = self.offsets[self.rank], self.offsets[self.rank + 1]
+
+        self.generation = 0
+        self.global_fitness = None
+        self.next_node_key = max(genome.all_init_nodes) + 1
+        self.next_conn_key = len(genome.all_init_conns)
+
+        # every rank draws the whole population from the same seed and keeps its shard,
+        # so the initial population does not depend on the sharding
+        pop_nodes, pop_conns = genome.initialize_population(state, self._seed(-1, 0), pop_size)
+        self.buffers = PingPong(
+            pop_nodes[self.start : self.end].clone(), pop_conns[self.start : self.end].clone()
+        )
+
+    @property
+    def pop_nodes(self) -> Tensor:
+        return self.buffers.nodes
+
+    @property
+    def pop_conns(self) -> Tensor:
+        return self.buffers.conns
+
+    def _seed(self, generation: int, index: int) -> int:
+        # the same value on every rank, for any sharding
+        return ((self.seed * 1_000_003 + generation + 1) * 1_000_003 + index + 1) % (2**63)
+
+    def _key(self, generation: int, index: int) -> torch.Generator:
+        return torch.Generator().manual_seed(self._seed(generation, index))
+
+    def ask(self) -> Tuple[Tensor, Tensor]:
+        """the local shard of the population, (P_rank, N, NL) and (P_rank, C, CL)"""
+        return self.pop_nodes, self.pop_conns
+
+    def transform(self, individual):
+        nodes, conns = individual
+        return self.genome.transform(self.state, nodes, conns)
+
+    def forward(self, transformed, inputs):
+        return self.genome.forward(self.state, transformed, inputs)
+
+    def gather_fitness(self, fitness: Tensor) -> Tensor:
+        """
+        Assemble the (pop_size,) fitness of the whole population from the local (P_rank,) fitness.
+        """
+        full = torch.zeros(self.pop_size, dtype=fitness.dtype, device=fitness.device)
+        full[self.start:self.end] = fitness
+        # exactly one rank contributes each entry, the others add zeros
+        dist.all_reduce(full, op=dist.ReduceOp.SUM, group=self.group)
+        return full
+
+    def gather_genomes(self, global_idx: Tensor) -> Tuple[Tensor, Tensor]:
+        """
+        Fetch the genomes with the given global indices onto every rank.
+        `global_idx` must be the same on all ranks. NaN padding survives the sum, since NaN + 0 = NaN.
+        """
+        device = self.pop_nodes.device
+        global_idx = global_idx.to(device)
+        owned = (global_idx >= self.start) & (global_idx < self.end)
+        local_idx = global_idx[owned] - self.start
+
+        nodes = torch.zeros((len(global_idx),) + self.pop_nodes.shape[1:], dtype=self.pop_nodes.dtype, device=device)
+        conns = torch.zeros((len(global_idx),) + self.pop_conns.shape[1:], dtype=self.pop_conns.dtype, device=device)
+        nodes[owned] = self.pop_nodes[local_idx]
+        conns[owned] = self.pop_conns[local_idx]
+        dist.all_reduce(nodes, op=dist.ReduceOp.SUM, group=self.group)
+        dist.all_reduce(conns, op=dist.ReduceOp.SUM, group=self.group)
+        return nodes, conns
+
+    def select(self, fitness: Tensor) -> Tuple[Tensor, Tensor, Tensor]:
+        """
+        Truncation selection on the global fitness, the same on every rank.
+        Returns the survivors (fittest first), the elites and the (pop_size, 2) parent indices,
+        with the fitter parent first.
+        """
+        survivors, pairs = truncation_selection(
+            self._key(self.generation, -1),
+            fitness.cpu(),
+            self.pop_size,
+            self.survival_threshold,
+            self.elitism,
+        )
+        return survivors, survivors[: self.elitism], pairs
+
+    def tell(self, fitness: Tensor):
+        """
+        `fitness` is the (P_rank,) fitness of the local shard.
+        """
+        self.global_fitness = self.gather_fitness(fitness)
+        survivors, elites, pairs = self.select(self.global_fitness)
+        pool_nodes, pool_conns = self.gather_genomes(survivors)
+        pool_pos = torch.full((self.pop_size,), -1, dtype=torch.long)
+        pool_pos[survivors] = torch.arange(len(survivors))
+
+        new_nodes, new_conns = self.buffers.child
+        for i in range(self.start, self.end):
+            j = i - self.start
+            if i < self.elitism:
+                p = pool_pos[elites[i]]
+                new_nodes[j].copy_(pool_nodes[p])
+                new_conns[j].copy_(pool_conns[p])
+                continue
+
+            randkey = self._key(self.generation, i)
+            p1, p2 = pool_pos[pairs[i]].tolist()
+            nodes, conns = self.genome.execute_crossover(
+                self.state, randkey, pool_nodes[p1], pool_conns[p1], pool_nodes[p2], pool_conns[p2]
+            )
+            if self.genome.mutation is not None:
+                # keys only depend on the global index, so they are unique across ranks
+                new_node_key = self.next_node_key + i
+                new_conn_keys = self.next_conn_key + 3 * i + torch.arange(3)
+                nodes, conns = self.genome.execute_mutation(
+                    self.state, randkey, nodes, conns, new_node_key, new_conn_keys
+                )
+            new_nodes[j].copy_(nodes)
+            new_conns[j].copy_(conns)
+
+        self.buffers.swap()
+        self.next_node_key += self.pop_size
+        self.next_conn_key += 3 * self.pop_size
+        self.generation += 1
+
+    def show_details(self, fitness):
+        if self.rank == 0:
+            fitness = torch.nan_to_num(self.global_fitness, nan=-float("inf"))
+            print(
+                f"Generation: {self.generation}, "
+                f"max fitness: {fitness.max().item():.6f}, mean fitness: {fitness[torch.isfinite(fitness)].mean().item():.6f}"
+            )
+
+    @property
+    def num_inputs(self):
+        return self.genome.num_inputs
+
+    @property
+    def num_outputs(self):
+        return self.genome.num_outputs
@@ -1 +1,6 @@
-from .functions import ACT
\ No newline at end of file
+from .tools import *
+from .graph import *
+from .functions import ACT, AGG, get_func_name, apply_activation, apply_aggregation, fused_activation, FusedActivation
+from .workspace import Workspace, PingPong
+from .visualize import BackgroundRenderer
+from .deterministic import set_deterministic, is_deterministic
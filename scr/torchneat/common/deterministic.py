@@ -0,0 +1,37 @@
+import os
+import torch
+
+_DETERMINISTIC = False
+
+
+def set_deterministic(enabled: bool = True):
+    """
+    Make repeated runs with the same seeds bit-identical, at some cost in speed:
+    - torch only uses deterministic algorithms (and errors on ops that have none),
+    - cuDNN autotuning is off and cuBLAS uses a fixed workspace,
+    - the NaN-ignoring sum/product/mean aggregations reduce in index order instead of with a parallel
+      reduction tree, so the rounding does not depend on the kernel or the batch layout.
+    The cuBLAS setting only applies if CUDA is initialized after this call.
+    """
+    global _DETERMINISTIC
+    _DETERMINISTIC = enabled
+    if enabled:
+        os.environ.setdefault("CUBLAS_WORKSPACE_CONFIG", ":4096:8")
+    torch.use_deterministic_algorithms(enabled)
+    torch.backends.cudnn.deterministic = enabled
+    torch.backends.cudnn.benchmark = False if enabled else torch.backends.cudnn.benchmark
+
+
+def is_deterministic() -> bool:
+    return _DETERMINISTIC
+
+
+def ordered_reduce(op, z: torch.Tensor, dim: int = 0) -> torch.Tensor:
+    """
+    Reduce `z` along `dim` with the binary `op`, strictly from the first to the last element.
+    """
+    z = z.movedim(dim, 0)
+    out = z[0]
+    for k in range(1, z.shape[0]):
+        out = op(out, z[k])
+    return out
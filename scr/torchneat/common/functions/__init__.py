@@ -1,6 +1,8 @@
+import torch
 from .act_torch import *
 from .agg_torch import *
 from .manager import FunctionManager
+from .fused import fused_activation, FusedActivation
 
 act_name2torch = {
     "scaled_sigmoid": scaled_sigmoid_,
@@ -25,4 +27,76 @@ agg_name2torch = {
     "maxabs": maxabs_,
     "mean": mean_
 }
-ACT = FunctionManager(act_name2torch)
+
+
+def _act_name2sympy():
+    from . import act_sympy
+
+    return {
+        "scaled_sigmoid": act_sympy.scaled_sigmoid_,
+        "sigmoid": act_sympy.sigmoid_,
+        "scaled_tanh": act_sympy.scaled_tanh_,
+        "tanh": act_sympy.tanh_,
+        "sin": act_sympy.sin_,
+        "relu": act_sympy.relu_,
+        "lelu": act_sympy.lelu_,
+        "identity": act_sympy.identity_,
+        "inv": act_sympy.inv_,
+        "log": act_sympy.log_,
+        "exp": act_sympy.exp_,
+        "abs": act_sympy.abs_,
+    }
+
+
+def _agg_name2sympy():
+    from . import agg_sympy
+
+    return {
+        "sum": agg_sympy.sum_,
+        "product": agg_sympy.product_,
+        "max": agg_sympy.max_,
+        "min": agg_sympy.min_,
+        "maxabs": agg_sympy.maxabs_,
+        "mean": agg_sympy.mean_,
+    }
+
+
+# the sympy tables are built on first use, importing torchneat does not import sympy
+ACT = FunctionManager(act_name2torch, _act_name2sympy)
+AGG = FunctionManager(agg_name2torch, _agg_name2sympy)
+
+
+def __getattr__(name):
+    if name == "act_name2sympy":
+        return ACT.name2sympy
+    if name == "agg_name2sympy":
+        return AGG.name2sympy
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_func_name(func):
+    name = func.__name__
+    if name.endswith("_"):
+        name = name[:-1]
+    return name
+
+
+def apply_activation(idx, z, act_funcs):
+    """
+    Apply the activation at position `idx` of `act_funcs`; idx == -1 means identity.
+    A tensor of per-element ids (broadcastable with `z`) is applied in one pass by `fused_activation`.
+    """
+    if isinstance(idx, torch.Tensor) and idx.ndim > 0:
+        return fused_activation(idx, z, act_funcs)
+    idx = int(idx)
+    if idx == -1:
+        return z
+    return act_funcs[idx](z)
+
+
+def apply_aggregation(idx, z, agg_funcs):
+    """
+    Apply the aggregation at position `idx` of `agg_funcs` along dim 0 of `z`.
+    """
+    return agg_funcs[int(idx)](z)
+
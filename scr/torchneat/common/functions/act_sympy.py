@@ -0,0 +1,81 @@
+import sympy as sp
+
+from .act_torch import SCALE
+
+
+class SympyRelu(sp.Function):
+    @classmethod
+    def eval(cls, z):
+        if z.is_Number:
+            return sp.Max(z, 0)
+
+
+class SympyLelu(sp.Function):
+    @classmethod
+    def eval(cls, z):
+        if z.is_Number:
+            return z if z > 0 else sp.Float(0.005) * z
+
+
+class SympyInv(sp.Function):
+    @classmethod
+    def eval(cls, z):
+        if z.is_Number:
+            # avoid division by zero
+            z = sp.Max(z, 1e-7) if z > 0 else sp.Min(z, -1e-7)
+            return 1 / z
+
+
+class SympyLog(sp.Function):
+    @classmethod
+    def eval(cls, z):
+        if z.is_Number:
+            return sp.log(sp.Max(z, 1e-7))
+
+
+def scaled_sigmoid_(z):
+    return SCALE / (1 + sp.exp(-z))
+
+
+def sigmoid_(z):
+    return 1 / (1 + sp.exp(-z))
+
+
+def scaled_tanh_(z):
+    return sp.tanh(z) * SCALE
+
+
+def tanh_(z):
+    return sp.tanh(z)
+
+
+def sin_(z):
+    return sp.sin(z)
+
+
+def relu_(z):
+    return SympyRelu(z)
+
+
+def lelu_(z):
+    return SympyLelu(z)
+
+
+def identity_(z):
+    return z
+
+
+def inv_(z):
+    return SympyInv(z)
+
+
+def log_(z):
+    return SympyLog(z)
+
+
+def exp_(z):
+    return sp.exp(z)
+
+
+def abs_(z):
+    return sp.Abs(z)
@@ -26,7 +26,7 @@ def sin_(z):
 
 
 def relu_(z):
-    return torch.maximum(z, torch.tensor(0.0))
+    return torch.clamp(z, min=0.0)
 
 
 def lelu_(z):
@@ -40,12 +40,12 @@ def identity_(z):
 
 def inv_(z):
     # avoid division by zero
-    z = torch.where(z > 0, torch.maximum(z, torch.tensor(1e-7)), torch.minimum(z, torch.tensor(-1e-7)))
+    z = torch.where(z > 0, torch.clamp(z, min=1e-7), torch.clamp(z, max=-1e-7))
     return 1 / z
 
 
 def log_(z):
-    z = torch.maximum(z, torch.tensor(1e-7))
+    z = torch.clamp(z, min=1e-7)
     return torch.log(z)
 
 
@@ -0,0 +1,63 @@
+import sympy as sp
+
+# Aggregations take the list of (symbolic) inputs of a node.
+# Nodes without inputs get the same value as the torch version on all-NaN inputs.
+
+
+class SympyMax(sp.Function):
+    @classmethod
+    def eval(cls, *z):
+        if all(i.is_Number for i in z):
+            return sp.Max(*z)
+
+
+class SympyMin(sp.Function):
+    @classmethod
+    def eval(cls, *z):
+        if all(i.is_Number for i in z):
+            return sp.Min(*z)
+
+
+class SympyMaxAbs(sp.Function):
+    @classmethod
+    def eval(cls, *z):
+        if all(i.is_Number for i in z):
+            return max(z, key=sp.Abs)
+
+
+def sum_(z):
+    return sp.Add(*z)
+
+
+def product_(z):
+    return sp.Mul(*z)
+
+
+def max_(z):
+    if len(z) == 0:
+        return -sp.oo
+    if len(z) == 1:
+        return z[0]
+    return SympyMax(*z)
+
+
+def min_(z):
+    if len(z) == 0:
+        return sp.oo
+    if len(z) == 1:
+        return z[0]
+    return SympyMin(*z)
+
+
+def maxabs_(z):
+    if len(z) == 0:
+        return sp.S.Zero
+    if len(z) == 1:
+        return z[0]
+    return SympyMaxAbs(*z)
+
+
+def mean_(z):
+    if len(z) == 0:
+        return sp.S.Zero
+    return sp.Add(*z) / len(z)
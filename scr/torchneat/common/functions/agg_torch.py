@@ -1,10 +1,14 @@
 import torch
 
+from ..deterministic import is_deterministic as _is_deterministic, ordered_reduce as _ordered_reduce
+
 def sum_(z, dim=0):
     """
     Compute the sum along a dimension, ignoring NaNs.
     """
     z = torch.where(torch.isnan(z), torch.tensor(0.0, device=z.device), z)
+    if _is_deterministic() and z.shape[dim] > 0:
+        return _ordered_reduce(torch.add, z, dim)
     return torch.sum(z, dim=dim)
 
 def product_(z, dim=0):
@@ -12,6 +16,8 @@ def product_(z, dim=0):
     Compute the product along a dimension, ignoring NaNs.
     """
     z = torch.where(torch.isnan(z), torch.tensor(1.0, device=z.device), z)
+    if _is_deterministic() and z.shape[dim] > 0:
+        return _ordered_reduce(torch.mul, z, dim)
     return torch.prod(z, dim=dim)
 
 def max_(z, dim=0):
@@ -41,6 +47,6 @@ def mean_(z, dim=0):
     """
     Compute the mean along a dimension, ignoring NaNs.
     """
-    z = torch.where(torch.isnan(z), torch.tensor(0.0, device=z.device), z)
+    # count before the NaNs are replaced; an all-NaN (or empty) input gives 0, like agg_sympy.mean_
     valid_count = torch.sum(~torch.isnan(z), dim=dim)
-    return torch.sum(z, dim=dim) / valid_count
\ No newline at end of file
+    return sum_(z, dim=dim) / valid_count.clamp(min=1)
@@ -0,0 +1,40 @@
+from typing import Callable, Sequence
+import torch
+
+
+def fused_activation(ids: torch.Tensor, z: torch.Tensor, act_funcs: Sequence[Callable]) -> torch.Tensor:
+    """
+    Apply a different activation to every element of `z` in one call.
+    `ids` holds positions in `act_funcs` (-1 means identity) and broadcasts with `z`,
+    e.g. (N,) per-node ids for (..., N) node values.
+    Every function is evaluated on the whole tensor and the results are selected by id, so there is
+    no host sync and no data-dependent indexing; the output stays on the device of `z`.
+    A function only sees the elements that select it, the others are replaced by 0, so an unselected
+    branch that overflows (e.g. exp of a large value) can not turn the output or its gradient into NaN.
+    """
+    ids = ids.to(device=z.device)
+    out = z
+    for i, func in enumerate(act_funcs):
+        selected = ids == i
+        out = torch.where(selected, func(torch.where(selected, z, 0.0)), out)
+    return out
+
+
+class FusedActivation:
+    """
+    `fused_activation` bound to a fixed list of activation functions, e.g. a node gene's
+    `activation_options`. With `compile=True` the selection is compiled by torch.compile
+    into a single kernel where the backend supports it.
+    """
+
+    def __init__(self, act_funcs: Sequence[Callable], compile: bool = False):
+        self.act_funcs = list(act_funcs)
+        self._apply = self._fused
+        if compile:
+            self._apply = torch.compile(self._fused, dynamic=True)
+
+    def _fused(self, ids, z):
+        return fused_activation(ids, z, self.act_funcs)
+
+    def __call__(self, ids: torch.Tensor, z: torch.Tensor) -> torch.Tensor:
+        return self._apply(ids, z)
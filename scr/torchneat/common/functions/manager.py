@@ -1,18 +1,24 @@
-from functools import partial
-import numpy as np
-import torch
-from typing import Union, Callable
-import sympy as sp
+from typing import Union, Callable, Dict
 
 
 class FunctionManager:
+    """
+    `name2sympy` can be a dict or a function returning the dict, called on first use
+    so that sympy is only imported when symbolic functions are needed.
+    """
 
-    def __init__(self, name2jnp, name2sympy):
+    def __init__(self, name2jnp, name2sympy: Union[Dict, Callable[[], Dict]]):
         self.name2jnp = name2jnp
-        self.name2sympy = name2sympy
+        self._name2sympy = name2sympy
         for name, func in name2jnp.items():
             setattr(self, name, func)
 
+    @property
+    def name2sympy(self):
+        if callable(self._name2sympy):
+            self._name2sympy = self._name2sympy()
+        return self._name2sympy
+
     def get_all_funcs(self):
         all_funcs = []
         for name in self.name2jnp:
@@ -28,7 +34,7 @@ class FunctionManager:
         self.name2jnp[name] = func
         setattr(self, name, func)
 
-    def update_sympy(self, name, sympy_cls: sp.Function):
+    def update_sympy(self, name, sympy_cls: "sympy.Function"):
         self.name2sympy[name] = sympy_cls
 
     def obtain_sympy(self, func: Union[str, Callable]):
@@ -41,7 +47,7 @@ class FunctionManager:
             # try to find name
             for name, f in self.name2jnp.items():
                 if f == func:
-                    return self._obtain_sympy_by_name(name)
+                    return self.obtain_sympy(name)
             raise ValueError(f"Func {func} doesn't not registered.")
 
         else:
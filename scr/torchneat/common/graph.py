@@ -67,4 +67,50 @@ def check_cycles(nodes: torch.Tensor, conns: torch.Tensor, from_idx: int, to_idx
         new_visited = torch.matmul(visited.float(), conns).bool()
         new_visited = torch.logical_or(visited, new_visited)
 
-    return new_visited[from_idx].item()
\ No newline at end of file
+    return new_visited[from_idx].item()
+
+def node_levels(seqs: torch.Tensor, conns: torch.Tensor) -> torch.Tensor:
+    """
+    Compute the depth of every node in a feedforward network.
+    Args:
+        seqs: Topological order of the node positions, as returned by topological_sort.
+        conns: Tensor of shape [N, N] representing the adjacency matrix of connections.
+    Returns:
+        A long tensor of shape [N]. Nodes without incoming connections are at level 0,
+        every other node is one level deeper than its deepest predecessor.
+        Nodes not in `seqs` get -1.
+    """
+    levels = torch.full((conns.shape[0],), -1, dtype=torch.long, device=conns.device)
+
+    for i in seqs.tolist():
+        if i == float('inf'):
+            break
+        i = int(i)
+        parents = conns[:, i]
+        deepest = torch.max(torch.where(parents, levels, -1))
+        levels[i] = torch.where(parents.any(), deepest + 1, 0)
+
+    return levels
+
+
+def reachable(conns: torch.Tensor, start: torch.Tensor) -> torch.Tensor:
+    """
+    Find the nodes reachable from the `start` nodes, expanding one step per iteration like check_cycles.
+    Works on a batch of graphs.
+    Args:
+        conns: Bool tensor of shape [..., N, N] representing the adjacency matrix of connections.
+        start: Bool tensor of shape [..., N] marking the start nodes.
+    Returns:
+        A bool tensor of shape [..., N], including the start nodes.
+    """
+    visited = start
+    adjacency = conns.float()
+
+    while True:
+        new_visited = torch.matmul(visited.float().unsqueeze(-2), adjacency).squeeze(-2).bool()
+        new_visited = torch.logical_or(visited, new_visited)
+        if torch.equal(visited, new_visited):
+            break
+        visited = new_visited
+
+    return visited
@@ -0,0 +1,261 @@
+import io
+import queue
+import struct
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from torchneat.common.tools import hash_array
+from torchneat.genome.utils import batch_valid_cnt
+
+# Every record in a generation log is an npz archive prefixed by its byte length.
+# Records are only ever appended, so a crashed run leaves a readable prefix.
+_LEN = struct.Struct("<Q")
+_STOP = object()
+_FLUSH = object()
+
+
+def _snapshot(tensor: torch.Tensor) -> torch.Tensor:
+    """
+    Take a host copy of a tensor, so later in-place updates of the population cannot leak into the log.
+    """
+    return tensor.detach().to("cpu", copy=True)
+
+
+class GenerationLogWriter:
+    """
+    Append-only, columnar log of per-generation population statistics.
+
+    `write` only snapshots the tensors; serialization and file IO happen on a background thread,
+    which batches `buffer_size` generations per write. For every generation the log stores the
+    fitness, valid node/conn counts and (optionally) species ids of all individuals. With
+    `save_genomes=True` the valid rows of every genome are stored as well, concatenated in
+    population order, so the counts double as offsets.
+
+    Every generation also gets a `fitness_checksum` (hash of the fitness bits). With a `genome`, the
+    `genome_hash` of every individual (`GenomeBase.batch_hash`) and their `population_hash` are stored,
+    so two runs can be checked for identical populations with `first_divergence`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        save_genomes: bool = False,
+        buffer_size: int = 8,
+        max_pending: int = 64,
+        compress: bool = False,
+        genome=None,
+    ):
+        self.path = path
+        self.genome = genome
+        self.save_genomes = save_genomes
+        self.buffer_size = buffer_size
+        self.compress = compress
+
+        self._file = open(path, "ab")
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(
+        self,
+        generation: int,
+        fitness: torch.Tensor,
+        pop_nodes: torch.Tensor,
+        pop_conns: torch.Tensor,
+        species: Optional[torch.Tensor] = None,
+        save_genomes: Optional[bool] = None,
+    ):
+        """
+        Queue the statistics of one generation. Blocks only when `max_pending` generations are waiting.
+        """
+        self._check()
+        if save_genomes is None:
+            save_genomes = self.save_genomes
+
+        record = {
+            "generation": np.asarray(generation, dtype=np.int64),
+            "fitness": _snapshot(fitness),
+            "node_cnt": _snapshot(batch_valid_cnt(pop_nodes)),
+            "conn_cnt": _snapshot(batch_valid_cnt(pop_conns)),
+        }
+        if species is not None:
+            record["species"] = _snapshot(species)
+        if self.genome is not None:
+            # hashed on the device of the population, only the (P,) hashes are copied
+            record["genome_hash"] = _snapshot(self.genome.batch_hash(pop_nodes, pop_conns))
+        if save_genomes:
+            # boolean indexing already copies, keep only the valid rows of each genome
+            record["nodes"] = pop_nodes[~torch.isnan(pop_nodes[..., 0])].detach().cpu()
+            record["conns"] = pop_conns[~torch.isnan(pop_conns[..., 0])].detach().cpu()
+
+        self._queue.put(record)
+
+    def flush(self):
+        """
+        Block until every queued generation is on disk.
+        """
+        self._check()
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        done.wait()
+        self._check()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._file.close()
+        if self._error is not None:
+            raise RuntimeError("Generation log writer failed") from self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _check(self):
+        if self._closed:
+            raise ValueError(f"Generation log {self.path} is already closed")
+        if self._error is not None:
+            raise RuntimeError("Generation log writer failed") from self._error
+
+    def _serialize(self, record) -> bytes:
+        record["fitness_checksum"] = np.asarray(hash_array(record["fitness"]), dtype=np.int64)
+        if "genome_hash" in record:
+            record["population_hash"] = np.asarray(hash_array(record["genome_hash"]), dtype=np.int64)
+        arrays = {
+            k: v.numpy() if isinstance(v, torch.Tensor) else v
+            for k, v in record.items()
+        }
+        buf = io.BytesIO()
+        if self.compress:
+            np.savez_compressed(buf, **arrays)
+        else:
+            np.savez(buf, **arrays)
+        blob = buf.getvalue()
+        return _LEN.pack(len(blob)) + blob
+
+    def _write_out(self, pending: List[bytes]):
+        if pending:
+            self._file.write(b"".join(pending))
+            self._file.flush()
+            pending.clear()
+
+    def _run(self):
+        pending = []
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                # always ends the thread, so close() can not hang on a failed last write
+                try:
+                    self._write_out(pending)
+                except Exception as e:
+                    self._error = e
+                return
+            try:
+                if isinstance(item, tuple) and item[0] is _FLUSH:
+                    self._write_out(pending)
+                    item[1].set()
+                    continue
+                if self._error is None:
+                    pending.append(self._serialize(item))
+                    if len(pending) >= self.buffer_size:
+                        self._write_out(pending)
+            except Exception as e:  # surfaced to the caller on the next write/flush/close
+                self._error = e
+                pending.clear()
+                if isinstance(item, tuple) and item[0] is _FLUSH:
+                    item[1].set()
+
+
+class GenerationLogReader:
+    """
+    Lazily stream the generations of a log written by `GenerationLogWriter`.
+    Only one generation is held in memory at a time; a truncated trailing record
+    (e.g. from a killed run) ends the stream.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __iter__(self) -> Iterator[Dict[str, np.ndarray]]:
+        with open(self.path, "rb") as f:
+            while True:
+                header = f.read(_LEN.size)
+                if len(header) < _LEN.size:
+                    return
+                (size,) = _LEN.unpack(header)
+                blob = f.read(size)
+                if len(blob) < size:
+                    return
+                with np.load(io.BytesIO(blob)) as data:
+                    yield {k: data[k] for k in data.files}
+
+    def column(self, name: str) -> Iterator[np.ndarray]:
+        """
+        Stream a single column, e.g. `reader.column("fitness")`.
+        """
+        for record in self:
+            yield record[name]
+
+    @staticmethod
+    def split_genomes(record: Dict[str, np.ndarray]) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Recover the (nodes, conns) of every individual from a record saved with genomes.
+        """
+        if "nodes" not in record:
+            raise ValueError("This generation was logged without genomes")
+        nodes = np.split(record["nodes"], np.cumsum(record["node_cnt"])[:-1])
+        conns = np.split(record["conns"], np.cumsum(record["conn_cnt"])[:-1])
+        return list(zip(nodes, conns))
+
+
+def _same(a: np.ndarray, b: np.ndarray) -> bool:
+    # bit-identical, NaN included
+    return a.dtype == b.dtype and a.shape == b.shape and a.tobytes() == b.tobytes()
+
+
+def first_divergence(path_a: str, path_b: str) -> Optional[Dict[str, object]]:
+    """
+    Compare two generation logs record by record. Returns None if they are identical, otherwise
+    {"generation": g, "fields": [...]} for the first generation where they differ (a field is
+    "missing" when one log ends before the other). The hash fields are compared first; the other
+    fields present in both logs are compared bit by bit.
+    """
+    reader_a, reader_b = iter(GenerationLogReader(path_a)), iter(GenerationLogReader(path_b))
+    while True:
+        a, b = next(reader_a, None), next(reader_b, None)
+        if a is None and b is None:
+            return None
+        if a is None or b is None:
+            return {"generation": int((a or b)["generation"]), "fields": ["missing"]}
+
+        fields = [k for k in ("population_hash", "fitness_checksum") if k in a and k in b]
+        fields += sorted(k for k in a.keys() & b.keys() if k not in fields)
+        diff = [k for k in fields if not _same(a[k], b[k])]
+        if diff:
+            return {"generation": int(a["generation"]), "fields": diff}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Report the first generation where two run logs diverge.")
+    parser.add_argument("log_a")
+    parser.add_argument("log_b")
+    args = parser.parse_args()
+
+    divergence = first_divergence(args.log_a, args.log_b)
+    if divergence is None:
+        print("The logs are identical.")
+    else:
+        print(f"First divergence at generation {divergence['generation']}: {', '.join(divergence['fields'])}")
+        raise SystemExit(1)
@@ -0,0 +1,117 @@
+from collections import OrderedDict
+from typing import Callable, Sequence
+
+import numpy as np
+import sympy as sp
+import torch
+
+from .functions import act_torch, agg_torch
+from .functions.act_sympy import SympyRelu, SympyLelu, SympyInv, SympyLog
+from .functions.agg_sympy import SympyMax, SympyMin, SympyMaxAbs
+
+
+def _stack_torch(z):
+    return torch.stack(torch.broadcast_tensors(*[torch.as_tensor(i) for i in z]))
+
+
+def _stack_np(z):
+    return np.stack(np.broadcast_arrays(*z))
+
+
+def _maxabs_np(*z):
+    z = _stack_np(z)
+    idx = np.argmax(np.abs(z), axis=0)
+    return np.take_along_axis(z, idx[None], axis=0)[0]
+
+
+# numerical versions of the custom sympy functions, and of the elementary ones for torch
+SYMPY_FUNCS_MODULE_TORCH = {
+    SympyRelu.__name__: act_torch.relu_,
+    SympyLelu.__name__: act_torch.lelu_,
+    SympyInv.__name__: act_torch.inv_,
+    SympyLog.__name__: act_torch.log_,
+    SympyMax.__name__: lambda *z: agg_torch.max_(_stack_torch(z)),
+    SympyMin.__name__: lambda *z: agg_torch.min_(_stack_torch(z)),
+    SympyMaxAbs.__name__: lambda *z: agg_torch.maxabs_(_stack_torch(z)),
+    "exp": torch.exp,
+    "log": torch.log,
+    "sin": torch.sin,
+    "cos": torch.cos,
+    "tanh": torch.tanh,
+    "sqrt": torch.sqrt,
+}
+
+SYMPY_FUNCS_MODULE_NP = {
+    SympyRelu.__name__: lambda z: np.maximum(z, 0.0),
+    SympyLelu.__name__: lambda z: np.where(z > 0, z, 0.005 * z),
+    SympyInv.__name__: lambda z: 1 / np.where(z > 0, np.maximum(z, 1e-7), np.minimum(z, -1e-7)),
+    SympyLog.__name__: lambda z: np.log(np.maximum(z, 1e-7)),
+    SympyMax.__name__: lambda *z: np.max(_stack_np(z), axis=0),
+    SympyMin.__name__: lambda *z: np.min(_stack_np(z), axis=0),
+    SympyMaxAbs.__name__: _maxabs_np,
+}
+
+
+def lambdify_exprs(
+    input_symbols: Sequence[sp.Symbol], exprs: Sequence[sp.Expr], backend="torch", cse: bool = False
+) -> Callable:
+    """
+    Compile output expressions into a function mapping inputs of shape (..., num_inputs)
+    to outputs of shape (..., num_outputs), with torch or numpy arrays.
+    With `cse`, common subexpressions are extracted and evaluated once.
+    """
+    if backend == "torch":
+        modules = [SYMPY_FUNCS_MODULE_TORCH, "math"]
+    elif backend == "numpy":
+        modules = [SYMPY_FUNCS_MODULE_NP, "numpy"]
+    else:
+        raise ValueError(f"Unsupported backend {backend}, need be 'torch' or 'numpy'.")
+
+    func = sp.lambdify(list(input_symbols), list(exprs), modules=modules, cse=cse)
+
+    def forward(inputs):
+        outputs = func(*[inputs[..., i] for i in range(inputs.shape[-1])])
+        batch_shape = inputs.shape[:-1]
+        # constant outputs come back as python numbers
+        if backend == "torch":
+            outputs = [
+                torch.as_tensor(o, dtype=inputs.dtype, device=inputs.device).expand(batch_shape)
+                for o in outputs
+            ]
+            return torch.stack(outputs, dim=-1)
+        outputs = [np.broadcast_to(np.asarray(o, dtype=inputs.dtype), batch_shape) for o in outputs]
+        return np.stack(outputs, axis=-1)
+
+    return forward
+
+
+class CompiledExprCache:
+    """
+    LRU cache for compiled symbolic networks, keyed by genome hash (and compile options).
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if key not in self._cache:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._cache.move_to_end(key)
+        return self._cache[key]
+
+    def put(self, key, value):
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def __len__(self):
+        return len(self._cache)
+
+    def clear(self):
+        self._cache.clear()
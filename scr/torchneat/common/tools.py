@@ -1,3 +1,4 @@
+import math
 import torch
 from functools import partial
 
@@ -19,7 +20,8 @@ def attach_with_inf(arr, idx):
     """
     target_dim = arr.ndim + idx.ndim - 1
     expand_idx = idx.view(idx.shape + (1,) * (target_dim - idx.ndim))
-    return torch.where(expand_idx == I_INF, float('nan'), arr[idx])
+    safe_idx = torch.where(idx == I_INF, 0, idx)
+    return torch.where(expand_idx == I_INF, float('nan'), arr[safe_idx])
 
 
 def fetch_first(mask, default=I_INF):
@@ -27,7 +29,7 @@ def fetch_first(mask, default=I_INF):
     Fetch the first True index in a boolean mask.
     If no True value exists, return the default value.
     """
-    idx = torch.argmax(mask).item()
+    idx = torch.argmax(mask.to(torch.int8)).item()
     return idx if mask[idx] else default
 
 
@@ -43,6 +45,26 @@ def fetch_random(randkey, mask, default=I_INF):
     return true_indices[random_idx].item()
 
 
+def batch_fetch_random(randkey, mask, default=I_INF):
+    """
+    Tensor version of `fetch_random` over the last dim of a (..., L) boolean mask.
+    Every row gets a uniformly random True index, or `default` if it has none.
+    Returns a long tensor of shape (...,), with a single draw for all rows.
+    """
+    scores = torch.rand(mask.shape, generator=randkey).to(mask.device)
+    scores = torch.where(mask, scores, -1.0)
+    idx = torch.argmax(scores, dim=-1)
+    return torch.where(mask.any(dim=-1), idx, default)
+
+
+def batch_fetch_first(mask, default=I_INF):
+    """
+    Tensor version of `fetch_first` over the last dim of a (..., L) boolean mask.
+    """
+    idx = torch.argmax(mask.to(torch.int8), dim=-1)
+    return torch.where(mask.any(dim=-1), idx, default)
+
+
 def rank_elements(array, reverse=False):
     """
     Rank the elements in the array.
@@ -53,45 +75,63 @@ def rank_elements(array, reverse=False):
     return torch.argsort(torch.argsort(array))
 
 
+def truncation_selection(randkey, fitness, num_offspring, survival_threshold, elitism=0):
+    """
+    Truncation selection over the last dim of `fitness` (..., P), batched over the leading dims.
+    NaN fitness counts as the worst.
+    Returns:
+    - survivors: (..., S) indices of the S best individuals, best first (the elites are the first ones)
+    - pairs: (..., num_offspring, 2) parent indices drawn uniformly from the survivors, fitter parent first
+    """
+    fitness = torch.nan_to_num(fitness, nan=-float('inf'))
+    P = fitness.shape[-1]
+    order = torch.argsort(fitness, dim=-1, descending=True, stable=True)
+    n_survive = min(P, max(elitism, 1, math.ceil(survival_threshold * P)))
+    survivors = order[..., :n_survive]
+
+    draw = torch.randint(0, n_survive, fitness.shape[:-1] + (num_offspring * 2,), generator=randkey)
+    pairs = torch.gather(survivors, -1, draw.to(fitness.device))
+    pair_fitness = torch.gather(fitness, -1, pairs)
+    pairs = pairs.view(fitness.shape[:-1] + (num_offspring, 2))
+    pair_fitness = pair_fitness.view(pairs.shape)
+
+    swap = pair_fitness[..., 0] < pair_fitness[..., 1]
+    pairs = torch.where(swap[..., None], pairs.flip(-1), pairs)
+    return survivors, pairs
+
+
 def mutate_float(randkey, val, init_mean, init_std, mutate_power, mutate_rate, replace_rate):
     """
-    Mutate a float value:
+    Mutate float values, elementwise over a tensor of any shape:
     - With probability `mutate_rate`, add noise.
     - With probability `replace_rate`, replace with a new random value.
     - Otherwise, keep the original value.
     """
-    k1, k2, k3 = torch.Generator(), torch.Generator(), torch.Generator()
-    k1.manual_seed(randkey.seed() + 1)
-    k2.manual_seed(randkey.seed() + 2)
-    k3.manual_seed(randkey.seed() + 3)
-
-    noise = torch.normal(0, mutate_power, generator=k1)
-    replace = torch.normal(init_mean, init_std, generator=k2)
-    r = torch.rand((), generator=k3)
+    val = torch.as_tensor(val)
+    noise = torch.randn(val.shape, generator=randkey).to(val.device) * mutate_power
+    replace = torch.randn(val.shape, generator=randkey).to(val.device) * init_std + init_mean
+    r = torch.rand(val.shape, generator=randkey).to(val.device)
 
-    if r < mutate_rate:
-        return val + noise
-    elif r < mutate_rate + replace_rate:
-        return replace
-    else:
-        return val
+    return torch.where(
+        r < mutate_rate,
+        val + noise,
+        torch.where(r < mutate_rate + replace_rate, replace.to(val.dtype), val),
+    )
 
 
 def mutate_int(randkey, val, options, replace_rate):
     """
-    Mutate an int value:
+    Mutate int values, elementwise over a tensor of any shape:
     - With probability `replace_rate`, replace with a new random value from `options`.
     - Otherwise, keep the original value.
     """
-    k1, k2 = torch.Generator(), torch.Generator()
-    k1.manual_seed(randkey.seed() + 1)
-    k2.manual_seed(randkey.seed() + 2)
+    val = torch.as_tensor(val)
+    options = torch.as_tensor(options)
+    r = torch.rand(val.shape, generator=randkey).to(val.device)
+    pick = torch.randint(0, len(options), val.shape, generator=randkey)
+    replace = options[pick].to(device=val.device, dtype=val.dtype)
 
-    r = torch.rand((), generator=k1)
-    if r < replace_rate:
-        return options[torch.randint(0, len(options), (1,), generator=k2).item()]
-    else:
-        return val
+    return torch.where(r < replace_rate, replace, val)
 
 
 def argmin_with_mask(arr, mask):
@@ -102,19 +142,61 @@ def argmin_with_mask(arr, mask):
     return torch.argmin(masked_arr).item()
 
 
-def hash_array(arr: torch.Tensor):
+_HASH_MULTIPLIER = 0x01000193  # odd, so its powers never vanish mod 2**32
+
+
+def _mul32(a: torch.Tensor, b: torch.Tensor) -> torch.Tensor:
     """
-    Hash an array of uint32 to a single uint.
+    a * b mod 2**32 for uint32 values held in int64 tensors, split in 16-bit halves so nothing overflows.
     """
-    arr = arr.to(dtype=torch.uint32)
+    low = a * (b & 0xFFFF)
+    high = ((a * (b >> 16)) & 0xFFFF) << 16
+    return (low + high) & 0xFFFFFFFF
+
 
-    def update(hash_val, i):
-        return hash_val ^ (
-            arr[i].item() + 0x9E3779B9 + (hash_val << 6) + (hash_val >> 2)
-        )
+def _fmix32(h: torch.Tensor) -> torch.Tensor:
+    """
+    The murmur3 finalizer: spreads every input bit over the whole uint32.
+    """
+    h = h ^ (h >> 16)
+    h = _mul32(h, torch.tensor(0x85EBCA6B, device=h.device))
+    h = h ^ (h >> 13)
+    h = _mul32(h, torch.tensor(0xC2B2AE35, device=h.device))
+    return h ^ (h >> 16)
 
-    hash_val = 0
-    for i in range(arr.numel()):
-        hash_val = update(hash_val, i)
 
-    return hash_val
\ No newline at end of file
+def batch_hash_array(arr: torch.Tensor) -> torch.Tensor:
+    """
+    Hash the last dim of an array to uint32 values (in an int64 tensor of the leading shape),
+    with the same combination as `hash_array`, vectorized over all dims.
+    The L values of a row are mixed and combined as sum(v_i * M**(L-1-i)) mod 2**32, which depends on their
+    order; the powers of M are built by doubling, in log2(L) steps.
+    Float arrays are hashed by their bit pattern (float64 as two 32-bit words), with a single NaN pattern.
+    """
+    if arr.is_floating_point():
+        if arr.dtype != torch.float64:
+            arr = arr.to(torch.float32)
+        arr = torch.where(torch.isnan(arr), torch.tensor(float("nan"), dtype=arr.dtype, device=arr.device), arr)
+        arr = arr.contiguous().view(torch.int32)
+    values = _fmix32((arr.to(torch.int64) + 0x9E3779B9) & 0xFFFFFFFF)
+
+    L = values.shape[-1]
+    powers = torch.ones(1, dtype=torch.int64, device=values.device)
+    step = torch.tensor(_HASH_MULTIPLIER, device=values.device)
+    while powers.shape[0] < L:
+        # [1, M, ..., M**(n-1)] -> [1, ..., M**(2n-1)]
+        powers = torch.cat([powers, _mul32(powers, step)])
+        step = _mul32(step, step)
+    powers = powers[:L].flip(0)
+
+    # every term is below 2**32, so the sum fits in int64 for any row shorter than 2**31
+    hash_val = (_mul32(values, powers).sum(dim=-1) + L) & 0xFFFFFFFF
+    return _fmix32(hash_val)
+
+
+def hash_array(arr: torch.Tensor):
+    """
+    Hash an array of 32-bit values to a single uint32 (returned as a python int).
+    Float arrays are hashed by their bit pattern.
+    """
+    return int(batch_hash_array(arr.reshape(-1)))
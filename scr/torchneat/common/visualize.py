@@ -0,0 +1,274 @@
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import torch
+
+from .functions import get_func_name
+
+# The drawing functions run in worker processes: they only take plain python data (the `network_dict`
+# format) and import matplotlib themselves, with a figure that is never attached to a display.
+
+
+def _levels(node_keys, edges, input_keys, output_keys) -> Dict[int, int]:
+    """longest path from the inputs, bounded for recurrent networks; outputs share the last level"""
+    level = {k: 0 for k in node_keys}
+    for _ in range(len(node_keys)):
+        changed = False
+        for i, o in edges:
+            if o in input_keys or i not in level or o not in level:
+                continue
+            if level[o] < level[i] + 1:
+                level[o] = level[i] + 1
+                changed = True
+        if not changed:
+            break
+    hidden = [level[k] for k in node_keys if k not in input_keys and k not in output_keys]
+    last = max(hidden, default=0) + 1
+    for k in output_keys:
+        if k in level:
+            level[k] = last
+    return level
+
+
+def draw_network(
+    network: dict,
+    paths: Sequence[str],
+    input_keys: Sequence[int],
+    output_keys: Sequence[int],
+    title: str = None,
+):
+    """
+    Draw a network in the `network_dict` format, {"nodes": {key: attrs}, "conns": {(in, out): attrs}},
+    as a layered graph and save it to every path (the format follows the extension, e.g. .svg or .png).
+    Connections are blue for positive and red for negative weights, wider for larger |weight|.
+    """
+    from matplotlib.figure import Figure
+
+    input_keys, output_keys = set(input_keys), set(output_keys)
+    node_keys = list(network["nodes"])
+    edges = list(network["conns"])
+    level = _levels(node_keys, edges, input_keys, output_keys)
+
+    by_level = {}
+    for k in sorted(node_keys):
+        by_level.setdefault(level[k], []).append(k)
+    pos = {}
+    for x, keys in by_level.items():
+        for j, k in enumerate(keys):
+            pos[k] = (x, (j + 1) / (len(keys) + 1))
+
+    width = max(len(by_level), 2)
+    height = max((len(keys) for keys in by_level.values()), default=1)
+    fig = Figure(figsize=(1.6 * width + 1, 0.6 * height + 1.5))
+    ax = fig.add_subplot()
+
+    for (i, o), attrs in network["conns"].items():
+        if i not in pos or o not in pos:
+            continue
+        weight = attrs.get("weight", 1.0)
+        ax.annotate(
+            "",
+            xy=pos[o],
+            xytext=pos[i],
+            arrowprops=dict(
+                arrowstyle="->",
+                color="tab:blue" if weight >= 0 else "tab:red",
+                lw=0.5 + min(abs(weight), 5.0) / 2,
+                alpha=0.7,
+                connectionstyle="arc3,rad=0.3" if level[o] <= level[i] else "arc3",
+            ),
+        )
+
+    for k, (x, y) in pos.items():
+        color = "lightgray" if k in input_keys else ("lightgreen" if k in output_keys else "lightyellow")
+        ax.scatter([x], [y], s=500, c=color, edgecolors="black", zorder=3)
+        act = network["nodes"][k].get("act")
+        label = str(k) if act is None or k in input_keys else f"{k}\n{act}"
+        ax.text(x, y, label, ha="center", va="center", fontsize=7, zorder=4)
+
+    if title is not None:
+        ax.set_title(title)
+    ax.set_xlim(-0.5, max(by_level, default=0) + 0.5)
+    ax.set_ylim(0, 1)
+    ax.axis("off")
+    for path in paths:
+        fig.savefig(path, bbox_inches="tight")
+
+
+def plot_history(history: Dict[str, Sequence[float]], paths: Sequence[str], title: str = None):
+    """
+    Plot per-generation summary curves, e.g. {"best": [...], "mean": [...], "num_species": [...]},
+    one line per entry, and save the figure to every path.
+    """
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(7, 4))
+    ax = fig.add_subplot()
+    for name, values in history.items():
+        ax.plot(range(len(values)), values, label=name)
+    ax.set_xlabel("generation")
+    ax.legend()
+    if title is not None:
+        ax.set_title(title)
+    for path in paths:
+        fig.savefig(path, bbox_inches="tight")
+
+
+def split_export(exported: dict, act_names: Sequence[str] = None) -> Dict[int, dict]:
+    """
+    Turn the columns of `GenomeBase.export_population` into one `network_dict`-like dict per exported
+    genome, keyed by the "genome" column. With `act_names`, the activation option indices are named.
+    """
+    networks = {}
+    node_cols = {name: col.tolist() for name, col in exported["nodes"].items()}
+    for r, g in enumerate(node_cols["genome"]):
+        attrs = {name: col[r] for name, col in node_cols.items() if name not in ("genome", "index")}
+        if act_names is not None and "activation" in attrs:
+            act = int(attrs["activation"])
+            attrs["act"] = "identity" if act == -1 else act_names[act]
+        networks.setdefault(g, {"nodes": {}, "conns": {}})["nodes"][int(node_cols["index"][r])] = attrs
+    conn_cols = {name: col.tolist() for name, col in exported["conns"].items()}
+    for r, g in enumerate(conn_cols["genome"]):
+        key = (int(conn_cols["input_index"][r]), int(conn_cols["output_index"][r]))
+        attrs = {
+            name: col[r] for name, col in conn_cols.items() if name not in ("genome", "input_index", "output_index")
+        }
+        networks.setdefault(g, {"nodes": {}, "conns": {}})["conns"][key] = attrs
+    return networks
+
+
+class BackgroundRenderer:
+    """
+    Render networks and summary plots to files in `out_dir` on a pool of worker processes.
+
+    Submissions return immediately: when `max_pending` renders are already queued the new one is
+    dropped (counted in `stats["dropped"]`) rather than waiting, so the evolution loop never blocks.
+    Genome renders are named and cached by `genome.hash`, an unchanged champion is not drawn again.
+    Errors of the workers are raised on the next call.
+    """
+
+    def __init__(
+        self,
+        out_dir: str,
+        formats: Sequence[str] = ("svg",),
+        max_workers: int = 1,
+        max_pending: int = 8,
+        cache_size: int = 1024,
+    ):
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self.formats = tuple(formats)
+        self.max_pending = max_pending
+        self.cache_size = cache_size
+        self.stats = {"rendered": 0, "cache_hits": 0, "dropped": 0}
+
+        # spawn: forked workers would inherit the CUDA context and the threads of the parent
+        self._pool = ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context("spawn"))
+        self._pending = {}
+        self._cache = OrderedDict()
+        self._error = None
+
+    def _paths(self, name: str) -> List[str]:
+        return [os.path.join(self.out_dir, f"{name}.{fmt}") for fmt in self.formats]
+
+    def _reap(self):
+        for future in [f for f in self._pending if f.done()]:
+            key = self._pending.pop(future)
+            if future.exception() is not None:
+                self._cache.pop(key, None)
+                self._error = future.exception()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("Background rendering failed") from error
+
+    def _submit(self, key, fn, *args) -> bool:
+        self._reap()
+        if len(self._pending) >= self.max_pending:
+            self.stats["dropped"] += 1
+            return False
+        self._pending[self._pool.submit(fn, *args)] = key
+        return True
+
+    def cached(self, key: int) -> Optional[List[str]]:
+        paths = self._cache.get(key)
+        if paths is not None:
+            self._cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+        return paths
+
+    def render(self, network: dict, key: int, input_keys, output_keys, title: str = None) -> Optional[List[str]]:
+        """
+        Render a network in the `network_dict` format under the name of its hash `key`.
+        Returns the paths the files are (or will be) written to, None if the render was dropped.
+        """
+        paths = self.cached(key)
+        if paths is not None:
+            return paths
+        paths = self._paths(f"genome_{key:08x}")
+        if not self._submit(key, draw_network, network, paths, list(input_keys), list(output_keys), title):
+            return None
+        self._cache[key] = paths
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        self.stats["rendered"] += 1
+        return paths
+
+    def render_genome(self, genome, state, nodes, conns, title: str = None) -> Optional[List[str]]:
+        key = genome.hash(nodes, conns)
+        paths = self.cached(key)
+        if paths is not None:
+            return paths
+        network = genome.network_dict(state, nodes, conns)
+        return self.render(network, key, genome.get_input_idx(), genome.get_output_idx(), title)
+
+    def render_top(self, genome, state, pop_nodes, pop_conns, fitness, k: int = 1) -> List[Optional[List[str]]]:
+        """
+        Render the k fittest genomes of a population, exported in bulk with `export_population`.
+        Returns the paths of every rendered genome, best first.
+        """
+        fitness = torch.nan_to_num(fitness, nan=-float("inf"))
+        top = torch.topk(fitness, min(k, fitness.shape[0])).indices.tolist()
+        keys = [genome.hash(pop_nodes[i], pop_conns[i]) for i in top]
+        missing = [i for i, key in zip(top, keys) if key not in self._cache]
+
+        networks = {}
+        if missing:
+            exported = genome.export_population(state, pop_nodes, pop_conns, indices=missing)
+            act_names = [get_func_name(f) for f in getattr(genome.node_gene, "activation_options", [])]
+            networks = split_export(exported, act_names or None)
+        inputs, outputs = genome.get_input_idx(), genome.get_output_idx()
+        paths = []
+        for i, key in zip(top, keys):
+            network = networks.pop(i, None)
+            if network is None:
+                paths.append(self.cached(key))
+            else:
+                paths.append(self.render(network, key, inputs, outputs, f"fitness {float(fitness[i]):.4g}"))
+        return paths
+
+    def plot_summary(self, history: Dict[str, Sequence[float]], name: str = "summary", title: str = None):
+        """Plot the summary curves (overwritten at every call); returns the paths, None if dropped"""
+        history = {k: [float(v) for v in values] for k, values in history.items()}
+        paths = self._paths(name)
+        return paths if self._submit(None, plot_history, history, paths, title) else None
+
+    def wait(self):
+        """Block until every queued render is written"""
+        for future in list(self._pending):
+            future.exception()
+        self._reap()
+
+    def close(self):
+        try:
+            self.wait()
+        finally:
+            self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,70 @@
+from typing import Sequence
+import torch
+from torch import Tensor
+
+
+class Workspace:
+    """
+    Named scratch buffers reused across calls instead of allocating new tensors every generation.
+
+    `get` returns a view of a grow-only flat storage for the name: it is only reallocated when a request
+    needs more elements, another dtype or another device, so size buckets of different shapes share it.
+    The content is not initialized; use `full`/`rand` or write with out=/copy_. A buffer is only valid
+    until the next request for the same name.
+    """
+
+    def __init__(self, device=None):
+        self.device = device
+        self.buffers = {}
+        self.allocations = 0
+
+    def get(self, name: str, shape: Sequence[int], dtype: torch.dtype = torch.float32, device=None) -> Tensor:
+        device = torch.device(device if device is not None else (self.device or "cpu"))
+        shape = tuple(shape)
+        numel = 1
+        for size in shape:
+            numel *= size
+
+        storage = self.buffers.get(name)
+        if storage is None or storage.numel() < numel or storage.dtype != dtype or storage.device != device:
+            storage = torch.empty(numel, dtype=dtype, device=device)
+            self.buffers[name] = storage
+            self.allocations += 1
+        return storage[:numel].view(shape)
+
+    def full(self, name: str, shape: Sequence[int], value, dtype: torch.dtype = torch.float32, device=None) -> Tensor:
+        return self.get(name, shape, dtype, device).fill_(value)
+
+    def rand(self, name: str, shape: Sequence[int], generator: torch.Generator = None) -> Tensor:
+        """uniform draws written into a reused buffer, on the device of the generator (CPU)"""
+        return torch.rand(tuple(shape), generator=generator, out=self.get(name, shape, torch.float32, "cpu"))
+
+    def clear(self):
+        self.buffers.clear()
+
+
+class PingPong:
+    """
+    Two population buffers, swapped every generation: offspring are written in place into the child buffer
+    while the parents are read from the other one.
+    Tensors returned for the parents are overwritten two generations later; clone what must be kept longer.
+    """
+
+    def __init__(self, pop_nodes: Tensor, pop_conns: Tensor):
+        self.reset(pop_nodes, pop_conns)
+
+    def reset(self, pop_nodes: Tensor, pop_conns: Tensor):
+        """use new parent tensors, e.g. after the capacity changed"""
+        self.parent = (pop_nodes, pop_conns)
+        self.child = (torch.empty_like(pop_nodes), torch.empty_like(pop_conns))
+
+    def swap(self):
+        self.parent, self.child = self.child, self.parent
+
+    @property
+    def nodes(self) -> Tensor:
+        return self.parent[0]
+
+    @property
+    def conns(self) -> Tensor:
+        return self.parent[1]
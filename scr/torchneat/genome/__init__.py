@@ -1 +1,5 @@
-from .utils import *
\ No newline at end of file
+from .utils import *
+from .base import GenomeBase
+from .default import DefaultGenome
+from .precision import PrecisionPolicy
+from .cache import TopologyCache
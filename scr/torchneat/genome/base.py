@@ -1,5 +1,12 @@
+from typing import Callable, Sequence
+import numpy as np
 import torch
 
+from torchneat.common import batch_hash_array, hash_array, split_generator
+from .gene import BaseNode, BaseConn
+from .utils import valid_cnt, re_cound_idx, batch_re_cound_idx
+
+
 class GenomeBase:
     network_type = None
 
@@ -11,9 +18,9 @@ class GenomeBase:
         max_conns: int,
         node_gene: BaseNode,
         conn_gene: BaseConn,
-        mutation: BaseMutation,
-        crossover: BaseCrossover,
-        distance: BaseDistance,
+        mutation: Callable,
+        crossover: Callable,
+        distance: Callable,
         output_transform: Callable = None,
         input_transform: Callable = None,
         init_hidden_layers: Sequence[int] = (),
@@ -22,13 +29,13 @@ class GenomeBase:
         # check transform functions
         if input_transform is not None:
             try:
-                _ = input_transform(jnp.zeros(num_inputs))
+                _ = input_transform(torch.zeros(num_inputs))
             except Exception as e:
                 raise ValueError(f"Input transform function failed: {e}")
 
         if output_transform is not None:
             try:
-                _ = output_transform(jnp.zeros(num_outputs))
+                _ = output_transform(torch.zeros(num_outputs))
             except Exception as e:
                 raise ValueError(f"Output transform function failed: {e}")
 
@@ -75,8 +82,8 @@ class GenomeBase:
         self.output_transform = output_transform
         self.input_transform = input_transform
 
-        self.input_idx = np.array(layer_indices[0])
-        self.output_idx = np.array(layer_indices[-1])
+        self.input_idx = torch.tensor(layer_indices[0])
+        self.output_idx = torch.tensor(layer_indices[-1])
         self.all_init_nodes = np.array(all_init_nodes)
         self.all_init_conns = np.c_[all_init_conns_in_idx, all_init_conns_out_idx]
 
@@ -86,11 +93,18 @@ class GenomeBase:
     def forward(self, state, transformed, inputs):
         raise NotImplementedError
 
-    def sympy_func(self):
+    def sympy_func(self, state, nodes, conns):
         raise NotImplementedError
 
-    def visualize(self):
-        raise NotImplementedError
+    def visualize(self, state, nodes, conns, path, title=None):
+        """
+        Draw the network to `path` (.svg, .png, ...) in this process, without a display.
+        Use `BackgroundRenderer.render_genome` to render without blocking.
+        """
+        from torchneat.common.visualize import draw_network
+
+        network = self.network_dict(state, nodes, conns)
+        draw_network(network, [path], self.get_input_idx(), self.get_output_idx(), title)
 
     def execute_mutation(
         self, state, randkey, nodes, conns, new_node_key, new_conn_keys
@@ -106,31 +120,39 @@ class GenomeBase:
         return self.distance(state, self, nodes1, conns1, nodes2, conns2)
 
     def initialize(self, state, randkey):
-        torch.manual_seed(randkey)  # Set random seed
+        nodes, conns = self.initialize_population(state, randkey, 1)
+        return nodes[0], conns[0]
+
+    def initialize_population(self, state, randkey, pop_size, device=None):
+        """
+        The initial nodes (P, N, NL) and conns (P, C, CL) of pop_size genomes, with the attrs of all
+        genes drawn as whole tensors on CPU and written to `device`. `randkey` is a torch.Generator or
+        an int seed; the global RNG is left untouched.
+        """
+        if not isinstance(randkey, torch.Generator):
+            randkey = torch.Generator().manual_seed(int(randkey))
+        k1, k2 = split_generator(randkey, 2)
 
         all_nodes_cnt = len(self.all_init_nodes)
         all_conns_cnt = len(self.all_init_conns)
 
         # Initialize nodes
-        nodes = torch.full((self.max_nodes, self.node_gene.length), float('nan'))
-        node_indices = torch.tensor(self.all_init_nodes)
-        rand_keys_n = [torch.randint(0, 2**32, (1,)) for _ in range(all_nodes_cnt)]
-        node_attrs = torch.stack([self.node_gene.new_random_attrs(state, key) for key in rand_keys_n])
-
-        nodes[:all_nodes_cnt, 0] = node_indices
-        nodes[:all_nodes_cnt, 1:] = node_attrs
+        nodes = torch.full((pop_size, self.max_nodes, self.node_gene.length), float("nan"), device=device)
+        node_fixed = len(self.node_gene.fixed_attrs)
+        nodes[:, :all_nodes_cnt, 0] = torch.as_tensor(self.all_init_nodes, dtype=torch.float32)
+        nodes[:, :all_nodes_cnt, node_fixed:] = self.node_gene.new_random_attrs(
+            state, k1, (pop_size, all_nodes_cnt)
+        )
 
         # Initialize connections
-        conns = torch.full((self.max_conns, self.conn_gene.length), float('nan'))
-        conn_indices = torch.tensor(self.all_init_conns)
-        conn_markers = torch.arange(all_conns_cnt)
-        rand_keys_c = [torch.randint(0, 2**32, (1,)) for _ in range(all_conns_cnt)]
-        conns_attrs = torch.stack([self.conn_gene.new_random_attrs(state, key) for key in rand_keys_c])
-
-        conns[:all_conns_cnt, :2] = conn_indices
+        conns = torch.full((pop_size, self.max_conns, self.conn_gene.length), float("nan"), device=device)
+        conn_fixed = len(self.conn_gene.fixed_attrs)
+        conns[:, :all_conns_cnt, :2] = torch.as_tensor(self.all_init_conns, dtype=torch.float32)
         if "historical_marker" in self.conn_gene.fixed_attrs:
-            conns[:all_conns_cnt, 2] = conn_markers
-        conns[:all_conns_cnt, len(self.conn_gene.fixed_attrs):] = conns_attrs
+            conns[:, :all_conns_cnt, 2] = torch.arange(all_conns_cnt, dtype=torch.float32)
+        conns[:, :all_conns_cnt, conn_fixed:] = self.conn_gene.new_random_attrs(
+            state, k2, (pop_size, all_conns_cnt)
+        )
 
         return nodes, conns
 
@@ -144,6 +166,42 @@ class GenomeBase:
             "conns": self._get_conn_dict(state, conns),
         }
 
+    def export_population(
+        self, state, pop_nodes, pop_conns, indices=None, whether_re_cound_idx=True
+    ):
+        """
+        Bulk, columnar version of `network_dict` for a whole population (or the individuals in `indices`,
+        e.g. the top-k). Returns {"nodes": {column: tensor}, "conns": {column: tensor}} where each column
+        holds the valid genes of all exported genomes and the "genome" column says which genome a row belongs to.
+        Column names are the gene attrs; function attrs (aggregation/activation) stay as option indices.
+        """
+        if indices is not None:
+            pop_nodes, pop_conns = pop_nodes[indices], pop_conns[indices]
+        if whether_re_cound_idx:
+            pop_nodes, pop_conns = batch_re_cound_idx(
+                pop_nodes, pop_conns, self.get_input_idx(), self.get_output_idx()
+            )
+        exported = {
+            "nodes": self._gene_columns(self.node_gene, pop_nodes),
+            "conns": self._gene_columns(self.conn_gene, pop_conns),
+        }
+        if indices is not None:
+            # report the position in the original population
+            indices = torch.as_tensor(indices, device=pop_nodes.device)
+            for columns in exported.values():
+                columns["genome"] = indices[columns["genome"]]
+        return exported
+
+    @staticmethod
+    def _gene_columns(gene, pop_genes):
+        valid = ~torch.isnan(pop_genes[..., 0])
+        genome_ids = torch.arange(pop_genes.shape[0], device=pop_genes.device)
+        columns = {"genome": genome_ids[:, None].expand_as(valid)[valid]}
+        rows = pop_genes[valid]
+        for i, name in enumerate(gene.fixed_attrs + gene.custom_attrs):
+            columns[name] = rows[:, i]
+        return columns
+
     def get_input_idx(self):
         return self.input_idx.tolist()
 
@@ -151,9 +209,19 @@ class GenomeBase:
         return self.output_idx.tolist()
 
     def hash(self, nodes, conns):
-        nodes_hashs = vmap(hash_array)(nodes)
-        conns_hashs = vmap(hash_array)(conns)
-        return hash_array(jnp.concatenate([nodes_hashs, conns_hashs]))
+        return int(self.batch_hash(nodes.unsqueeze(0), conns.unsqueeze(0))[0])
+
+    def batch_hash(self, pop_nodes, pop_conns):
+        """
+        (P,) `hash` of every genome of a population, computed on the device of the population:
+        the hash of the hashes of its node and conn rows.
+        """
+        row_hashs = torch.cat([batch_hash_array(pop_nodes), batch_hash_array(pop_conns)], dim=-1)
+        return batch_hash_array(row_hashs)
+
+    def population_hash(self, pop_nodes, pop_conns):
+        """One hash of a whole population, sensitive to the order of the genomes."""
+        return hash_array(self.batch_hash(pop_nodes, pop_conns))
 
     def repr(self, state, nodes, conns, precision=2):
         nodes, conns = jax.device_get([nodes, conns])
@@ -179,22 +247,18 @@ class GenomeBase:
         return s
 
     def _get_conn_dict(self, state, conns):
-        conns = jax.device_get(conns)
+        conns = conns.cpu()
         conn_dict = {}
-        for conn in conns:
-            if np.isnan(conn[0]):
-                continue
+        for conn in conns[~torch.isnan(conns[:, 0])]:
             cd = self.conn_gene.to_dict(state, conn)
             in_idx, out_idx = cd["in"], cd["out"]
             conn_dict[(in_idx, out_idx)] = cd
         return conn_dict
 
     def _get_node_dict(self, state, nodes):
-        nodes = jax.device_get(nodes)
+        nodes = nodes.cpu()
         node_dict = {}
-        for node in nodes:
-            if np.isnan(node[0]):
-                continue
+        for node in nodes[~torch.isnan(nodes[:, 0])]:
             nd = self.node_gene.to_dict(state, node)
             idx = nd["idx"]
             node_dict[idx] = nd
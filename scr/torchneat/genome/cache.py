@@ -0,0 +1,61 @@
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+import torch
+from torch import Tensor
+
+
+class TopologyCache:
+    """
+    Bounded LRU cache for the structural results of `transform`, keyed on the topology of a genome only:
+    the node keys and (in, out) pairs of every slot, ignoring the attrs. Offspring that only differ from
+    their parent in weights or biases reuse the topological order and connection index of the parent,
+    across individuals and generations.
+
+    Keys are the raw bytes of the structural columns, so two genomes only share an entry when their
+    topology is identical slot by slot (the connection index refers to slots). Cached tensors are shared
+    and must not be modified in place.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(nodes: Tensor, conns: Tensor, extra: Optional[Tensor] = None) -> Hashable:
+        parts = [nodes[:, 0], conns[:, :2].flatten()]
+        if extra is not None:
+            parts.append(extra.to(torch.float32).flatten())
+        structure = torch.cat([p.to(torch.float32) for p in parts])
+        # one canonical NaN, so empty slots compare equal whatever produced them
+        structure = torch.nan_to_num(structure, nan=float("inf"), posinf=float("inf"))
+        return (nodes.shape[0], conns.shape[0], structure.cpu().numpy().tobytes())
+
+    def get(self, key: Hashable) -> Optional[Tuple]:
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Tuple):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
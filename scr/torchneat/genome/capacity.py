@@ -0,0 +1,181 @@
+from typing import Callable, List, Tuple
+import torch
+from torch import Tensor
+
+
+def round_up(n: int, step: int) -> int:
+    """
+    Round n up to a multiple of step (at least one step), so capacities only take a few distinct values.
+    """
+    return max(step, -(-n // step) * step)
+
+
+def batch_compact(pop_genes: Tensor, fixed_rows: int = 0) -> Tensor:
+    """
+    Move the valid rows of every genome to the front, keeping their order.
+    The first `fixed_rows` rows are left in place, they hold the input/output nodes,
+    whose positions must equal their keys.
+    """
+    head, tail = pop_genes[:, :fixed_rows], pop_genes[:, fixed_rows:]
+    order = torch.argsort(torch.isnan(tail[..., 0]).to(torch.int8), dim=1, stable=True)
+    tail = torch.gather(tail, 1, order[..., None].expand_as(tail))
+    return torch.cat([head, tail], dim=1)
+
+
+def resize(pop_genes: Tensor, capacity: int, fixed_rows: int = 0) -> Tensor:
+    """
+    Pad (with NaN) or shrink the padded dim of a (P, N, L) population tensor to `capacity` rows.
+    Shrinking compacts first and fails if any genome would lose a valid row.
+    """
+    P, N, L = pop_genes.shape
+    if capacity >= N:
+        pad = torch.full((P, capacity - N, L), float("nan"), dtype=pop_genes.dtype, device=pop_genes.device)
+        return torch.cat([pop_genes, pad], dim=1)
+
+    pop_genes = batch_compact(pop_genes, fixed_rows)
+    if not torch.isnan(pop_genes[:, capacity:, 0]).all():
+        raise ValueError(f"Can not shrink to capacity={capacity}, some genomes have more valid genes.")
+    return pop_genes[:, :capacity]
+
+
+def used_rows(pop_genes: Tensor) -> Tensor:
+    """
+    Number of rows each genome needs without compaction: last valid row + 1, shape (P,).
+    """
+    valid = ~torch.isnan(pop_genes[..., 0])
+    rows = torch.arange(1, pop_genes.shape[1] + 1, device=pop_genes.device)
+    return torch.max(torch.where(valid, rows, 0), dim=1).values
+
+
+class AdaptiveCapacity:
+    """
+    Grow and shrink the padded size (max_nodes, max_conns) of a population as its genomes grow and shrink.
+
+    Call `reserve` before structural mutation: it makes sure every genome has room for
+    `node_headroom` more nodes and `conn_headroom` more connections, growing the population
+    tensors in `node_step`/`conn_step` increments when needed. Call `shrink` from time to time:
+    when usage falls below `shrink_ratio` of the capacity, the tensors are compacted and trimmed.
+    The genome's max_nodes/max_conns follow the population, so later initialization and mutation
+    use the current capacity.
+    """
+
+    def __init__(
+        self,
+        genome,
+        node_step: int = 8,
+        conn_step: int = 16,
+        node_headroom: int = 1,
+        conn_headroom: int = 3,
+        shrink_ratio: float = 0.5,
+        max_nodes_limit: int = None,
+        max_conns_limit: int = None,
+    ):
+        self.genome = genome
+        self.node_step = node_step
+        self.conn_step = conn_step
+        self.node_headroom = node_headroom
+        self.conn_headroom = conn_headroom
+        self.shrink_ratio = shrink_ratio
+        self.max_nodes_limit = max_nodes_limit
+        self.max_conns_limit = max_conns_limit
+
+        # inputs and outputs are never moved, their positions equal their keys
+        self.fixed_rows = max(genome.get_input_idx() + genome.get_output_idx()) + 1
+        self.min_nodes = round_up(len(genome.all_init_nodes) + node_headroom, node_step)
+        self.min_conns = round_up(len(genome.all_init_conns) + conn_headroom, conn_step)
+
+    def reserve(self, pop_nodes: Tensor, pop_conns: Tensor) -> Tuple[Tensor, Tensor]:
+        """
+        Grow the population so that every genome has free rows for the next structural mutation.
+        """
+        node_need = round_up(int(used_rows(pop_nodes).max()) + self.node_headroom, self.node_step)
+        conn_need = round_up(int(used_rows(pop_conns).max()) + self.conn_headroom, self.conn_step)
+        if self.max_nodes_limit is not None:
+            node_need = min(node_need, self.max_nodes_limit)
+        if self.max_conns_limit is not None:
+            conn_need = min(conn_need, self.max_conns_limit)
+
+        if node_need > pop_nodes.shape[1]:
+            pop_nodes = resize(pop_nodes, node_need, self.fixed_rows)
+        if conn_need > pop_conns.shape[1]:
+            pop_conns = resize(pop_conns, conn_need)
+        self._sync(pop_nodes, pop_conns)
+        return pop_nodes, pop_conns
+
+    def shrink(self, pop_nodes: Tensor, pop_conns: Tensor) -> Tuple[Tensor, Tensor]:
+        """
+        Compact and trim the population when its largest genome uses less than shrink_ratio of the capacity.
+        """
+        compact_nodes = batch_compact(pop_nodes, self.fixed_rows)
+        compact_conns = batch_compact(pop_conns)
+        node_rows = int(used_rows(compact_nodes).max())
+        conn_rows = int(used_rows(compact_conns).max())
+
+        if node_rows < self.shrink_ratio * pop_nodes.shape[1]:
+            target = max(round_up(node_rows + self.node_headroom, self.node_step), self.min_nodes)
+            pop_nodes = resize(compact_nodes, min(target, pop_nodes.shape[1]), self.fixed_rows)
+        if conn_rows < self.shrink_ratio * pop_conns.shape[1]:
+            target = max(round_up(conn_rows + self.conn_headroom, self.conn_step), self.min_conns)
+            pop_conns = resize(compact_conns, min(target, pop_conns.shape[1]))
+        self._sync(pop_nodes, pop_conns)
+        return pop_nodes, pop_conns
+
+    def _sync(self, pop_nodes, pop_conns):
+        self.genome.max_nodes = pop_nodes.shape[1]
+        self.genome.max_conns = pop_conns.shape[1]
+
+
+def bucket_population(
+    pop_nodes: Tensor,
+    pop_conns: Tensor,
+    node_step: int = 8,
+    conn_step: int = 16,
+    fixed_rows: int = 0,
+) -> List[Tuple[Tensor, Tensor, Tensor]]:
+    """
+    Group the individuals by size. Every genome is compacted, and individuals whose node/conn counts round
+    up to the same (node_step, conn_step) multiples share a bucket, trimmed to that size.
+    Returns a list of (indices, bucket_nodes, bucket_conns).
+    """
+    pop_nodes = batch_compact(pop_nodes, fixed_rows)
+    pop_conns = batch_compact(pop_conns)
+    node_cnt = torch.clamp(used_rows(pop_nodes), min=fixed_rows)
+    conn_cnt = used_rows(pop_conns)
+
+    # round up on device, then find the distinct (nodes, conns) sizes with one host sync
+    node_size = torch.clamp(-(-node_cnt // node_step) * node_step, min=node_step, max=pop_nodes.shape[1])
+    conn_size = torch.clamp(-(-conn_cnt // conn_step) * conn_step, min=conn_step, max=pop_conns.shape[1])
+    sizes, bucket_ids = torch.unique(torch.stack([node_size, conn_size], dim=1), dim=0, return_inverse=True)
+
+    buckets = []
+    for b, (n, c) in enumerate(sizes.tolist()):
+        indices = torch.nonzero(bucket_ids == b, as_tuple=True)[0]
+        buckets.append((indices, pop_nodes[indices, :n], pop_conns[indices, :c]))
+    return buckets
+
+
+def evaluate_in_buckets(
+    eval_func: Callable[[Tensor, Tensor], Tensor],
+    pop_nodes: Tensor,
+    pop_conns: Tensor,
+    node_step: int = 8,
+    conn_step: int = 16,
+    fixed_rows: int = 0,
+) -> Tensor:
+    """
+    Evaluate a population bucket by bucket. `eval_func(bucket_nodes, bucket_conns)` returns one
+    fitness per individual; results are scattered back into population order.
+    """
+    fitness = None
+    for indices, bucket_nodes, bucket_conns in bucket_population(
+        pop_nodes, pop_conns, node_step, conn_step, fixed_rows
+    ):
+        bucket_fitness = eval_func(bucket_nodes, bucket_conns)
+        if fitness is None:
+            fitness = torch.empty(
+                (pop_nodes.shape[0],) + bucket_fitness.shape[1:],
+                dtype=bucket_fitness.dtype,
+                device=bucket_fitness.device,
+            )
+        fitness[indices] = bucket_fitness
+    return fitness
@@ -0,0 +1,272 @@
+from typing import Callable, Sequence
+import torch
+
+from torchneat.common import I_INF, Workspace, attach_with_inf, topological_sort
+from .base import GenomeBase
+from .cache import TopologyCache
+from .gene import BaseNode, BaseConn, DefaultNode, DefaultConn
+from .operations.crossover import default_crossover
+from .operations.distance import DefaultDistance
+from .operations.mutation import DefaultMutation
+from .operations.prune import batch_prune
+from .precision import PrecisionPolicy
+from .utils import unflatten_conns, extract_gene_attrs
+
+
+class DefaultGenome(GenomeBase):
+    """Default genome class, with the same behavior as the NEAT-Python"""
+
+    network_type = "feedforward"
+
+    def __init__(
+        self,
+        num_inputs: int,
+        num_outputs: int,
+        max_nodes: int = 50,
+        max_conns: int = 100,
+        node_gene: BaseNode = DefaultNode(),
+        conn_gene: BaseConn = DefaultConn(),
+        mutation: Callable = DefaultMutation(),
+        crossover: Callable = default_crossover,
+        distance: Callable = DefaultDistance(),
+        output_transform: Callable = None,
+        input_transform: Callable = None,
+        init_hidden_layers: Sequence[int] = (),
+        prune_dead: bool = False,
+        prune_weight_threshold: float = None,
+        precision: PrecisionPolicy = None,
+        topology_cache: TopologyCache = None,
+        workspace: Workspace = None,
+    ):
+        super().__init__(
+            num_inputs,
+            num_outputs,
+            max_nodes,
+            max_conns,
+            node_gene,
+            conn_gene,
+            mutation,
+            crossover,
+            distance,
+            output_transform,
+            input_transform,
+            init_hidden_layers,
+        )
+        self.prune_dead = prune_dead
+        self.prune_weight_threshold = prune_weight_threshold
+        self.precision = precision
+        self.topology_cache = topology_cache
+        self.workspace = workspace
+
+    def prune(self, state, pop_nodes, pop_conns):
+        """
+        Mask the dead nodes and connections of a population (P, N, NL), (P, C, CL), see `batch_prune`.
+        Connections with |weight| <= prune_weight_threshold are dropped too, if the threshold is set.
+        """
+        weight_col = None
+        conn_attrs = self.conn_gene.fixed_attrs + self.conn_gene.custom_attrs
+        if self.prune_weight_threshold is not None and "weight" in conn_attrs:
+            weight_col = conn_attrs.index("weight")
+        return batch_prune(
+            pop_nodes,
+            pop_conns,
+            self.get_input_idx(),
+            self.get_output_idx(),
+            weight_col,
+            self.prune_weight_threshold or 0.0,
+        )
+
+    def _weak_conns(self, conns):
+        # with a weight threshold, pruning (and so the structure) depends on the weights
+        conn_attrs = self.conn_gene.fixed_attrs + self.conn_gene.custom_attrs
+        if not self.prune_dead or self.prune_weight_threshold is None or "weight" not in conn_attrs:
+            return None
+        return torch.abs(conns[:, conn_attrs.index("weight")]) > self.prune_weight_threshold
+
+    def transform(self, state, nodes, conns):
+        cache_key = None
+        if self.topology_cache is not None:
+            cache_key = self.topology_cache.key(nodes, conns, self._weak_conns(conns))
+            cached = self.topology_cache.get(cache_key)
+            if cached is not None:
+                seqs, u_conns, node_alive, conn_alive = cached
+                if node_alive is not None:
+                    nodes = torch.where(node_alive[:, None], nodes, float("nan"))
+                    conns = torch.where(conn_alive[:, None], conns, float("nan"))
+                return seqs, nodes, conns, u_conns
+
+        node_alive = conn_alive = None
+        if self.prune_dead:
+            # only the evaluated copy is pruned, the genome itself keeps its genes
+            pruned_nodes, pruned_conns = self.prune(state, nodes.unsqueeze(0), conns.unsqueeze(0))
+            nodes, conns = pruned_nodes[0], pruned_conns[0]
+            node_alive, conn_alive = ~torch.isnan(nodes[:, 0]), ~torch.isnan(conns[:, 0])
+
+        u_conns = unflatten_conns(nodes, conns)
+        conn_exist = u_conns != I_INF
+
+        seqs = topological_sort(nodes, conn_exist)
+
+        if cache_key is not None:
+            self.topology_cache.put(cache_key, (seqs, u_conns, node_alive, conn_alive))
+        return seqs, nodes, conns, u_conns
+
+    def forward(self, state, transformed, inputs, functional: bool = False):
+        """
+        Evaluate the transformed network. `inputs` has shape (..., num_inputs),
+        the leading dims are treated as a batch.
+        The outputs are differentiable with respect to the attrs in `transformed` (and the inputs).
+        Node values are written in place unless autograd needs them; pass `functional=True` when the
+        forward runs under a torch.func transform, e.g. vmapped over weight perturbations, so every
+        node value is written out of place.
+        With a `workspace`, the node values of forwards that need no gradient and are not functional
+        are written into one reused buffer instead of a new tensor per call.
+        """
+        if self.input_transform is not None:
+            inputs = self.input_transform(inputs)
+
+        cal_seqs, nodes, conns, u_conns = transformed
+        input_keys, output_keys = set(self.get_input_idx()), set(self.get_output_idx())
+        # node values and connection products in compute dtype, aggregation and node attrs in accum dtype
+        dtype = self.precision.compute_dtype if self.precision is not None else inputs.dtype
+        accum_dtype = self.precision.accum_dtype if self.precision is not None else inputs.dtype
+
+        # the padded size of the genome may differ from max_nodes (adaptive capacity, size buckets)
+        values_shape = inputs.shape[:-1] + (nodes.shape[0],)
+        reuse = (
+            self.workspace is not None
+            and not functional
+            and not (torch.is_grad_enabled() and any(t.requires_grad for t in (inputs, nodes, conns)))
+        )
+        if reuse:
+            # the outputs are gathered with an index tensor, so they never alias the buffer
+            values = self.workspace.full("forward_values", values_shape, float("nan"), dtype, inputs.device)
+        else:
+            values = torch.full(values_shape, float("nan"), dtype=dtype, device=inputs.device)
+        values[..., self.input_idx.to(inputs.device)] = inputs.to(dtype)
+
+        nodes_attrs = torch.stack([extract_gene_attrs(self.node_gene, node) for node in nodes]).to(accum_dtype)
+        conns_attrs = torch.stack([extract_gene_attrs(self.conn_gene, conn) for conn in conns]).to(dtype)
+        conn_forward = torch.func.vmap(self.conn_gene.forward, in_dims=(None, 0, 0))
+
+        for i in cal_seqs.tolist():
+            if i == float("inf"):
+                break
+            i = int(i)
+            key = int(nodes[i, 0])
+            if key in input_keys:
+                continue
+
+            # calculate connections, missing connections give NaN and are ignored by the aggregation;
+            # they are masked with where, so their NaN never reaches the gradients
+            missing = u_conns[:, i] == I_INF
+            hit_attrs = attach_with_inf(conns_attrs, u_conns[:, i])
+            hit_attrs = torch.where(missing[:, None], 0.0, hit_attrs)
+            ins = conn_forward(state, hit_attrs, values.movedim(-1, 0))
+            ins = torch.where(missing.view((-1,) + (1,) * (ins.ndim - 1)), float("nan"), ins).to(accum_dtype)
+
+            # calculate nodes
+            z = self.node_gene.forward(
+                state, nodes_attrs[i], ins, is_output_node=key in output_keys
+            )
+            # out of place only when needed: autograd saves the values for the backward pass, and under
+            # torch.func transforms (vmap) z can be batched while values is not yet
+            needs_grad = torch.is_grad_enabled() and (z.requires_grad or values.requires_grad)
+            if needs_grad or functional:
+                values = values.index_copy(-1, torch.tensor([i], device=values.device), z.to(dtype).unsqueeze(-1))
+            else:
+                values[..., i] = z.to(dtype)
+
+        outputs = values[..., self.output_idx.to(inputs.device)].to(accum_dtype)
+        if self.output_transform is not None:
+            outputs = self.output_transform(outputs)
+        return outputs
+
+    def sympy_func(self, state, nodes, conns):
+        """
+        Build the symbolic expressions of the network outputs.
+        Returns (input_symbols, output_exprs, args_symbols), the expressions are written in the
+        parameter symbols (bias, response, weight) and args_symbols maps them to their values.
+        Nodes that can not reach an output do not appear in the expressions.
+        """
+        import sympy as sp
+
+        seqs = self.transform(state, nodes, conns)[0]
+        network = self.network_dict(state, nodes, conns, whether_re_cound_idx=False)
+        input_idx, output_idx = self.get_input_idx(), self.get_output_idx()
+
+        in_conns = {}
+        for conn_dict in network["conns"].values():
+            in_conns.setdefault(conn_dict["out"], []).append(conn_dict)
+
+        input_symbols = [sp.Symbol(f"i{i}") for i in range(len(input_idx))]
+        exprs = dict(zip(input_idx, input_symbols))
+        args_symbols = {}
+        for i in seqs.tolist():
+            if i == float("inf"):
+                break
+            key = int(nodes[int(i), 0])
+            if key in input_idx:
+                continue
+
+            node_inputs = []
+            for conn_dict in in_conns.get(key, []):
+                val, params = self.conn_gene.sympy_func(state, conn_dict, exprs[conn_dict["in"]])
+                args_symbols.update(params)
+                node_inputs.append(val)
+
+            exprs[key], params = self.node_gene.sympy_func(
+                state, network["nodes"][key], node_inputs, is_output_node=key in output_idx
+            )
+            args_symbols.update(params)
+
+        output_exprs = [exprs[key] for key in output_idx]
+        return input_symbols, output_exprs, args_symbols
+
+    def compile_sympy(
+        self,
+        state,
+        nodes,
+        conns,
+        backend: str = "torch",
+        simplify: bool = False,
+        cache: "CompiledExprCache" = None,
+    ):
+        """
+        Compile the network into a function of the inputs through its symbolic form,
+        with the parameter values substituted.
+        `simplify` only applies cheap, bounded rewrites: the expressions are folded with `sp.powsimp`
+        and the shared subexpressions (e.g. a hidden node feeding several nodes) are computed once (`sp.cse`).
+        A full `sp.simplify` does not finish even on small networks of nested sigmoids, so it is never run.
+        With a `cache`, functions are stored under the genome hash, so a genome is compiled only once.
+        Input/output transforms are applied with the torch backend only.
+        """
+        import sympy as sp
+        from torchneat.common.sympy_tools import lambdify_exprs
+
+        if cache is not None:
+            key = (self.hash(nodes, conns), backend, simplify)
+            func = cache.get(key)
+            if func is not None:
+                return func
+
+        input_symbols, output_exprs, args_symbols = self.sympy_func(state, nodes, conns)
+        output_exprs = [expr.subs(args_symbols) for expr in output_exprs]
+        if simplify:
+            output_exprs = [sp.powsimp(expr) for expr in output_exprs]
+        compiled = lambdify_exprs(input_symbols, output_exprs, backend, cse=simplify)
+
+        if backend == "torch" and (self.input_transform is not None or self.output_transform is not None):
+            def func(inputs):
+                if self.input_transform is not None:
+                    inputs = self.input_transform(inputs)
+                outputs = compiled(inputs)
+                if self.output_transform is not None:
+                    outputs = self.output_transform(outputs)
+                return outputs
+        else:
+            func = compiled
+
+        if cache is not None:
+            cache.put(key, func)
+        return func
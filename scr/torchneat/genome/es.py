@@ -0,0 +1,115 @@
+from typing import Callable, Sequence
+import torch
+from torch import Tensor
+
+
+def centered_ranks(fitness: Tensor) -> Tensor:
+    """
+    Replace the fitness along the last dim by its ranks scaled to [-0.5, 0.5].
+    """
+    M = fitness.shape[-1]
+    ranks = torch.argsort(torch.argsort(torch.nan_to_num(fitness, nan=-float("inf")), dim=-1), dim=-1)
+    return ranks.to(torch.float32) / max(M - 1, 1) - 0.5
+
+
+class AntitheticES:
+    """
+    Evolution-strategies search on one continuous conn attr (DefaultConn's weight) of fixed topologies.
+
+    For P genomes, `sample` draws the noise as one (P, M, C) tensor of M = 2 * num_pairs antithetic
+    perturbations (eps, -eps); `evaluate` runs all M perturbed networks of a genome in a single forward,
+    vmapped over the perturbed connections; `step` turns the fitness into the ES gradient estimate and
+    writes the updated weights back into the genomes (Lamarckian).
+    """
+
+    def __init__(
+        self,
+        genome,
+        num_pairs: int = 8,
+        sigma: float = 0.05,
+        lr: float = 0.02,
+        rank_shaping: bool = True,
+        attr: str = "weight",
+        seed: int = 0,
+        state=None,
+    ):
+        names = genome.conn_gene.fixed_attrs + genome.conn_gene.custom_attrs
+        if attr not in names:
+            raise ValueError(f"{genome.conn_gene.__class__.__name__} has no attr {attr}.")
+        self.genome = genome
+        self.num_pairs = num_pairs
+        self.sigma = sigma
+        self.lr = lr
+        self.rank_shaping = rank_shaping
+        self.col = names.index(attr)
+        self.lower = getattr(genome.conn_gene, f"{attr}_lower_bound", -float("inf"))
+        self.upper = getattr(genome.conn_gene, f"{attr}_upper_bound", float("inf"))
+        self.randkey = torch.Generator().manual_seed(seed)
+        self.state = state
+
+    @property
+    def num_samples(self):
+        return 2 * self.num_pairs
+
+    def sample(self, P: int, C: int, device=None) -> Tensor:
+        eps = torch.randn((P, self.num_pairs, C), generator=self.randkey).to(device)
+        return torch.cat([eps, -eps], dim=1)
+
+    def evaluate(
+        self,
+        pop_nodes: Tensor,
+        pop_conns: Tensor,
+        noise: Tensor,
+        fitness_func: Callable[[Tensor], Tensor],
+        inputs: Tensor,
+    ) -> Tensor:
+        """
+        Fitness (P, M) of the perturbed genomes. `fitness_func` maps the (M, ..., num_outputs) outputs
+        of the M perturbations of one genome to their (M,) fitness.
+        Only the perturbations are vmapped: the forward walks the topological order of each genome
+        in Python, so genomes with different topologies are evaluated one after the other.
+        """
+        fitness = []
+        for p in range(pop_nodes.shape[0]):
+            seqs, nodes, conns, u_conns = self.genome.transform(self.state, pop_nodes[p], pop_conns[p])
+            perturbed = conns.expand((noise.shape[1],) + conns.shape).clone()
+            perturbed[..., self.col] = perturbed[..., self.col] + self.sigma * noise[p].to(conns)
+
+            def run(c):
+                return self.genome.forward(self.state, (seqs, nodes, c, u_conns), inputs, functional=True)
+
+            outputs = torch.func.vmap(run)(perturbed)
+            fitness.append(fitness_func(outputs))
+        return torch.stack(fitness)
+
+    def gradient(self, noise: Tensor, fitness: Tensor) -> Tensor:
+        """
+        ES estimate (P, C) of the fitness gradient with respect to the attr, from the (P, M, C) noise.
+        """
+        f = centered_ranks(fitness) if self.rank_shaping else torch.nan_to_num(fitness, nan=0.0)
+        f = f.to(noise)
+        return torch.einsum("pm,pmc->pc", f, noise) / (self.num_samples * self.sigma)
+
+    def step(
+        self,
+        pop_nodes: Tensor,
+        pop_conns: Tensor,
+        indices: Sequence[int],
+        fitness_func: Callable[[Tensor], Tensor],
+        inputs: Tensor,
+    ):
+        """
+        One ES step on the genomes at `indices` (e.g. the elites).
+        Returns the population with the updated attr written back, and the (len(indices), M) fitness.
+        """
+        indices = torch.as_tensor(indices, dtype=torch.long).reshape(-1)
+        nodes, conns = pop_nodes[indices], pop_conns[indices]
+        noise = self.sample(len(indices), conns.shape[1], conns.device)
+        fitness = self.evaluate(nodes, conns, noise, fitness_func, inputs)
+        grad = self.gradient(noise, fitness)
+
+        pop_conns = pop_conns.clone()
+        # NaN (empty) rows stay NaN
+        new_attr = torch.clamp(conns[..., self.col] + self.lr * grad, self.lower, self.upper)
+        pop_conns[indices, :, self.col] = new_attr.to(pop_conns)
+        return pop_nodes, pop_conns, fitness
@@ -0,0 +1,176 @@
+from typing import Callable, List
+import torch
+from torch import nn
+
+from torchneat.common import I_INF, node_levels, get_func_name
+from torchneat.common.functions import act_name2torch, agg_name2torch
+
+
+class LevelBlock(nn.Module):
+    """
+    A masked dense layer computing the nodes of one level that share aggregation and activation.
+    Takes the values computed so far, shape (..., K), and returns the new node values, shape (..., n).
+    """
+
+    def __init__(self, weight, mask, bias, response, agg: str, act: str = None):
+        super().__init__()
+        self.register_buffer("weight", weight)  # (K, n), zero where there is no connection
+        self.register_buffer("mask", mask)  # (K, n), True where there is a connection
+        self.register_buffer("bias", bias)
+        self.register_buffer("response", response)
+        self.agg = agg
+        self.act = act  # None for output nodes, which are not activated
+
+    def forward(self, values):
+        if self.agg == "sum":
+            z = values @ self.weight
+        else:
+            ins = values.unsqueeze(-1) * self.weight
+            ins = torch.where(self.mask, ins, torch.full_like(ins, float("nan")))
+            z = agg_name2torch[self.agg](ins, dim=-2)
+
+        z = self.bias + self.response * z
+        if self.act is not None:
+            z = act_name2torch[self.act](z)
+        return z
+
+
+class GenomeModule(nn.Module):
+    """
+    A standalone network exported from a genome.
+    Node values are kept in one growing (..., K) tensor: the inputs, then every block's outputs.
+    """
+
+    def __init__(
+        self,
+        blocks: List[LevelBlock],
+        output_cols: torch.Tensor,
+        input_transform: Callable = None,
+        output_transform: Callable = None,
+    ):
+        super().__init__()
+        self.blocks = nn.ModuleList(blocks)
+        self.register_buffer("output_cols", output_cols)
+        self.input_transform = input_transform
+        self.output_transform = output_transform
+
+    def forward(self, inputs):
+        if self.input_transform is not None:
+            inputs = self.input_transform(inputs)
+
+        values = inputs
+        for block in self.blocks:
+            values = torch.cat([values, block(values)], dim=-1)
+
+        outputs = values.index_select(-1, self.output_cols)
+        if self.output_transform is not None:
+            outputs = self.output_transform(outputs)
+        return outputs
+
+
+def export_module(genome, state, nodes, conns) -> GenomeModule:
+    """
+    Turn a feedforward genome with DefaultNode-like nodes and DefaultConn-like connections into a GenomeModule.
+    Nodes are grouped by (level, aggregation, activation), each group becomes one LevelBlock.
+    """
+    node_names = genome.node_gene.fixed_attrs + genome.node_gene.custom_attrs
+    conn_names = genome.conn_gene.fixed_attrs + genome.conn_gene.custom_attrs
+    if not {"bias", "response", "aggregation", "activation"} <= set(node_names) or "weight" not in conn_names:
+        raise ValueError(
+            f"Can not export {genome.node_gene.__class__.__name__}/{genome.conn_gene.__class__.__name__}, "
+            "nodes need bias, response, aggregation and activation, connections need weight."
+        )
+
+    seqs, nodes, conns, u_conns = genome.transform(state, nodes, conns)
+    nodes, conns, u_conns = nodes.cpu(), conns.cpu(), u_conns.cpu()
+    conn_exist = u_conns != I_INF
+    levels = node_levels(seqs.cpu(), conn_exist)
+
+    input_keys = genome.get_input_idx()
+    output_keys = set(genome.get_output_idx())
+    bias, res, agg, act = (nodes[:, node_names.index(name)] for name in ["bias", "response", "aggregation", "activation"])
+    weight = conns[:, conn_names.index("weight")]
+
+    # group the non-input nodes, in topological order
+    groups = {}
+    for i in seqs.tolist():
+        if i == float("inf"):
+            break
+        i = int(i)
+        key = int(nodes[i, 0])
+        if key in input_keys:
+            continue
+
+        agg_name = get_func_name(genome.node_gene.aggregation_options[int(agg[i])])
+        if key in output_keys:
+            act_name = None
+        elif int(act[i]) == -1:
+            act_name = "identity"
+        else:
+            act_name = get_func_name(genome.node_gene.activation_options[int(act[i])])
+        for name, table in [(agg_name, agg_name2torch), (act_name, act_name2torch)]:
+            if name is not None and name not in table:
+                raise ValueError(f"Function {name} is not a builtin function and can not be exported.")
+
+        groups.setdefault((int(levels[i]), agg_name, act_name), []).append(i)
+
+    # positions of the inputs in nodes are their keys
+    cols = {key: col for col, key in enumerate(input_keys)}
+    width = len(input_keys)
+    blocks = []
+    for (_, agg_name, act_name), members in sorted(groups.items(), key=lambda item: item[0][0]):
+        w = torch.zeros(width, len(members), dtype=weight.dtype)
+        mask = torch.zeros(width, len(members), dtype=torch.bool)
+        for j, i in enumerate(members):
+            for src in conn_exist[:, i].nonzero(as_tuple=True)[0].tolist():
+                w[cols[src], j] = weight[int(u_conns[src, i])]
+                mask[cols[src], j] = True
+
+        members_t = torch.tensor(members)
+        blocks.append(LevelBlock(w, mask, bias[members_t], res[members_t], agg_name, act_name))
+        for j, i in enumerate(members):
+            cols[i] = width + j
+        width += len(members)
+
+    # positions of the outputs in nodes are their keys
+    output_cols = torch.tensor([cols[key] for key in genome.get_output_idx()])
+    return GenomeModule(blocks, output_cols, genome.input_transform, genome.output_transform)
+
+
+def to_torchscript(module: GenomeModule, num_inputs: int):
+    """
+    Trace the exported module to TorchScript. The graph of a GenomeModule is static, so tracing is exact.
+    """
+    example = torch.zeros(1, num_inputs)
+    return torch.jit.trace(module.eval(), example)
+
+
+def to_onnx(module: GenomeModule, num_inputs: int, path: str, opset_version: int = 17):
+    """
+    Export the module to an ONNX file with a dynamic batch dimension.
+    """
+    example = torch.zeros(1, num_inputs)
+    torch.onnx.export(
+        module.eval(),
+        (example,),
+        path,
+        input_names=["inputs"],
+        output_names=["outputs"],
+        dynamic_axes={"inputs": {0: "batch"}, "outputs": {0: "batch"}},
+        opset_version=opset_version,
+    )
+
+
+def verify_export(genome, state, nodes, conns, module: Callable, inputs, atol=1e-5, rtol=1e-4):
+    """
+    Check an exported module (eager, TorchScript, or any callable wrapping e.g. an onnxruntime session)
+    against the genome forward on a (B, num_inputs) batch of inputs.
+    Returns the max absolute difference, raises ValueError if the outputs do not match.
+    """
+    expected = genome.forward(state, genome.transform(state, nodes, conns), inputs)
+    with torch.no_grad():
+        actual = torch.as_tensor(module(inputs))
+    diff = torch.max(torch.abs(actual - expected)).item()
+    if not torch.allclose(actual, expected, atol=atol, rtol=rtol, equal_nan=True):
+        raise ValueError(f"Exported module does not match the genome forward, max abs diff={diff}")
+    return diff
@@ -0,0 +1,88 @@
+from typing import Callable, Sequence, Tuple
+import torch
+from torch import Tensor
+
+
+def _attr_cols(gene, names: Sequence[str]):
+    all_names = gene.fixed_attrs + gene.custom_attrs
+    missing = [name for name in names if name not in all_names]
+    if missing:
+        raise ValueError(f"{gene.__class__.__name__} has no attrs {missing}.")
+    return [all_names.index(name) for name in names]
+
+
+def _bounds(gene, names: Sequence[str]):
+    # genes name their bounds `<attr>_lower_bound` / `<attr>_upper_bound`, as DefaultNode and DefaultConn
+    lower = [getattr(gene, f"{name}_lower_bound", -float("inf")) for name in names]
+    upper = [getattr(gene, f"{name}_upper_bound", float("inf")) for name in names]
+    return torch.tensor(lower), torch.tensor(upper)
+
+
+def finetune_weights(
+    genome,
+    state,
+    pop_nodes: Tensor,
+    pop_conns: Tensor,
+    indices: Tensor,
+    loss_func: Callable[[Tensor], Tensor],
+    inputs: Tensor,
+    steps: int = 100,
+    lr: float = 1e-2,
+    optimizer: Callable = torch.optim.Adam,
+    node_attrs: Sequence[str] = ("bias", "response"),
+    conn_attrs: Sequence[str] = ("weight",),
+) -> Tuple[Tensor, Tensor, Tensor]:
+    """
+    Optimize the continuous attrs of the genomes at `indices` with gradient descent, keeping their topology.
+    `loss_func(outputs)` maps the outputs of one genome on `inputs` to a scalar loss; the genomes are
+    independent, so their summed loss is minimized jointly with one optimizer.
+    Attrs are clamped to the gene bounds after every step.
+    Returns the population with the tuned genomes written back, and the (len(indices),) final losses.
+    """
+    indices = torch.as_tensor(indices, dtype=torch.long).reshape(-1)
+    node_cols = _attr_cols(genome.node_gene, node_attrs)
+    conn_cols = _attr_cols(genome.conn_gene, conn_attrs)
+    node_lower, node_upper = _bounds(genome.node_gene, node_attrs)
+    conn_lower, conn_upper = _bounds(genome.conn_gene, conn_attrs)
+
+    # the topology is fixed, transform once and only swap the attrs
+    transformed = [genome.transform(state, pop_nodes[i], pop_conns[i]) for i in indices.tolist()]
+    node_params = [torch.nan_to_num(t[1][:, node_cols]).requires_grad_() for t in transformed]
+    conn_params = [torch.nan_to_num(t[2][:, conn_cols]).requires_grad_() for t in transformed]
+    opt = optimizer(node_params + conn_params, lr=lr)
+
+    def with_params(t, node_param, conn_param):
+        seqs, nodes, conns, u_conns = t
+        nodes, conns = nodes.clone(), conns.clone()
+        nodes[:, node_cols] = node_param
+        conns[:, conn_cols] = conn_param
+        return seqs, nodes, conns, u_conns
+
+    def losses():
+        return torch.stack([
+            loss_func(genome.forward(state, with_params(t, n, c), inputs))
+            for t, n, c in zip(transformed, node_params, conn_params)
+        ])
+
+    for _ in range(steps):
+        opt.zero_grad()
+        losses().sum().backward()
+        opt.step()
+        with torch.no_grad():
+            for n in node_params:
+                n.copy_(torch.clamp(n, node_lower.to(n), node_upper.to(n)))
+            for c in conn_params:
+                c.copy_(torch.clamp(c, conn_lower.to(c), conn_upper.to(c)))
+
+    with torch.no_grad():
+        final_losses = losses()
+        pop_nodes, pop_conns = pop_nodes.clone(), pop_conns.clone()
+        node_cols_t, conn_cols_t = torch.tensor(node_cols), torch.tensor(conn_cols)
+        for i, t, n, c in zip(indices.tolist(), transformed, node_params, conn_params):
+            # only the genes the network used; pruned or empty rows keep their values
+            rows = torch.nonzero(~torch.isnan(t[1][:, 0]), as_tuple=True)[0]
+            pop_nodes[i, rows[:, None], node_cols_t.to(rows)[None, :]] = n[rows].to(pop_nodes)
+            rows = torch.nonzero(~torch.isnan(t[2][:, 0]), as_tuple=True)[0]
+            pop_conns[i, rows[:, None], conn_cols_t.to(rows)[None, :]] = c[rows].to(pop_conns)
+
+    return pop_nodes, pop_conns, final_losses
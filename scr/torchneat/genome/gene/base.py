@@ -14,8 +14,8 @@ class BaseGene(object):
         # the attrs which do identity transformation, used in mutate add node
         raise NotImplementedError
 
-    def new_random_attrs(self, state, randkey):
-        # random attributes of the gene. used in initialization.
+    def new_random_attrs(self, state, randkey, shape=()):
+        # random attributes of the gene, with leading dims `shape`. used in initialization.
         raise NotImplementedError
 
     def mutate(self, state, randkey, attrs):
@@ -23,7 +23,7 @@ class BaseGene(object):
 
     def crossover(self, state, randkey, attrs1, attrs2):
         return torch.where(
-            torch.randn(randkey) > 0,
+            torch.randn(attrs1.shape, generator=randkey) > 0,
             attrs1,
             attrs2,
         )
@@ -1,3 +1,5 @@
+import torch
+from torchneat.common.tools import mutate_float
 from .base import BaseConn
 
 class DefaultConn(BaseConn):
@@ -26,37 +28,38 @@ class DefaultConn(BaseConn):
 
 
     def new_zero_attrs(self, state):
-        return jnp.array([0.0])  # weight = 0
+        return torch.tensor([0.0])  # weight = 0
 
     def new_identity_attrs(self, state):
-        return jnp.array([1.0])  # weight = 1
+        return torch.tensor([1.0])  # weight = 1
 
-    def new_random_attrs(self, state, randkey):
+    def new_random_attrs(self, state, randkey, shape=()):
+        # shape: leading batch dims, e.g. (P, num_conns) for the connections of a whole population
         weight = (
-            jax.random.normal(randkey, ()) * self.weight_init_std
+            torch.randn(tuple(shape), generator=randkey) * self.weight_init_std
             + self.weight_init_mean
         )
-        weight = jnp.clip(weight, self.weight_lower_bound, self.weight_upper_bound)
-        return jnp.array([weight])
+        weight = torch.clamp(weight, self.weight_lower_bound, self.weight_upper_bound)
+        return weight.unsqueeze(-1)
 
     def mutate(self, state, randkey, attrs):
-        weight = attrs[0]
+        # attrs may have leading batch dims, e.g. all the connections of a population
         weight = mutate_float(
             randkey,
-            weight,
+            attrs[..., 0],
             self.weight_init_mean,
             self.weight_init_std,
             self.weight_mutate_power,
             self.weight_mutate_rate,
             self.weight_replace_rate,
         )
-        weight = jnp.clip(weight, self.weight_lower_bound, self.weight_upper_bound)
-        return jnp.array([weight])
+        weight = torch.clamp(weight, self.weight_lower_bound, self.weight_upper_bound)
+        return weight.unsqueeze(-1)
 
     def distance(self, state, attrs1, attrs2):
         weight1 = attrs1[0]
         weight2 = attrs2[0]
-        return jnp.abs(weight1 - weight2)
+        return torch.abs(weight1 - weight2)
 
     def forward(self, state, attrs, inputs):
         weight = attrs[0]
@@ -82,10 +85,12 @@ class DefaultConn(BaseConn):
         return {
             "in": int(conn[0]),
             "out": int(conn[1]),
-            "weight": jnp.float32(conn[2]),
+            "weight": float(conn[2]),
         }
 
     def sympy_func(self, state, conn_dict, inputs, precision=None):
+        import sympy as sp
+
         weight = sp.symbols(f"c_{conn_dict['in']}_{conn_dict['out']}_w")
 
         return inputs * weight, {weight: conn_dict["weight"]}
\ No newline at end of file
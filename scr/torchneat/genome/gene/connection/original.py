@@ -18,12 +18,12 @@ class OriginalConn(DefaultConn):
     ):
         super().__init__(*args, **kwargs)
 
-    def crossover(self, randkey, attrs1, attrs2):
+    def crossover(self, state, randkey, attrs1, attrs2):
         # random pick one of attrs, without attrs exchange
         return torch.where(
             # origin code, generate multiple random numbers, without attrs exchange
             # jax.random.normal(randkey, attrs1.shape) > 0,
-            torch.randn(randkey)
+            torch.randn((), generator=randkey)
             > 0,  # generate one random number, without attrs exchange
             attrs1,
             attrs2,
@@ -55,5 +55,5 @@ class OriginalConn(DefaultConn):
             "in": int(conn[0]),
             "out": int(conn[1]),
             "historical_marker": int(conn[2]),
-            "weight": torch.float32(conn[3]),
+            "weight": float(conn[3]),
         }
\ No newline at end of file
@@ -1 +1,2 @@
-from .base import BaseNode
\ No newline at end of file
+from .base import BaseNode
+from .default import DefaultNode
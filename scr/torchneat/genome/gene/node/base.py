@@ -1,6 +1,8 @@
 from ..base import BaseGene
 
 class BaseNode(BaseGene):
+    "Base class for node genes."
+    fixed_attrs = ["index"]
 
     def __init__(self):
         super().__init__()
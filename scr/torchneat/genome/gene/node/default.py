@@ -1,10 +1,15 @@
 from typing import Optional, Union, Sequence, Callable
 from .base import BaseNode
 import torchneat.common.functions.act_torch as torchneat_act
+import torchneat.common.functions.agg_torch as torchneat_agg
 import torch
-from torchneat.common.tools import split_generator, mutate_float
+from torchneat.common.tools import split_generator, mutate_float, mutate_int
 from torchneat.common import (
-    ACT
+    ACT,
+    AGG,
+    apply_activation,
+    apply_aggregation,
+    get_func_name,
     )
 
 class DefaultNode(BaseNode):
@@ -29,10 +34,10 @@ class DefaultNode(BaseNode):
         response_lower_bound: float = -5,
         response_upper_bound: float = 5,
         aggregation_default: Optional[Callable] = None,
-        aggregation_options: Union[Callable, Sequence[Callable]] = torchneat_act.sum,
+        aggregation_options: Union[Callable, Sequence[Callable]] = torchneat_agg.sum_,
         aggregation_replace_rate: float = 0.1,
         activation_default: Optional[Callable] = None,
-        activation_options: Union[Callable, Sequence[Callable]] = torchneat_act.sigmoid,
+        activation_options: Union[Callable, Sequence[Callable]] = torchneat_act.sigmoid_,
         activation_replace_rate: float = 0.1,
     ):
         super().__init__()
@@ -59,7 +64,7 @@ class DefaultNode(BaseNode):
         self.response_mutate_power = response_mutate_power
         self.response_mutate_rate = response_mutate_rate
         self.response_replace_rate = response_replace_rate
-        self.reponse_lower_bound = response_lower_bound
+        self.response_lower_bound = response_lower_bound
         self.response_upper_bound = response_upper_bound
 
         self.aggregation_default = aggregation_options.index(aggregation_default)
@@ -78,27 +83,29 @@ class DefaultNode(BaseNode):
         agg = self.aggregation_default
         act = self.activation_default
 
-        return jnp.array([bias, res, agg, act])  # activation=-1 means ACT.identity
+        return torch.tensor([bias, res, agg, act], dtype=torch.float32)  # activation=-1 means ACT.identity
 
-    def new_random_attrs(self, state, randkey):
+    def new_random_attrs(self, state, randkey, shape=()):
+        # shape: leading batch dims, e.g. (P, num_nodes) for the nodes of a whole population
+        shape = tuple(shape)
         k1, k2, k3, k4 = split_generator(randkey, 4)
 
-        bias = torch.normal(self.bias_init_mean, self.bias_init_std, generator=k1)
+        bias = torch.normal(self.bias_init_mean, self.bias_init_std, size=shape, generator=k1)
         bias = torch.clamp(bias, self.bias_lower_bound, self.bias_upper_bound)
 
-        res = torch.normal(self.response_init_mean, self.response_init_std, generator=k2)
+        res = torch.normal(self.response_init_mean, self.response_init_std, size=shape, generator=k2)
         res = torch.clamp(res, self.response_lower_bound, self.response_upper_bound)
 
-        agg = torch.randint(0, len(self.aggregation_indices), (1,), generator=k3).item()
-        act = torch.randint(0, len(self.activation_indices), (1,), generator=k4).item()
+        agg = torch.randint(0, len(self.aggregation_indices), shape, generator=k3).to(torch.float32)
+        act = torch.randint(0, len(self.activation_indices), shape, generator=k4).to(torch.float32)
 
-        return torch.tensor([bias, res, agg, act])
+        return torch.stack([bias, res, agg, act], dim=-1)
 
     def mutate(self, state, randkey, attrs):
-        k1, k2, k3, k4 = split_generator(randkey, num=4)
-        bias, res, agg, act = attrs
+        # attrs may have leading batch dims, e.g. all the nodes of a population
+        bias, res, agg, act = attrs.unbind(-1)
         bias = mutate_float(
-            k1,
+            randkey,
             bias,
             self.bias_init_mean,
             self.bias_init_std,
@@ -106,9 +113,9 @@ class DefaultNode(BaseNode):
             self.bias_mutate_rate,
             self.bias_replace_rate,
         )
-        bias = jnp.clip(bias, self.bias_lower_bound, self.bias_upper_bound)
+        bias = torch.clamp(bias, self.bias_lower_bound, self.bias_upper_bound)
         res = mutate_float(
-            k2,
+            randkey,
             res,
             self.response_init_mean,
             self.response_init_std,
@@ -116,14 +123,18 @@ class DefaultNode(BaseNode):
             self.response_mutate_rate,
             self.response_replace_rate,
         )
-        res = torch.clip(res, self.reponse_lower_bound, self.response_upper_bound)
+        res = torch.clamp(res, self.response_lower_bound, self.response_upper_bound)
         agg = mutate_int(
-            k4, agg, self.aggregation_indices, self.aggregation_replace_rate
+            randkey, agg, self.aggregation_indices, self.aggregation_replace_rate
+        )
+        # identity nodes (activation=-1) stay identity
+        act = torch.where(
+            act == -1,
+            act,
+            mutate_int(randkey, act, self.activation_indices, self.activation_replace_rate),
         )
 
-        act = mutate_int(k3, act, self.activation_indices, self.activation_replace_rate)
-
-        return torch.tensor([bias, res, agg, act])
+        return torch.stack([bias, res, agg, act], dim=-1)
 
     def distance(self, state, attrs1, attrs2):
         bias1, res1, agg1, act1 = attrs1
@@ -142,9 +153,8 @@ class DefaultNode(BaseNode):
         z = bias + res * z
 
         # the last output node should not be activated
-        z = jax.lax.cond(
-            is_output_node, lambda: z, lambda: apply_activation(act, z, self.activation_options)
-        )
+        if not is_output_node:
+            z = apply_activation(act, z, self.activation_options)
 
         return z
 
@@ -177,8 +187,8 @@ class DefaultNode(BaseNode):
         idx, bias, res, agg, act = node
 
         idx = int(idx)
-        bias = torch.float32(bias)
-        res = torch.float32(res)
+        bias = float(bias)
+        res = float(res)
         agg = int(agg)
         act = int(act)
 
@@ -195,6 +205,8 @@ class DefaultNode(BaseNode):
         }
 
     def sympy_func(self, state, node_dict, inputs, is_output_node=False):
+        import sympy as sp
+
         nd = node_dict
         bias = sp.symbols(f"n_{nd['idx']}_b")
         res = sp.symbols(f"n_{nd['idx']}_r")
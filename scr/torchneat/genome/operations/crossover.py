@@ -1,7 +1,7 @@
 import torch
 from torch import Tensor
 from typing import Tuple
-from torchneat.common import fetch_first, I_INF
+from torchneat.common import fetch_first, split_generator, I_INF
 from torchneat.genome.gene import BaseGene
 from torchneat.genome.utils import extract_gene_attrs, set_gene_attrs
 
@@ -42,8 +42,9 @@ def default_crossover(
         )
         for randkey, key1, attr1 in zip(node_randkeys, node_keys1, node_attrs1)
     ])
+    # clone the winner's genes, parents may be shared by several offspring
     new_nodes = torch.stack([
-        set_gene_attrs(genome.node_gene, node, new_attr)
+        set_gene_attrs(genome.node_gene, node.clone(), new_attr)
         for node, new_attr in zip(nodes1, new_node_attrs)
     ])
 
@@ -66,7 +67,7 @@ def default_crossover(
         for randkey, key1, attr1 in zip(conn_randkeys, conn_keys1, conn_attrs1)
     ])
     new_conns = torch.stack([
-        set_gene_attrs(genome.conn_gene, conn, new_attr)
+        set_gene_attrs(genome.conn_gene, conn.clone(), new_attr)
         for conn, new_attr in zip(conns1, new_conn_attrs)
     ])
 
@@ -0,0 +1,66 @@
+import torch
+from torch import Tensor
+
+from torchneat.genome.utils import batch_valid_cnt
+
+
+class DefaultDistance:
+    """
+    NEAT compatibility distance, as in NEAT-python. For nodes and for connections:
+    (non_homologous_cnt * compatibility_disjoint + homologous_attr_distance * compatibility_weight) / max(cnt1, cnt2)
+    Genes are homologous when all their fixed attrs (keys) are equal.
+    """
+
+    def __init__(
+        self,
+        compatibility_disjoint: float = 1.0,
+        compatibility_weight: float = 0.4,
+    ):
+        self.compatibility_disjoint = compatibility_disjoint
+        self.compatibility_weight = compatibility_weight
+
+    def __call__(self, state, genome, nodes1, conns1, nodes2, conns2):
+        return self.batch(
+            state, genome, nodes1[None], conns1[None], nodes2[None], conns2[None]
+        )[0]
+
+    def batch(self, state, genome, pop_nodes1, pop_conns1, pop_nodes2, pop_conns2) -> Tensor:
+        """
+        Distances between M pairs of genomes, pop_nodes1/pop_nodes2 have shape (M, N, NL). Returns (M,).
+        """
+        return self._gene_distance(state, genome.node_gene, pop_nodes1, pop_nodes2) + self._gene_distance(
+            state, genome.conn_gene, pop_conns1, pop_conns2
+        )
+
+    def lower_bound(self, node_cnt1, conn_cnt1, node_cnt2, conn_cnt2) -> Tensor:
+        """
+        A lower bound of the distance computed from the valid gene counts only (broadcastable tensors).
+        At least |cnt1 - cnt2| genes can not be homologous, and attr distances are non-negative.
+        """
+        def part(cnt1, cnt2):
+            return torch.abs(cnt1 - cnt2) / torch.clamp(torch.maximum(cnt1, cnt2), min=1)
+
+        return self.compatibility_disjoint * (part(node_cnt1, node_cnt2) + part(conn_cnt1, conn_cnt2))
+
+    def _gene_distance(self, state, gene, genes1, genes2):
+        k = len(gene.fixed_attrs)
+        M, N, L = genes1.shape
+
+        # (M, N, N) homologous matrix, NaN keys never match
+        match = torch.all(genes1[:, :, None, :k] == genes2[:, None, :, :k], dim=-1)
+        has_match = match.any(dim=-1)
+        j = torch.argmax(match.to(torch.int8), dim=-1)
+        aligned = torch.gather(genes2, 1, j[..., None].expand(M, N, genes2.shape[-1]))
+
+        attrs1 = genes1[..., k:].reshape(M * N, -1)
+        attrs2 = aligned[..., k:].reshape(M * N, -1)
+        d = torch.func.vmap(gene.distance, in_dims=(None, 0, 0))(state, attrs1, attrs2).view(M, N)
+        homologous_distance = torch.sum(torch.where(has_match, d, 0.0), dim=-1)
+
+        cnt1, cnt2 = batch_valid_cnt(genes1), batch_valid_cnt(genes2)
+        non_homologous_cnt = cnt1 + cnt2 - 2 * has_match.sum(dim=-1)
+        val = (
+            non_homologous_cnt * self.compatibility_disjoint
+            + homologous_distance * self.compatibility_weight
+        )
+        return val / torch.clamp(torch.maximum(cnt1, cnt2), min=1)
@@ -0,0 +1,101 @@
+import torch
+from torch import Tensor
+
+
+def _pair_keys(in_keys: Tensor, out_keys: Tensor) -> Tensor:
+    # node keys are non-negative and far below 2**31
+    return (in_keys.to(torch.long) << 32) | out_keys.to(torch.long)
+
+
+class _SortedTable:
+    """
+    int64 -> int64 map kept as a sorted key tensor and a value tensor, queried and updated in batch.
+    """
+
+    def __init__(self, keys: Tensor = None, values: Tensor = None):
+        if keys is None:
+            keys = values = torch.zeros(0, dtype=torch.long)
+        order = torch.argsort(keys)
+        self.keys, self.values = keys[order], values[order]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup_or_insert(self, keys: Tensor, next_value: int):
+        """
+        Values of `keys`; keys not in the table get next_value, next_value + 1, ... in sorted key order.
+        Returns the values and the updated next_value.
+        """
+        device = keys.device
+        table_keys, table_values = self.keys.to(device), self.values.to(device)
+
+        values = torch.full_like(keys, -1)
+        if len(table_keys) > 0:
+            pos = torch.searchsorted(table_keys, keys).clamp(max=len(table_keys) - 1)
+            found = table_keys[pos] == keys
+            values = torch.where(found, table_values[pos], values)
+        else:
+            found = torch.zeros_like(keys, dtype=torch.bool)
+
+        new_keys = torch.unique(keys[~found])
+        if len(new_keys) > 0:
+            new_values = next_value + torch.arange(len(new_keys), device=device)
+            values[~found] = new_values[torch.searchsorted(new_keys, keys[~found])]
+            next_value += len(new_keys)
+
+            merged_keys = torch.cat([table_keys, new_keys])
+            merged_values = torch.cat([table_values, new_values])
+            order = torch.argsort(merged_keys)
+            self.keys, self.values = merged_keys[order], merged_values[order]
+        return values, next_value
+
+
+class InnovationRegistry:
+    """
+    Assign innovation numbers so that identical structural mutations get identical keys:
+    - adding the connection (in, out) gets the same historical marker in every genome,
+    - splitting the connection (in, out) gets the same new node key in every genome,
+      hence the same markers for (in, new) and (new, out).
+
+    Lookups are batched over all the mutations of a population (sorted keys + searchsorted).
+    With `persistent=False` the mutations are only matched within a generation, as in the original NEAT;
+    call `new_generation` once per generation. The initial connections always keep their initial markers.
+    The registry is local to the process: sharded runs must not rely on it for cross-rank consistency.
+
+    Give it to DefaultMutation(innovation=...); the node/conn keys passed to the mutation are then ignored.
+    """
+
+    def __init__(self, genome, persistent: bool = False):
+        self.persistent = persistent
+        self.next_node_key = int(max(genome.all_init_nodes)) + 1
+        self.next_marker = len(genome.all_init_conns)
+
+        init_conns = torch.as_tensor(genome.all_init_conns, dtype=torch.long).reshape(-1, 2)
+        self._init_pairs = _pair_keys(init_conns[:, 0], init_conns[:, 1])
+        self.new_generation(force=True)
+
+    def new_generation(self, force: bool = False):
+        if self.persistent and not force:
+            return
+        self.conns = _SortedTable(self._init_pairs.clone(), torch.arange(len(self._init_pairs)))
+        self.splits = _SortedTable()
+
+    def conn_markers(self, in_keys: Tensor, out_keys: Tensor, mask: Tensor) -> Tensor:
+        """
+        Historical markers (P,) of the connections in_keys -> out_keys where mask is True, -1 elsewhere.
+        """
+        pairs = _pair_keys(in_keys[mask], out_keys[mask])
+        values, self.next_marker = self.conns.lookup_or_insert(pairs, self.next_marker)
+        markers = torch.full(mask.shape, -1, dtype=torch.long, device=mask.device)
+        markers[mask] = values
+        return markers
+
+    def split_node_keys(self, in_keys: Tensor, out_keys: Tensor, mask: Tensor) -> Tensor:
+        """
+        Keys (P,) of the nodes that split the connections in_keys -> out_keys where mask is True, -1 elsewhere.
+        """
+        pairs = _pair_keys(in_keys[mask], out_keys[mask])
+        values, self.next_node_key = self.splits.lookup_or_insert(pairs, self.next_node_key)
+        keys = torch.full(mask.shape, -1, dtype=torch.long, device=mask.device)
+        keys[mask] = values
+        return keys
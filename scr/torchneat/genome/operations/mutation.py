@@ -0,0 +1,240 @@
+import torch
+from torch import Tensor
+from typing import Tuple
+from torchneat.common import I_INF, Workspace, batch_fetch_first, batch_fetch_random, reachable, split_generator
+from torchneat.genome.utils import batch_unflatten_conns
+from .innovation import InnovationRegistry
+
+
+def _write_rows(pop_genes: Tensor, pos: Tensor, rows: Tensor, ok: Tensor) -> Tensor:
+    """
+    Write rows (P, L) at positions pos (P,) of the genomes where ok (P,) is True.
+    """
+    slots = torch.arange(pop_genes.shape[1], device=pop_genes.device)
+    hit = (slots[None, :] == pos[:, None]) & ok[:, None]
+    return torch.where(hit[..., None], rows[:, None, :].to(pop_genes.dtype), pop_genes)
+
+
+def _gather_rows(pop_genes: Tensor, pos: Tensor) -> Tensor:
+    """
+    Rows (P, L) at positions pos (P,), unavailable positions (I_INF) read row 0.
+    """
+    safe_pos = torch.where(pos == I_INF, 0, pos)
+    return pop_genes[torch.arange(pop_genes.shape[0], device=pop_genes.device), safe_pos]
+
+
+def _conn_fixed_attrs(conn_gene, in_keys: Tensor, out_keys: Tensor, markers: Tensor) -> Tensor:
+    fixed = [in_keys, out_keys]
+    if "historical_marker" in conn_gene.fixed_attrs:
+        fixed.append(markers)
+    return torch.stack(fixed, dim=-1)
+
+
+class DefaultMutation:
+    """
+    Structural mutation (add/delete node, add/delete connection) followed by attribute mutation,
+    applied to a whole population with tensor ops.
+
+    Every individual draws whether each structural mutation happens in one draw for the population;
+    the genes they act on are sampled with `batch_fetch_random`, and the results are written with
+    masked row writes, so no individual is handled on its own. A mutation that can not be applied
+    (no free slot, nothing to split or delete, the new connection exists or would close a cycle in
+    a feedforward genome) leaves the genome unchanged.
+
+    new_node_keys has shape (P,) and new_conn_keys (P, 3): the split connection gets the first two
+    connection keys as historical markers, the added connection the third one.
+    With an InnovationRegistry, the keys come from the registry instead, so identical mutations in
+    different genomes get identical keys.
+    The connection index and the random draws of every call are written into the buffers of `workspace`.
+    """
+
+    def __init__(
+        self,
+        conn_add: float = 0.2,
+        conn_delete: float = 0,
+        node_add: float = 0.2,
+        node_delete: float = 0,
+        innovation: InnovationRegistry = None,
+        workspace: Workspace = None,
+    ):
+        self.conn_add = conn_add
+        self.conn_delete = conn_delete
+        self.node_add = node_add
+        self.node_delete = node_delete
+        self.innovation = innovation
+        self.workspace = workspace if workspace is not None else Workspace()
+
+    def __call__(self, state, genome, randkey, nodes, conns, new_node_key, new_conn_keys):
+        pop_nodes, pop_conns = self.batch(
+            state,
+            genome,
+            randkey,
+            nodes.unsqueeze(0),
+            conns.unsqueeze(0),
+            torch.as_tensor(new_node_key).reshape(1),
+            torch.as_tensor(new_conn_keys).reshape(1, 3),
+        )
+        return pop_nodes[0], pop_conns[0]
+
+    def batch(
+        self,
+        state,
+        genome,
+        randkey: torch.Generator,
+        pop_nodes: Tensor,
+        pop_conns: Tensor,
+        new_node_keys: Tensor,
+        new_conn_keys: Tensor,
+    ) -> Tuple[Tensor, Tensor]:
+        k1, k2 = split_generator(randkey, 2)
+        pop_nodes, pop_conns = self.mutate_structure(
+            state, genome, k1, pop_nodes, pop_conns, new_node_keys, new_conn_keys
+        )
+        pop_nodes, pop_conns = self.mutate_values(state, genome, k2, pop_nodes, pop_conns)
+        return pop_nodes, pop_conns
+
+    def mutate_structure(self, state, genome, randkey, pop_nodes, pop_conns, new_node_keys, new_conn_keys):
+        device = pop_nodes.device
+        P = pop_nodes.shape[0]
+        new_node_keys = new_node_keys.to(device=device, dtype=pop_nodes.dtype)
+        new_conn_keys = new_conn_keys.to(device=device, dtype=pop_conns.dtype)
+
+        probs = torch.tensor([self.node_add, self.node_delete, self.conn_add, self.conn_delete])
+        do = (self.workspace.rand("mutation_do", (P, 4), randkey) < probs).to(device)
+
+        pop_nodes, pop_conns = self.add_node(
+            state, genome, randkey, pop_nodes, pop_conns, do[:, 0], new_node_keys, new_conn_keys[:, :2]
+        )
+        pop_nodes, pop_conns = self.delete_node(state, genome, randkey, pop_nodes, pop_conns, do[:, 1])
+        pop_nodes, pop_conns = self.add_conn(
+            state, genome, randkey, pop_nodes, pop_conns, do[:, 2], new_conn_keys[:, 2]
+        )
+        pop_nodes, pop_conns = self.delete_conn(state, genome, randkey, pop_nodes, pop_conns, do[:, 3])
+        return pop_nodes, pop_conns
+
+    def add_node(self, state, genome, randkey, pop_nodes, pop_conns, do, new_node_keys, new_conn_keys):
+        """
+        Split a random connection i -> o into i -> new (identity attrs) and new -> o (the old attrs).
+        The first connection reuses the slot of the split one.
+        """
+        P = pop_nodes.shape[0]
+        num_fixed = len(genome.conn_gene.fixed_attrs)
+        split_pos = batch_fetch_random(randkey, ~torch.isnan(pop_conns[..., 0]))
+        node_slot = batch_fetch_first(torch.isnan(pop_nodes[..., 0]))
+        # the slot of the split connection is reused, the second one needs a free slot
+        conn_slot = batch_fetch_first(torch.isnan(pop_conns[..., 0]))
+        ok = do & (split_pos != I_INF) & (node_slot != I_INF) & (conn_slot != I_INF)
+
+        old = _gather_rows(pop_conns, split_pos)
+        in_keys, out_keys = old[:, 0], old[:, 1]
+
+        if self.innovation is not None:
+            new_node_keys = self.innovation.split_node_keys(in_keys, out_keys, ok).to(pop_nodes.dtype)
+            # the same split may already have happened to this genome in an earlier generation
+            ok = ok & ~(pop_nodes[..., 0] == new_node_keys[:, None]).any(dim=-1)
+            new_conn_keys = torch.stack(
+                [
+                    self.innovation.conn_markers(in_keys, new_node_keys, ok),
+                    self.innovation.conn_markers(new_node_keys, out_keys, ok),
+                ],
+                dim=-1,
+            ).to(pop_conns.dtype)
+
+        node_attrs = genome.node_gene.new_identity_attrs(state).to(pop_nodes).expand(P, -1)
+        new_nodes = torch.cat([new_node_keys[:, None], node_attrs], dim=-1)
+        conn_attrs = genome.conn_gene.new_identity_attrs(state).to(pop_conns).expand(P, -1)
+        conn_in = torch.cat(
+            [_conn_fixed_attrs(genome.conn_gene, in_keys, new_node_keys, new_conn_keys[:, 0]), conn_attrs], dim=-1
+        )
+        conn_out = torch.cat(
+            [_conn_fixed_attrs(genome.conn_gene, new_node_keys, out_keys, new_conn_keys[:, 1]), old[:, num_fixed:]],
+            dim=-1,
+        )
+
+        pop_nodes = _write_rows(pop_nodes, node_slot, new_nodes, ok)
+        pop_conns = _write_rows(pop_conns, split_pos, conn_in, ok)
+        pop_conns = _write_rows(pop_conns, conn_slot, conn_out, ok)
+        return pop_nodes, pop_conns
+
+    def delete_node(self, state, genome, randkey, pop_nodes, pop_conns, do):
+        """
+        Delete a random hidden node and every connection attached to it.
+        """
+        keys = pop_nodes[..., 0]
+        io_keys = torch.cat([genome.input_idx, genome.output_idx]).to(keys)
+        candidate = ~torch.isnan(keys) & ~torch.isin(keys, io_keys)
+        pos = batch_fetch_random(randkey, candidate)
+        ok = do & (pos != I_INF)
+        key = _gather_rows(keys.unsqueeze(-1), pos)
+
+        slots = torch.arange(pop_nodes.shape[1], device=pop_nodes.device)
+        hit_nodes = (slots[None, :] == pos[:, None]) & ok[:, None]
+        hit_conns = ((pop_conns[..., 0] == key) | (pop_conns[..., 1] == key)) & ok[:, None]
+        pop_nodes = torch.where(hit_nodes[..., None], float("nan"), pop_nodes)
+        pop_conns = torch.where(hit_conns[..., None], float("nan"), pop_conns)
+        return pop_nodes, pop_conns
+
+    def add_conn(self, state, genome, randkey, pop_nodes, pop_conns, do, new_conn_keys):
+        """
+        Connect a random node to a random non-input node, with zero attrs.
+        In feedforward genomes, connections that would close a cycle are rejected.
+        """
+        P, N = pop_nodes.shape[:2]
+        device = pop_nodes.device
+        keys = pop_nodes[..., 0]
+        valid = ~torch.isnan(keys)
+        is_input = torch.isin(keys, genome.input_idx.to(keys))
+
+        from_pos = batch_fetch_random(randkey, valid)
+        to_pos = batch_fetch_random(randkey, valid & ~is_input)
+        conn_slot = batch_fetch_first(torch.isnan(pop_conns[..., 0]))
+        ok = do & (from_pos != I_INF) & (to_pos != I_INF) & (conn_slot != I_INF)
+
+        p_idxs = torch.arange(P, device=device)
+        safe_from = torch.where(ok, from_pos, 0)
+        safe_to = torch.where(ok, to_pos, 0)
+        u_conns = self.workspace.get("mutation_u_conns", (P, N, N), torch.int32, device)
+        conn_exist = batch_unflatten_conns(pop_nodes, pop_conns, out=u_conns) != I_INF
+        ok = ok & ~conn_exist[p_idxs, safe_from, safe_to]
+
+        if genome.network_type == "feedforward":
+            # from -> to closes a cycle iff from is reachable from to (or they are the same node)
+            start = (torch.arange(N, device=device)[None, :] == safe_to[:, None]) & ok[:, None]
+            ok = ok & ~reachable(conn_exist, start)[p_idxs, safe_from]
+
+        from_keys = keys[p_idxs, safe_from]
+        to_keys = keys[p_idxs, safe_to]
+        if self.innovation is not None:
+            new_conn_keys = self.innovation.conn_markers(from_keys, to_keys, ok).to(pop_conns.dtype)
+        conn_attrs = genome.conn_gene.new_zero_attrs(state).to(pop_conns).expand(P, -1)
+        new_conns = torch.cat(
+            [_conn_fixed_attrs(genome.conn_gene, from_keys, to_keys, new_conn_keys), conn_attrs], dim=-1
+        )
+        pop_conns = _write_rows(pop_conns, conn_slot, new_conns, ok)
+        return pop_nodes, pop_conns
+
+    def delete_conn(self, state, genome, randkey, pop_nodes, pop_conns, do):
+        """
+        Delete a random connection.
+        """
+        pos = batch_fetch_random(randkey, ~torch.isnan(pop_conns[..., 0]))
+        ok = do & (pos != I_INF)
+        slots = torch.arange(pop_conns.shape[1], device=pop_conns.device)
+        hit = (slots[None, :] == pos[:, None]) & ok[:, None]
+        pop_conns = torch.where(hit[..., None], float("nan"), pop_conns)
+        return pop_nodes, pop_conns
+
+    def mutate_values(self, state, genome, randkey, pop_nodes, pop_conns):
+        """
+        Mutate the custom attrs of every valid gene; `gene.mutate` works on the whole (P, N, A) attrs tensor.
+        """
+        pop_nodes = self._mutate_genes(state, genome.node_gene, randkey, pop_nodes)
+        pop_conns = self._mutate_genes(state, genome.conn_gene, randkey, pop_conns)
+        return pop_nodes, pop_conns
+
+    @staticmethod
+    def _mutate_genes(state, gene, randkey, pop_genes):
+        num_fixed = len(gene.fixed_attrs)
+        attrs = gene.mutate(state, randkey, pop_genes[..., num_fixed:]).to(pop_genes.dtype)
+        mutated = torch.cat([pop_genes[..., :num_fixed], attrs], dim=-1)
+        return torch.where(torch.isnan(pop_genes[..., :1]), pop_genes, mutated)
@@ -0,0 +1,71 @@
+import torch
+from torch import Tensor
+from typing import Sequence, Tuple
+
+from torchneat.common import I_INF, reachable
+from torchneat.genome.utils import batch_unflatten_conns
+
+
+def batch_prune(
+    pop_nodes: Tensor,
+    pop_conns: Tensor,
+    input_idx: Sequence[int],
+    output_idx: Sequence[int],
+    weight_col: int = None,
+    weight_threshold: float = 0.0,
+) -> Tuple[Tensor, Tensor]:
+    """
+    Mask the dead parts of every genome in a population, for evaluation only.
+    A hidden node is dead if it can not reach any output node or can not be reached from any input node
+    (such a node only feeds a constant, the same nodes NEAT-python leaves out of its feedforward layers).
+    A connection is dead if one of its ends is dead or, when `weight_col` is given, if its |weight| is
+    not above `weight_threshold`. Weak connections are removed before the reachability analysis.
+
+    Returns copies of pop_nodes (P, N, NL) and pop_conns (P, C, CL) with the dead rows set to NaN,
+    so they are skipped by transform and cost nothing in the forward pass.
+    """
+    device = pop_nodes.device
+    keys = pop_nodes[..., 0]
+    is_input = torch.isin(keys, torch.tensor(list(input_idx), dtype=keys.dtype, device=device))
+    is_output = torch.isin(keys, torch.tensor(list(output_idx), dtype=keys.dtype, device=device))
+
+    conn_alive = ~torch.isnan(pop_conns[..., 0])
+    if weight_col is not None:
+        conn_alive = conn_alive & (torch.abs(pop_conns[..., weight_col]) > weight_threshold)
+
+    # adjacency matrix (P, N, N) of the remaining connections
+    u_conns = batch_unflatten_conns(pop_nodes, torch.where(conn_alive[..., None], pop_conns, float("nan")))
+    conn_exist = u_conns != I_INF
+
+    from_inputs = reachable(conn_exist, is_input)
+    to_outputs = reachable(conn_exist.transpose(-1, -2), is_output)
+    node_alive = ~torch.isnan(keys) & (is_input | is_output | (from_inputs & to_outputs))
+
+    # a connection survives if it is in the adjacency matrix and both of its ends are alive
+    edge_alive = conn_exist & node_alive[..., :, None] & node_alive[..., None, :]
+    C = pop_conns.shape[1]
+    alive_idx = torch.where(edge_alive, u_conns.long(), C).flatten(1)
+    conn_alive = torch.zeros(pop_conns.shape[0], C + 1, dtype=torch.bool, device=device)
+    conn_alive.scatter_(1, alive_idx, True)
+    conn_alive = conn_alive[:, :C]
+
+    new_nodes = torch.where(node_alive[..., None], pop_nodes, float("nan"))
+    new_conns = torch.where(conn_alive[..., None], pop_conns, float("nan"))
+    return new_nodes, new_conns
+
+
+def prune(
+    nodes: Tensor,
+    conns: Tensor,
+    input_idx: Sequence[int],
+    output_idx: Sequence[int],
+    weight_col: int = None,
+    weight_threshold: float = 0.0,
+) -> Tuple[Tensor, Tensor]:
+    """
+    Single genome version of `batch_prune`.
+    """
+    new_nodes, new_conns = batch_prune(
+        nodes.unsqueeze(0), conns.unsqueeze(0), input_idx, output_idx, weight_col, weight_threshold
+    )
+    return new_nodes[0], new_conns[0]
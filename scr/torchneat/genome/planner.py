@@ -0,0 +1,134 @@
+from typing import Callable, List, Tuple
+import torch
+from torch import Tensor
+
+
+class ForwardPlanner:
+    """
+    Split the evaluation of P genomes on B inputs into (genome chunk, input chunk) blocks whose
+    estimated working set fits in `budget_bytes`, and stream them into one preallocated output.
+
+    The working set of evaluating `g` genomes on `b` inputs is estimated as g * (fixed + b * per_input):
+    - fixed: the genome tensors, their unflattened connection index (N, N) and the extracted attrs,
+    - per_input: the node values and their out-of-place copy (autograd, vmap), plus the connection outputs
+      of one node (N), times `overhead` for temporaries.
+    N and C are the padded sizes of the population tensors being evaluated, which can differ from the
+    genome's max_nodes/max_conns (adaptive capacity, size buckets); they default to the genome's.
+    `dtype` defaults to the compute dtype of the genome's precision policy, float32 without one.
+    Without a budget, `memory_fraction` of the free memory of the CUDA device is used, or 1 GiB on CPU.
+    """
+
+    def __init__(
+        self,
+        genome,
+        budget_bytes: int = None,
+        dtype: torch.dtype = None,
+        overhead: float = 2.0,
+        memory_fraction: float = 0.5,
+        device=None,
+    ):
+        self.genome = genome
+        if dtype is None:
+            dtype = genome.precision.compute_dtype if getattr(genome, "precision", None) is not None else torch.float32
+        self.dtype = dtype
+        self.overhead = overhead
+        if budget_bytes is None:
+            device = torch.device(device) if device is not None else None
+            if device is not None and device.type == "cuda":
+                free, _ = torch.cuda.mem_get_info(device)
+                budget_bytes = int(free * memory_fraction)
+            else:
+                budget_bytes = 2**30
+        self.budget_bytes = budget_bytes
+
+    def fixed_bytes(self, num_nodes: int = None, num_conns: int = None) -> int:
+        g = self.genome
+        N = num_nodes if num_nodes is not None else g.max_nodes
+        C = num_conns if num_conns is not None else g.max_conns
+        item = torch.finfo(self.dtype).bits // 8
+        genome_tensors = (N * g.node_gene.length + C * g.conn_gene.length) * item
+        attrs = (N * len(g.node_gene.custom_attrs) + C * len(g.conn_gene.custom_attrs)) * item
+        u_conns = N * N * 4  # int32
+        return int((genome_tensors + attrs + u_conns) * self.overhead)
+
+    def per_input_bytes(self, num_nodes: int = None) -> int:
+        N = num_nodes if num_nodes is not None else self.genome.max_nodes
+        item = torch.finfo(self.dtype).bits // 8
+        return int((3 * N + self.genome.num_inputs + self.genome.num_outputs) * item * self.overhead)
+
+    def estimate(self, num_genomes: int, batch_size: int, num_nodes: int = None, num_conns: int = None) -> int:
+        return num_genomes * (
+            self.fixed_bytes(num_nodes, num_conns) + batch_size * self.per_input_bytes(num_nodes)
+        )
+
+    def chunk_sizes(self, P: int, B: int, num_nodes: int = None, num_conns: int = None) -> Tuple[int, int]:
+        """
+        (genomes per chunk, inputs per chunk): the whole input batch if one genome fits with it,
+        otherwise the largest input chunk that fits, then as many genomes as fit.
+        """
+        fixed, per_input = self.fixed_bytes(num_nodes, num_conns), self.per_input_bytes(num_nodes)
+        if fixed + per_input > self.budget_bytes:
+            raise ValueError(
+                f"budget_bytes={self.budget_bytes} can not hold one genome with one input "
+                f"(about {fixed + per_input} bytes)."
+            )
+        b = min(B, (self.budget_bytes - fixed) // per_input)
+        g = min(P, self.budget_bytes // (fixed + b * per_input))
+        return max(g, 1), max(b, 1)
+
+    def plan(self, P: int, B: int, num_nodes: int = None, num_conns: int = None) -> List[Tuple[slice, slice]]:
+        g, b = self.chunk_sizes(P, B, num_nodes, num_conns)
+        return [
+            (slice(p, min(p + g, P)), slice(i, min(i + b, B)))
+            for p in range(0, P, g)
+            for i in range(0, B, b)
+        ]
+
+    def default_eval(self, state):
+        """
+        `eval_func(transformed, inputs)` running the genome forward of every transformed genome of a chunk.
+        """
+        def eval_func(transformed, inputs):
+            return torch.stack([self.genome.forward(state, t, inputs) for t in transformed])
+        return eval_func
+
+    def evaluate(
+        self,
+        pop_nodes: Tensor,
+        pop_conns: Tensor,
+        inputs: Tensor,
+        eval_func: Callable[[Tensor, Tensor, Tensor], Tensor] = None,
+        state=None,
+        out: Tensor = None,
+    ) -> Tensor:
+        """
+        Outputs (P, B, num_outputs) of all genomes on the (B, num_inputs) inputs, computed chunk by chunk.
+        `eval_func(nodes, conns, inputs)` evaluates a (g, N, NL)/(g, C, CL) chunk on a (b, num_inputs) chunk
+        and returns (g, b, num_outputs); it is called once per block, so any per-genome preparation it does
+        is repeated for every input chunk.
+        By default every genome is transformed once per genome chunk, and the transformed genomes are
+        reused across its input chunks.
+        `out` can be given to reuse a result tensor across calls.
+        """
+        P, B = pop_nodes.shape[0], inputs.shape[0]
+        if out is None:
+            out = torch.empty((P, B, self.genome.num_outputs), dtype=inputs.dtype, device=inputs.device)
+
+        # plan from the tensors actually evaluated, not from the genome's max sizes
+        plan = self.plan(P, B, pop_nodes.shape[1], pop_conns.shape[1])
+        if eval_func is not None:
+            for genomes, batch in plan:
+                out[genomes, batch] = eval_func(pop_nodes[genomes], pop_conns[genomes], inputs[batch])
+            return out
+
+        forward = self.default_eval(state)
+        current, transformed = None, None
+        # the plan walks all input chunks of a genome chunk before moving to the next genome chunk
+        for genomes, batch in plan:
+            if genomes != current:
+                current = genomes
+                transformed = [
+                    self.genome.transform(state, n, c) for n, c in zip(pop_nodes[genomes], pop_conns[genomes])
+                ]
+            out[genomes, batch] = forward(transformed, inputs[batch])
+        return out
@@ -0,0 +1,116 @@
+from typing import Callable, Dict, NamedTuple
+import torch
+from torch import Tensor
+
+
+class CompactGenes(NamedTuple):
+    """
+    A (P, N, L) population tensor split in two: the fixed attrs (keys, indices) as integers,
+    with -1 marking empty rows, and the custom attrs in reduced precision.
+    """
+
+    keys: Tensor
+    attrs: Tensor
+
+
+class PrecisionPolicy:
+    """
+    Reduced precision for population storage and evaluation.
+
+    storage_dtype: dtype of the stored custom attrs (weights, biases, option indices), e.g. bfloat16 or float16.
+        Keys are never rounded, they are stored as `key_dtype` integers.
+    compute_dtype: dtype of the node values and connection outputs in `forward`.
+    accum_dtype: dtype of the aggregation, the node attrs and the returned outputs.
+
+    Give it to DefaultGenome(precision=...) to evaluate in reduced precision, and use
+    `compress`/`decompress` to keep the population in memory at reduced size.
+    """
+
+    def __init__(
+        self,
+        storage_dtype: torch.dtype = torch.bfloat16,
+        compute_dtype: torch.dtype = torch.bfloat16,
+        accum_dtype: torch.dtype = torch.float32,
+        key_dtype: torch.dtype = torch.int32,
+    ):
+        self.storage_dtype = storage_dtype
+        self.compute_dtype = compute_dtype
+        self.accum_dtype = accum_dtype
+        self.key_dtype = key_dtype
+
+    def compress(self, pop_genes: Tensor, num_fixed: int) -> CompactGenes:
+        """
+        Split a (..., N, L) float population tensor whose first `num_fixed` columns are keys.
+        """
+        keys = pop_genes[..., :num_fixed]
+        keys = torch.where(torch.isnan(keys), -1, keys).to(self.key_dtype)
+        return CompactGenes(keys, pop_genes[..., num_fixed:].to(self.storage_dtype))
+
+    def decompress(self, compact: CompactGenes, dtype: torch.dtype = torch.float32) -> Tensor:
+        """
+        Rebuild the float population tensor, with NaN rows for the empty slots.
+        """
+        keys = compact.keys.to(dtype)
+        keys = torch.where(compact.keys < 0, float("nan"), keys)
+        attrs = torch.where(compact.keys[..., :1] < 0, float("nan"), compact.attrs.to(dtype))
+        return torch.cat([keys, attrs], dim=-1)
+
+    def compress_population(self, genome, pop_nodes: Tensor, pop_conns: Tensor):
+        return (
+            self.compress(pop_nodes, len(genome.node_gene.fixed_attrs)),
+            self.compress(pop_conns, len(genome.conn_gene.fixed_attrs)),
+        )
+
+    def decompress_population(self, compact_nodes: CompactGenes, compact_conns: CompactGenes):
+        return self.decompress(compact_nodes), self.decompress(compact_conns)
+
+    def validate(
+        self,
+        genome,
+        state,
+        pop_nodes: Tensor,
+        pop_conns: Tensor,
+        inputs: Tensor,
+        fitness_func: Callable[[Tensor], Tensor] = None,
+    ) -> Dict[str, float]:
+        """
+        Evaluate the population twice, in full precision and with this policy (storage round trip
+        and reduced precision forward), and report how far the results diverge.
+        `fitness_func` maps the (P, ..., num_outputs) outputs to the (P,) fitness.
+        """
+        compact = self.compress_population(genome, pop_nodes, pop_conns)
+        low_nodes, low_conns = self.decompress_population(*compact)
+
+        saved = genome.precision
+        try:
+            genome.precision = None
+            full = self._evaluate(genome, state, pop_nodes, pop_conns, inputs.to(torch.float32))
+            genome.precision = self
+            low = self._evaluate(genome, state, low_nodes, low_conns, inputs)
+        finally:
+            genome.precision = saved
+
+        low = low.to(full.dtype)
+        err = torch.abs(full - low)
+        err = err[~(torch.isnan(full) & torch.isnan(low))]
+        report = {
+            "max_abs_output_error": float(err.max()) if err.numel() else 0.0,
+            "mean_abs_output_error": float(err.mean()) if err.numel() else 0.0,
+        }
+        if fitness_func is not None:
+            full_fitness, low_fitness = fitness_func(full), fitness_func(low)
+            fitness_err = torch.abs(full_fitness - low_fitness)
+            report["max_abs_fitness_error"] = float(torch.nan_to_num(fitness_err, nan=float("inf")).max())
+            # how many individuals change rank, which is what selection sees
+            full_rank = torch.argsort(torch.nan_to_num(full_fitness, nan=-float("inf")), stable=True)
+            low_rank = torch.argsort(torch.nan_to_num(low_fitness, nan=-float("inf")), stable=True)
+            report["rank_changes"] = int((full_rank != low_rank).sum())
+        return report
+
+    @staticmethod
+    def _evaluate(genome, state, pop_nodes, pop_conns, inputs):
+        outputs = []
+        for nodes, conns in zip(pop_nodes, pop_conns):
+            transformed = genome.transform(state, nodes, conns)
+            outputs.append(genome.forward(state, transformed, inputs))
+        return torch.stack(outputs)
@@ -8,20 +8,36 @@ def unflatten_conns(nodes: torch.Tensor, conns: torch.Tensor) -> torch.Tensor:
     Connection length, N means the number of nodes, C means the number of connections.
     Returns the unflattened connection indices with shape (N, N).
     """
-    N = nodes.shape[0]  # max_nodes
-    C = conns.shape[0]  # max_conns
-    node_keys = nodes[:, 0]
-    i_keys, o_keys = conns[:, 0], conns[:, 1]
+    return batch_unflatten_conns(nodes.unsqueeze(0), conns.unsqueeze(0))[0]
 
-    def key_to_indices(key, keys):
-        return fetch_first(key == keys)
 
-    i_idxs = torch.tensor([key_to_indices(key, node_keys) for key in i_keys], dtype=torch.int32)
-    o_idxs = torch.tensor([key_to_indices(key, node_keys) for key in o_keys], dtype=torch.int32)
+def batch_unflatten_conns(
+    pop_nodes: torch.Tensor, pop_conns: torch.Tensor, out: torch.Tensor = None
+) -> torch.Tensor:
+    """
+    Population version of `unflatten_conns`, returns the connection indices with shape (P, N, N).
+    `out` is an optional int32 (P, N, N) tensor to write into instead of allocating one.
+    """
+    P, N = pop_nodes.shape[:2]
+    C = pop_conns.shape[1]
+    node_keys = pop_nodes[..., 0]
+
+    # (P, C, N) key matches; NaN keys never match, so empty slots are dropped
+    i_match = pop_conns[..., 0, None] == node_keys[:, None, :]
+    o_match = pop_conns[..., 1, None] == node_keys[:, None, :]
+    valid = i_match.any(dim=-1) & o_match.any(dim=-1)
+    i_idxs = torch.argmax(i_match.to(torch.int8), dim=-1)
+    o_idxs = torch.argmax(o_match.to(torch.int8), dim=-1)
 
     # Create the unflattened array
-    unflatten = torch.full((N, N), I_INF, dtype=torch.int32)
-    unflatten[i_idxs, o_idxs] = torch.arange(C, dtype=torch.int32)
+    device = pop_nodes.device
+    if out is None:
+        unflatten = torch.full((P, N, N), I_INF, dtype=torch.int32, device=device)
+    else:
+        unflatten = out.fill_(I_INF)
+    p_idxs = torch.arange(P, device=device)[:, None].expand(P, C)
+    c_idxs = torch.arange(C, dtype=torch.int32, device=device)[None, :].expand(P, C)
+    unflatten[p_idxs[valid], i_idxs[valid], o_idxs[valid]] = c_idxs[valid]
 
     return unflatten
 
@@ -33,6 +49,14 @@ def valid_cnt(nodes_or_conns: torch.Tensor) -> int:
     return torch.sum(~torch.isnan(nodes_or_conns[:, 0])).item()
 
 
+def batch_valid_cnt(pop_nodes_or_conns: torch.Tensor) -> torch.Tensor:
+    """
+    Count the valid (non-NaN) entries of every genome in a population at once.
+    Input has shape (P, N, L); returns an int64 tensor of shape (P,) on the same device.
+    """
+    return torch.sum(~torch.isnan(pop_nodes_or_conns[..., 0]), dim=-1)
+
+
 def extract_gene_attrs(gene: BaseGene, gene_array: torch.Tensor) -> torch.Tensor:
     """
     Extract the custom attributes of the gene.
@@ -54,6 +78,8 @@ def add_node(nodes: torch.Tensor, fix_attrs: torch.Tensor, custom_attrs: torch.T
     The new node will be placed at the first NaN row.
     """
     pos = fetch_first(torch.isnan(nodes[:, 0]))
+    if pos == I_INF:
+        raise ValueError("No free slot to add a node, increase max_nodes (or use AdaptiveCapacity.reserve).")
     nodes[pos] = torch.cat((fix_attrs, custom_attrs))
     return nodes
 
@@ -73,6 +99,8 @@ def add_conn(conns: torch.Tensor, fix_attrs: torch.Tensor, custom_attrs: torch.T
     The new connection will be placed at the first NaN row.
     """
     pos = fetch_first(torch.isnan(conns[:, 0]))
+    if pos == I_INF:
+        raise ValueError("No free slot to add a connection, increase max_conns (or use AdaptiveCapacity.reserve).")
     conns[pos] = torch.cat((fix_attrs, custom_attrs))
     return conns
 
@@ -93,30 +121,49 @@ def re_cound_idx(
     Make the key of hidden nodes continuous.
     Also update the index of connections.
     """
-    next_key = max(*input_idx, *output_idx) + 1
-    old2new = {}
-    for i, key in enumerate(nodes[:, 0]):
-        if torch.isnan(key):
-            continue
-        if key in input_idx + output_idx:
-            continue
-        old2new[int(key.item())] = next_key
-        next_key += 1
-
-    new_nodes = nodes.clone()
-    for i, key in enumerate(nodes[:, 0]):
-        if not torch.isnan(key) and int(key.item()) in old2new:
-            new_nodes[i, 0] = old2new[int(key.item())]
-
-    new_conns = conns.clone()
-    for i, (i_key, o_key) in enumerate(conns[:, :2]):
-        if not torch.isnan(i_key) and int(i_key.item()) in old2new:
-            new_conns[i, 0] = old2new[int(i_key.item())]
-        if not torch.isnan(o_key) and int(o_key.item()) in old2new:
-            new_conns[i, 1] = old2new[int(o_key.item())]
+    new_nodes, new_conns = batch_re_cound_idx(
+        nodes.unsqueeze(0), conns.unsqueeze(0), input_idx, output_idx
+    )
+    return new_nodes[0], new_conns[0]
+
+
+def batch_re_cound_idx(
+    pop_nodes: torch.Tensor, pop_conns: torch.Tensor, input_idx: list, output_idx: list
+) -> tuple[torch.Tensor, torch.Tensor]:
+    """
+    Population version of `re_cound_idx`, pop_nodes has shape (P, N, NL) and pop_conns (P, C, CL).
+    Hidden nodes are renumbered in the order they appear in each genome, starting after the
+    largest input/output key. Connection endpoints are remapped by looking their old keys up
+    in the sorted node keys (searchsorted) and gathering the new keys.
+    """
+    io_keys = torch.tensor(list(input_idx) + list(output_idx), device=pop_nodes.device)
+    next_key = io_keys.max() + 1
+
+    keys = pop_nodes[..., 0]
+    valid = ~torch.isnan(keys)
+    hidden = valid & ~torch.isin(keys, io_keys.to(keys.dtype))
+    hidden_rank = torch.cumsum(hidden, dim=-1) - 1
+    new_keys = torch.where(hidden, (next_key + hidden_rank).to(keys.dtype), keys)
+
+    # sort the old keys once per genome, NaN (empty) slots go to the end as +inf
+    sorted_keys, order = torch.sort(torch.where(valid, keys, float("inf")), dim=-1)
+
+    def remap(conn_keys):
+        pos = torch.searchsorted(sorted_keys, conn_keys.contiguous())
+        pos = pos.clamp(max=keys.shape[-1] - 1)
+        found = torch.gather(sorted_keys, -1, pos) == conn_keys
+        mapped = torch.gather(new_keys, -1, torch.gather(order, -1, pos))
+        return torch.where(found, mapped, conn_keys)
+
+    new_nodes = pop_nodes.clone()
+    new_nodes[..., 0] = new_keys
+    new_conns = pop_conns.clone()
+    new_conns[..., 0] = remap(pop_conns[..., 0])
+    new_conns[..., 1] = remap(pop_conns[..., 1])
 
     return new_nodes, new_conns
 
+
 def split_generator(base_gen: torch.Generator, num_splits: int):
     """
     Mimic JAX's random.split by creating independent PyTorch generators.